@@ -44,6 +44,11 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 
+try:
+    from src.diagnostics_sidecar import load_sidecar_diagnostics
+except ImportError:
+    from diagnostics_sidecar import load_sidecar_diagnostics
+
 
 def load_config(config_path: str) -> dict:
     """Load configuration from YAML file."""
@@ -146,10 +151,13 @@ def extract_exif_data(image_path: Path) -> Dict:
 
 
 def load_metadata(metadata_path: Path) -> Dict:
-    """Load metadata from JSON file."""
+    """Load metadata from JSON file, merging diagnostics from a sidecar file."""
     try:
         with open(metadata_path, "r") as f:
-            return json.load(f)
+            metadata = json.load(f)
+        if "diagnostics" not in metadata:
+            metadata.update(load_sidecar_diagnostics(metadata_path))
+        return metadata
     except Exception as e:
         print(f"Warning: Could not load metadata from {metadata_path}: {e}")
         return {}
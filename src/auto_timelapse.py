@@ -5,39 +5,52 @@ Perfect for 24/7 timelapses that capture both daylight and nighttime scenes,
 including stars and aurora activity.
 """
 
+import bisect
+import copy
+import functools
+import gzip
+import importlib.util
+import json
+import math
 import os
 import sys
 import time
 import signal
+from collections import deque
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Deque, Dict, Optional, Tuple, Union
 import yaml
 
-# Optional: Sun position calculation for polar regions
+# Optional: Sun position calculation for polar regions. Only probed here;
+# astral is imported when a location is configured (see _init_location).
+ASTRAL_AVAILABLE = importlib.util.find_spec("astral") is not None
+
+# Optional: Faster JSON for per-frame metadata rewrites
 try:
-    from astral import LocationInfo
-    from astral.sun import elevation
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-    ASTRAL_AVAILABLE = True
+# Use the libyaml C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
 except ImportError:
-    ASTRAL_AVAILABLE = False
+    from yaml import SafeLoader as _YamlLoader
 
 # Handle imports for both module and script execution
 try:
     from src.logging_config import get_logger
     from src.capture_image import CameraConfig, ImageCapture
-    from src.ml_exposure_v2 import MLExposurePredictorV2
     from src.database import CaptureDatabase
+    from src.diagnostics_sidecar import sidecar_path as _diagnostics_sidecar_path
     from src.system_monitor import SystemMonitor
 except ImportError:
     from logging_config import get_logger
     from capture_image import CameraConfig, ImageCapture
-
-    try:
-        from ml_exposure_v2 import MLExposurePredictorV2
-    except ImportError:
-        MLExposurePredictorV2 = None  # ML v2 module not available
+    from diagnostics_sidecar import sidecar_path as _diagnostics_sidecar_path
 
     try:
         from database import CaptureDatabase
@@ -52,9 +65,89 @@ except ImportError:
 # Initialize logger
 logger = get_logger("auto_timelapse")
 
+# JPEG start-of-image marker, used to reject truncated/non-JPEG files cheaply
+_JPEG_MAGIC = b"\xff\xd8\xff"
+
+# Percentiles reported by _analyze_image_brightness (5th, 25th, median, 75th, 95th)
+_BRIGHTNESS_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _read_json_file(path) -> Dict:
+    """Read a JSON file as bytes and parse it (orjson when available)."""
+    data = Path(path).read_bytes()
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config_file(path: str, mtime_ns: int, size: int, use_disk_cache: bool = False) -> Dict:
+    """Parse a config file (.json, otherwise YAML).
+
+    Cached per file version (mtime and size are part of the key), so reloading
+    an unchanged config skips parsing. Callers must copy the result before
+    modifying it. With use_disk_cache the parsed YAML is also kept in a
+    "<config>.cache.json" file next to the config, so new processes can skip
+    YAML parsing until the config changes. The flag is part of the cache key,
+    so switching it on takes effect without the file changing.
+    """
+    if path.endswith(".json"):
+        return _read_json_file(path)
+
+    # Optional on-disk JSON copy of the parsed YAML for faster cold starts
+    cache_path = path + ".cache.json"
+    if use_disk_cache:
+        try:
+            cached = _read_json_file(cache_path)
+            if cached.get("source_mtime_ns") == mtime_ns and cached.get("source_size") == size:
+                return cached["config"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass  # Missing, stale or unreadable cache - parse the YAML
+
+    config = yaml.load(Path(path).read_bytes(), Loader=_YamlLoader)
+
+    if use_disk_cache:
+        try:
+            _write_json_file(
+                cache_path, {"source_mtime_ns": mtime_ns, "source_size": size, "config": config}
+            )
+        except (OSError, TypeError) as e:
+            logger.debug(f"Could not write config cache {cache_path}: {e}")
+    return config
+
+
+def _write_json_file(path, data: Dict):
+    """Write data as indented JSON bytes (orjson when available)."""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(
+            data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        )
+    else:
+        payload = json.dumps(data, indent=2, default=str).encode("utf-8")
+    Path(path).write_bytes(payload)
+
+
+def _append_json_line(path, data: Dict, compress: bool = False):
+    """Append data as one compact JSON line (a single write, no read-back).
+
+    With compress=True the line is appended as its own gzip member (fast level 1).
+    Concatenated members form a valid gzip file that gzip.open() reads as one stream.
+    """
+    if ORJSON_AVAILABLE:
+        line = orjson.dumps(data, default=str, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    else:
+        line = (json.dumps(data, default=str) + "\n").encode("utf-8")
+    with gzip.open(path, "ab", compresslevel=1) if compress else open(path, "ab") as f:
+        f.write(line)
+
 
 class LightMode:
-    """Light mode enumeration."""
+    """Light mode enumeration.
+
+    Plain string constants rather than an Enum: the values are interned, so
+    the per-frame mode checks (e.g. in _apply_hysteresis) compare by identity
+    and the modes serialize straight into metadata and state files.
+    """
 
     NIGHT = "night"
     DAY = "day"
@@ -81,6 +174,98 @@ class BrightnessZones:
     CRITICAL_LOW_FACTOR = 4.0  # Increase by 300% for Arctic winter twilight
 
 
+# Brightness zone lookup for _get_emergency_brightness_factor, darkest zone first.
+# Low zones apply strictly below their threshold and high zones strictly above it,
+# so the high bounds are nudged up by one ulp to keep both strict under bisect_right.
+_EMERGENCY_ZONE_BOUNDS = (
+    BrightnessZones.CRITICAL_LOW,
+    BrightnessZones.EMERGENCY_LOW,
+    BrightnessZones.WARNING_LOW,
+    math.nextafter(BrightnessZones.WARNING_HIGH, math.inf),
+    math.nextafter(BrightnessZones.EMERGENCY_HIGH, math.inf),
+)
+_EMERGENCY_ZONES = (
+    (BrightnessZones.CRITICAL_LOW_FACTOR, "CRITICAL UNDEREXPOSURE"),
+    (BrightnessZones.EMERGENCY_LOW_FACTOR, "SEVERE UNDEREXPOSURE"),
+    (BrightnessZones.WARNING_LOW_FACTOR, "Underexposure warning"),
+    (1.0, None),
+    (BrightnessZones.WARNING_HIGH_FACTOR, "Overexposure warning"),
+    (BrightnessZones.EMERGENCY_HIGH_FACTOR, "SEVERE OVEREXPOSURE"),
+)
+
+
+class ExposureDetectionThresholds:
+    """Thresholds for over/underexposure detection (fast ramp-down/ramp-up)."""
+
+    # Overexposure: mean brightness (0-255) and percentage of clipped pixels
+    OVER_CRITICAL = 170  # Critical overexposure
+    OVER_WARNING = 150  # Early warning threshold
+    OVER_SAFE = 130  # Clear fast ramp-down below this
+    CLIPPED_CRITICAL = 10  # Critical if >10% pixels clipped
+    CLIPPED_WARNING = 5  # Trigger if >5% pixels clipped
+    CLIPPED_SAFE = 3  # Clear if <3% pixels clipped
+
+    # Underexposure: mean brightness (0-255), target is 120
+    UNDER_CRITICAL = 70  # Critical underexposure
+    UNDER_WARNING = 90  # Early warning
+    UNDER_SAFE = 105  # Clear underexposure above this
+
+
+class HighlightProtectionThresholds:
+    """p95 thresholds (0-255) and factors for proactive highlight protection."""
+
+    SAFE = 200  # Below this, no adjustment needed
+    WARNING = 220  # End of gentle reduction
+    CRITICAL = 240  # Near clipping, more aggressive beyond this
+    WARNING_FACTOR = 0.95  # Factor reached at WARNING
+    CRITICAL_FACTOR = 0.85  # Factor reached at CRITICAL
+    MIN_FACTOR = 0.70  # Floor for imminent clipping
+
+
+class DayWBReferenceLimits:
+    """When camera AWB gains are trusted as the day white balance reference."""
+
+    MIN_LUX = 200  # Only learn from bright daylight
+    GAIN_MIN = 1.0  # Red/blue gains must lie strictly inside (GAIN_MIN, GAIN_MAX)
+    GAIN_MAX = 4.0
+
+
+@functools.lru_cache(maxsize=8)
+def _sequential_ramp_breakpoints(
+    seed_exposure: float, seed_gain: float, max_exposure: float, max_gain: float
+) -> Tuple[float, float, float, float, float]:
+    """Phase boundary and log10 endpoints for sequential ramping.
+
+    These only depend on the transition seed and the night limits, which stay
+    fixed for a whole transition, so they are cached instead of recomputed per
+    frame. Expects a positive seed EV (seed_exposure * seed_gain).
+
+    Returns:
+        Tuple of (phase1_end, log_seed_exposure, log_max_exposure,
+        log_seed_gain, log_max_gain)
+    """
+    ev_seed = seed_exposure * seed_gain
+    ev_night = max_exposure * max_gain
+
+    # Phase boundary: when does exposure hit max?
+    # Exposure range: seed_exposure → max_exposure
+    # This represents a portion of total EV range
+    exposure_ev_range = math.log2(max_exposure / seed_exposure) if seed_exposure > 0 else 10
+    total_ev_range = math.log2(ev_night / ev_seed) if ev_seed > 0 else 12
+
+    # Phase 1 ends when exposure is maxed
+    phase1_end = exposure_ev_range / total_ev_range if total_ev_range > 0 else 0.5
+    phase1_end = max(0.1, min(0.9, phase1_end))  # Clamp to reasonable range
+
+    return (
+        phase1_end,
+        math.log10(max(0.0001, seed_exposure)),
+        math.log10(max_exposure),
+        math.log10(max(0.5, seed_gain)),
+        math.log10(max_gain),
+    )
+
+
 class SustainedDriftCorrector:
     """
     Sustained drift correction for ML-first exposure.
@@ -93,6 +278,15 @@ class SustainedDriftCorrector:
     when brightness consistently deviates from target.
     """
 
+    __slots__ = (
+        "_error_history",
+        "_n_below",
+        "_n_above",
+        "_threshold_frames",
+        "_min_error",
+        "_last_correction",
+    )
+
     def __init__(self, threshold_frames: int = 3, min_error: float = 20.0):
         """
         Initialize drift corrector.
@@ -101,7 +295,12 @@ class SustainedDriftCorrector:
             threshold_frames: Number of consecutive frames needed to trigger correction
             min_error: Minimum brightness error to consider (0-255 scale)
         """
-        self._error_history: List[float] = []
+        # Ring buffer of the last threshold_frames errors (only those are ever inspected)
+        self._error_history: Deque[float] = deque(maxlen=threshold_frames)
+        # How many buffered errors are below -min_error / above +min_error,
+        # kept in step with the buffer so the drift check needs no scan
+        self._n_below = 0
+        self._n_above = 0
         self._threshold_frames = threshold_frames
         self._min_error = min_error
         self._last_correction = 1.0
@@ -122,21 +321,24 @@ class SustainedDriftCorrector:
             return self._last_correction
 
         error = brightness - target
-        self._error_history.append(error)
-
-        # Keep recent history only (2x threshold for smoothing)
-        max_history = self._threshold_frames * 2
-        if len(self._error_history) > max_history:
-            self._error_history = self._error_history[-max_history:]
+        min_error = self._min_error
+        recent = self._error_history
+        if len(recent) == recent.maxlen:
+            # Oldest error drops out on append; take it out of the counts first
+            evicted = recent[0]
+            if evicted < -min_error:
+                self._n_below -= 1
+            elif evicted > min_error:
+                self._n_above -= 1
+        recent.append(error)
+        if error < -min_error:
+            self._n_below += 1
+        elif error > min_error:
+            self._n_above += 1
 
         # Check for sustained drift (threshold_frames consecutive errors same direction)
-        if len(self._error_history) >= self._threshold_frames:
-            recent = self._error_history[-self._threshold_frames :]
-
-            all_low = all(e < -self._min_error for e in recent)
-            all_high = all(e > self._min_error for e in recent)
-
-            if all_low or all_high:
+        if len(recent) >= self._threshold_frames:
+            if self._n_below == len(recent) or self._n_above == len(recent):
                 avg_error = sum(recent) / len(recent)
                 # Gentler correction: max 30% change per update
                 # Negative error (too dark) -> correction > 1.0 (increase exposure)
@@ -161,23 +363,39 @@ class SustainedDriftCorrector:
 
     def reset(self):
         """Reset drift history (e.g., after mode change)."""
-        self._error_history = []
+        self._error_history.clear()
+        self._n_below = 0
+        self._n_above = 0
         self._last_correction = 1.0
 
 
 class AdaptiveTimelapse:
     """Handles adaptive timelapse capture with automatic exposure adjustment."""
 
-    def __init__(self, config_path: str = "config/config.yml"):
+    def __init__(self, config_path: str = "config/config.yml", config: Optional[Dict] = None):
         """
         Initialize adaptive timelapse.
 
         Args:
             config_path: Path to configuration file
+            config: Already parsed configuration (skips reading config_path)
         """
         self.config_path = config_path
-        self.config = self._load_config()
-        self.camera_config = CameraConfig(config_path)
+        self.config = config if config is not None else self._load_config()
+
+        # Config sections used every frame, resolved once. These are references
+        # into self.config (not copies), so runtime edits to values read through
+        # them still apply. Tuning values copied into attributes further down
+        # (e.g. lux_smoothing_factor, hysteresis_frames, the transition speeds
+        # and ev_safety_clamp_enabled) are read once at startup; set the
+        # attribute (e.g. _ev_clamp_enabled) to change one at runtime.
+        self._adaptive_config: Dict = self.config.get("adaptive_timelapse", {})
+        self._night_config: Dict = self._adaptive_config.get("night_mode", {})
+        self._day_config: Dict = self._adaptive_config.get("day_mode", {})
+        self._transition_config: Dict = self._adaptive_config.get("transition_mode", {})
+        self._light_thresholds: Dict = self._adaptive_config.get("light_thresholds", {})
+        # Own copy so runtime edits to self.config don't leak into the camera config
+        self.camera_config = CameraConfig(config_path, config=copy.deepcopy(self.config))
         self.running = True
         self.frame_count = 0
 
@@ -222,13 +440,22 @@ class AdaptiveTimelapse:
         self._last_day_capture_metadata: Dict = None  # Metadata from last day mode capture
         self._ev_clamp_applied: bool = False  # True after EV clamp applied on first frame
 
+        # Where the "latest image" symlink currently points (set by _create_latest_symlink)
+        self._last_symlink_target: Optional[Path] = None
+
+        # Test shot files live in the metadata folder and are overwritten every frame
+        self._metadata_dir = Path(self.config.get("system", {}).get("metadata_folder", "metadata"))
+        self._test_shot_path = self._metadata_dir / "test_shot.jpg"
+        self._test_shot_metadata_path = self._metadata_dir / "test_shot_metadata.json"
+
         # Load transition smoothing config with defaults
-        transition_config = self.config.get("adaptive_timelapse", {}).get("transition_mode", {})
+        transition_config = self._transition_config
         self._lux_smoothing_factor = transition_config.get("lux_smoothing_factor", 0.3)
         self._hysteresis_frames = transition_config.get("hysteresis_frames", 3)
         self._wb_transition_speed = transition_config.get("wb_transition_speed", 0.15)
         self._gain_transition_speed = transition_config.get("gain_transition_speed", 0.15)
         self._exposure_transition_speed = transition_config.get("exposure_transition_speed", 0.15)
+        self._ev_clamp_enabled = transition_config.get("ev_safety_clamp_enabled", True)
 
         # Brightness feedback config
         self._target_brightness = transition_config.get("target_brightness", 120)
@@ -238,7 +465,7 @@ class AdaptiveTimelapse:
         )
 
         # Contrast-aware brightness target config (overcast boost)
-        adaptive_config = self.config.get("adaptive_timelapse", {})
+        adaptive_config = self._adaptive_config
         bt_config = adaptive_config.get("brightness_target", {})
         self._base_target_brightness = bt_config.get("base", 120)
         self._overcast_boost = bt_config.get("overcast_boost", 15)
@@ -246,6 +473,11 @@ class AdaptiveTimelapse:
         self._contrast_threshold_low = bt_config.get("contrast_threshold_low", 25)
         self._contrast_threshold_high = bt_config.get("contrast_threshold_high", 40)
 
+        # Pixel stride for brightness analysis (4 = every 4th row/column, 1/16 of pixels)
+        self._brightness_sample_stride = max(
+            1, int(adaptive_config.get("brightness_sample_stride", 4))
+        )
+
         # HDR config
         hdr_config = adaptive_config.get("hdr", {})
         self._hdr_enabled = hdr_config.get("enabled", False)
@@ -301,7 +533,7 @@ class AdaptiveTimelapse:
         # Lux stability tracking for trust reduction during rapid changes
         self._previous_lux_for_stability: float = None
         self._last_lux_timestamp: float = None
-        self._frame_interval = self.config.get("adaptive_timelapse", {}).get("interval", 30)
+        self._frame_interval = self._adaptive_config.get("interval", 30)
 
         # Database storage for capture history
         self._database = None
@@ -319,6 +551,25 @@ class AdaptiveTimelapse:
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
 
+    @classmethod
+    def from_config_dict(
+        cls, config: Dict, config_path: str = "config/config.yml"
+    ) -> "AdaptiveTimelapse":
+        """
+        Create an adaptive timelapse from an in-memory configuration.
+
+        The dict is used as-is (not copied), so the instance's runtime edits
+        are visible to the caller.
+
+        Args:
+            config: Configuration with the same structure as config.yml
+            config_path: Path reported for the configuration
+
+        Returns:
+            New AdaptiveTimelapse instance
+        """
+        return cls(config_path, config=config)
+
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully."""
         logger.info(f"Received signal {signum}, shutting down gracefully...")
@@ -336,6 +587,8 @@ class AdaptiveTimelapse:
             return
 
         try:
+            from astral import LocationInfo
+
             lat = location_config.get("latitude", 68.7)
             lon = location_config.get("longitude", 15.4)
             tz = location_config.get("timezone", "Europe/Oslo")
@@ -368,23 +621,29 @@ class AdaptiveTimelapse:
         in favor of simple physics-based feedback (faster, more predictable).
         """
         # Skip ML when using direct brightness control
-        adaptive_config = self.config.get("adaptive_timelapse", {})
+        adaptive_config = self._adaptive_config
         if adaptive_config.get("direct_brightness_control", False):
             logger.info("[ML v2] Skipped - using direct brightness control instead")
             self._ml_enabled = False
             return
 
-        if MLExposurePredictorV2 is None:
-            logger.debug("[ML v2] MLExposurePredictorV2 not available")
-            return
-
         ml_config = adaptive_config.get("ml_exposure", {})
-        self._ml_enabled = ml_config.get("enabled", False)
-
-        if not self._ml_enabled:
+        if not ml_config.get("enabled", False):
             logger.debug("[ML v2] ML exposure prediction disabled in config")
             return
 
+        # Imported here so deployments without ML (the default) never load it
+        try:
+            from src.ml_exposure_v2 import MLExposurePredictorV2
+        except ImportError:
+            try:
+                from ml_exposure_v2 import MLExposurePredictorV2
+            except ImportError:
+                logger.debug("[ML v2] MLExposurePredictorV2 not available")
+                return
+
+        self._ml_enabled = True
+
         # Get database path for ML v2 (it trains from database)
         db_config = self.config.get("database", {})
         db_path = db_config.get("path", "data/timelapse.db")
@@ -520,6 +779,8 @@ class AdaptiveTimelapse:
             return None
 
         try:
+            from astral.sun import elevation
+
             now = datetime.now(timezone.utc)
             self._sun_elevation = elevation(self._location.observer, now)
             return self._sun_elevation
@@ -554,18 +815,23 @@ class AdaptiveTimelapse:
         return is_polar_day
 
     def _load_config(self) -> Dict:
-        """Load configuration from YAML file."""
+        """Load configuration from YAML file (or a .json file with the same structure)."""
         config_file = Path(self.config_path)
         if not config_file.exists():
             logger.error(f"Configuration file not found: {self.config_path}")
             raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
 
         try:
-            with open(config_file, "r") as f:
-                config = yaml.safe_load(f)
-                logger.debug("Configuration loaded successfully")
-                return config
-        except yaml.YAMLError as e:
+            stat = config_file.stat()
+            # RASPILAPSE_CONFIG_CACHE=1 keeps a JSON copy of the parsed YAML on disk
+            use_disk_cache = os.environ.get("RASPILAPSE_CONFIG_CACHE") == "1"
+            # Deep copy: the instance edits its config at runtime
+            config = copy.deepcopy(
+                _parse_config_file(str(config_file), stat.st_mtime_ns, stat.st_size, use_disk_cache)
+            )
+            logger.debug("Configuration loaded successfully")
+            return config
+        except (yaml.YAMLError, ValueError) as e:
             logger.error(f"Failed to parse configuration file: {e}")
             raise
 
@@ -581,16 +847,69 @@ class AdaptiveTimelapse:
         Returns:
             Smoothed lux value
         """
-        if self._smoothed_lux is None:
+        previous = self._smoothed_lux
+        if previous is None:
             # First reading - initialize
-            self._smoothed_lux = raw_lux
+            smoothed = raw_lux
         else:
             # Exponential moving average: new = alpha * raw + (1 - alpha) * old
             alpha = self._lux_smoothing_factor
-            self._smoothed_lux = alpha * raw_lux + (1 - alpha) * self._smoothed_lux
+            smoothed = alpha * raw_lux + (1 - alpha) * previous
+        self._smoothed_lux = smoothed
+
+        logger.debug(f"Lux smoothing: raw={raw_lux:.2f} → smoothed={smoothed:.2f}")
+        return smoothed
+
+    def _smooth_lux_batch(self, raw_lux_values):
+        """
+        Apply lux EMA smoothing to a whole series of readings at once.
+
+        Gives the same result as calling _smooth_lux() on each value in turn
+        (including updating the smoothed state), but runs the recurrence in
+        numpy. Useful when replaying a backlog of historical readings.
+
+        Args:
+            raw_lux_values: Sequence of raw lux values, oldest first
+
+        Returns:
+            numpy array of smoothed lux values
+        """
+        import numpy as np
 
-        logger.debug(f"Lux smoothing: raw={raw_lux:.2f} → smoothed={self._smoothed_lux:.2f}")
-        return self._smoothed_lux
+        values = np.asarray(raw_lux_values, dtype=np.float64).ravel()
+        smoothed = np.empty_like(values)
+        if values.size == 0:
+            return smoothed
+
+        start = 0
+        if self._smoothed_lux is None:
+            # First reading - initialize
+            smoothed[0] = values[0]
+            start = 1
+        state = float(smoothed[0]) if start else self._smoothed_lux
+
+        # The EMA is a linear recurrence, so a block of samples is one
+        # lower-triangular matrix product plus the decayed starting state:
+        #   s[j] = decay^(j+1) * s0 + sum_k alpha * decay^(j-k) * raw[k]
+        # (This is the first-order IIR scipy.signal.lfilter would run; doing it
+        # blockwise in numpy avoids adding scipy as a dependency on the Pi.)
+        alpha = self._lux_smoothing_factor
+        decay = 1.0 - alpha
+        block = 64
+        lags = np.arange(block)
+        offsets = np.subtract.outer(lags, lags)
+        weights = np.where(offsets >= 0, alpha * decay ** np.maximum(offsets, 0), 0.0)
+        carry = decay ** (lags + 1)
+
+        for i in range(start, values.size, block):
+            chunk = values[i : i + block]
+            n = chunk.size
+            smoothed[i : i + n] = weights[:n, :n] @ chunk + carry[:n] * state
+            state = float(smoothed[i + n - 1])
+
+        self._smoothed_lux = state
+        logger.debug(f"Lux smoothing: {values.size} readings → smoothed={state:.2f}")
+        return smoothed
 
     def _apply_hysteresis(self, new_mode: str) -> str:
         """
@@ -635,6 +954,70 @@ class AdaptiveTimelapse:
             )
             return self._last_mode
 
+    def _apply_hysteresis_batch(self, candidate_modes, threshold: int = None):
+        """
+        Apply mode hysteresis to a whole series of candidate modes at once.
+
+        Gives the same result as calling _apply_hysteresis() on each mode in
+        turn (including the hysteresis state left behind), but scans with numpy
+        once per mode switch instead of once per frame. Useful when replaying
+        historical frames.
+
+        Args:
+            candidate_modes: Sequence of modes determined from lux, oldest first
+            threshold: Frames needed before switching (default: hysteresis_frames)
+
+        Returns:
+            numpy object array of the modes actually used
+        """
+        import numpy as np
+
+        modes = np.asarray(candidate_modes)
+        result = np.empty(modes.size, dtype=object)
+        if modes.size == 0:
+            return result
+
+        if threshold is None:
+            threshold = self._hysteresis_frames
+        threshold = max(1, threshold)  # A count of 1 is reached on the first differing frame
+
+        current = self._last_mode
+        hold = self._mode_hold_count
+        start = 0
+        if current is None:
+            # First frame - accept the mode
+            current = str(modes[0])
+            result[0] = current
+            hold = 0
+            start = 1
+
+        while start < modes.size:
+            differs = modes[start:] != current
+            # Consecutive differing frames up to each position (0 where mode matches),
+            # continuing the hold count carried into this segment
+            index = np.arange(differs.size)
+            last_same = np.maximum.accumulate(np.where(differs, -1, index))
+            count = np.where(last_same < 0, index + 1 + hold, index - last_same)
+
+            switches = np.flatnonzero(count >= threshold)
+            if switches.size == 0:
+                result[start:] = current
+                hold = int(count[-1])
+                break
+
+            # Hold previous mode until the switch frame, then accept the new mode
+            switch = int(switches[0])
+            result[start : start + switch] = current
+            logger.debug(f"Mode transition: {current} → {modes[start + switch]} (replay)")
+            current = str(modes[start + switch])
+            result[start + switch] = current
+            hold = 0
+            start += switch + 1
+
+        self._last_mode = current
+        self._mode_hold_count = hold
+        return result
+
     def _interpolate_colour_gains(self, target_gains: tuple, position: float = None) -> tuple:
         """
         Smoothly interpolate colour gains to prevent sudden white balance shifts.
@@ -808,8 +1191,7 @@ class AdaptiveTimelapse:
 
         # Check for underexposure at minimum exposure (fast recovery needed)
         # Get minimum exposure from config
-        adaptive_config = self.config.get("adaptive_timelapse", {})
-        min_exposure = adaptive_config.get("day_mode", {}).get("exposure_time", 0.02)
+        min_exposure = self._day_config.get("exposure_time", 0.02)
 
         # If we're at or near minimum exposure AND the image is significantly dark,
         # apply faster recovery to prevent prolonged dark periods
@@ -960,6 +1342,21 @@ class AdaptiveTimelapse:
         else:
             return self._fast_rampup_speed
 
+    def _get_exposure_ramp_speed(self) -> Optional[float]:
+        """
+        Get the exposure interpolation speed for the current over/underexposure state.
+
+        Underexposure recovery takes priority over overexposure ramp-down.
+
+        Returns:
+            Speed value for exposure interpolation, or None for normal speed
+        """
+        if self._underexposure_detected:
+            return self._get_rampup_speed()
+        if self._overexposure_detected:
+            return self._get_rampdown_speed()
+        return None
+
     def _apply_proactive_exposure_correction(self, test_image_path: str, raw_lux: float) -> None:
         """
         Proactively adjust exposure correction based on test shot brightness.
@@ -1081,22 +1478,23 @@ class AdaptiveTimelapse:
         Returns:
             True if overexposure detected (fast ramp-down active)
         """
+        was_overexposed = self._overexposure_detected
         if not brightness_metrics:
-            return self._overexposure_detected
+            return was_overexposed
 
         mean_brightness = brightness_metrics.get("mean_brightness", 0)
         overexposed_pct = brightness_metrics.get("overexposed_percent", 0)
+        t = ExposureDetectionThresholds
 
-        # Thresholds - lowered for earlier detection
-        brightness_warning = 150  # Early warning threshold
-        brightness_critical = 170  # Critical overexposure
-        brightness_safe = 130  # Clear fast ramp-down below this
-        overexposed_warning = 5  # Trigger if >5% pixels clipped
-        overexposed_safe = 3  # Clear if <3% pixels clipped
-
-        was_overexposed = self._overexposure_detected
+        # Fast path: normal frame and nothing to clear - no state change possible
+        if (
+            not was_overexposed
+            and mean_brightness <= t.OVER_WARNING
+            and overexposed_pct <= t.CLIPPED_WARNING
+        ):
+            return False
 
-        if mean_brightness > brightness_critical or overexposed_pct > overexposed_warning * 2:
+        if mean_brightness > t.OVER_CRITICAL or overexposed_pct > t.CLIPPED_CRITICAL:
             # Critical overexposure - activate fast ramp-down
             self._overexposure_detected = True
             self._overexposure_severity = "critical"
@@ -1105,7 +1503,7 @@ class AdaptiveTimelapse:
                     f"[FastRamp] CRITICAL OVEREXPOSURE: brightness={mean_brightness:.1f}, "
                     f"clipped={overexposed_pct:.1f}% - activating aggressive ramp-down"
                 )
-        elif mean_brightness > brightness_warning or overexposed_pct > overexposed_warning:
+        elif mean_brightness > t.OVER_WARNING or overexposed_pct > t.CLIPPED_WARNING:
             # Warning level overexposure - activate moderate fast ramp-down
             self._overexposure_detected = True
             self._overexposure_severity = "warning"
@@ -1114,7 +1512,7 @@ class AdaptiveTimelapse:
                     f"[FastRamp] OVEREXPOSURE WARNING: brightness={mean_brightness:.1f}, "
                     f"clipped={overexposed_pct:.1f}% - activating fast ramp-down"
                 )
-        elif mean_brightness < brightness_safe and overexposed_pct < overexposed_safe:
+        elif mean_brightness < t.OVER_SAFE and overexposed_pct < t.CLIPPED_SAFE:
             # Back to safe range - deactivate fast ramp-down
             self._overexposure_detected = False
             self._overexposure_severity = None
@@ -1144,19 +1542,18 @@ class AdaptiveTimelapse:
         Returns:
             True if underexposure detected (fast recovery active)
         """
+        was_underexposed = self._underexposure_detected
         if not brightness_metrics:
-            return self._underexposure_detected
+            return was_underexposed
 
         mean_brightness = brightness_metrics.get("mean_brightness", 128)
+        t = ExposureDetectionThresholds
 
-        # Thresholds for underexposure detection (lowered for faster response)
-        brightness_warning = 90  # Early warning (target is 120)
-        brightness_critical = 70  # Critical underexposure
-        brightness_safe = 105  # Clear underexposure above this
-
-        was_underexposed = self._underexposure_detected
+        # Fast path: normal frame and nothing to clear - no state change possible
+        if not was_underexposed and mean_brightness >= t.UNDER_WARNING:
+            return False
 
-        if mean_brightness < brightness_critical:
+        if mean_brightness < t.UNDER_CRITICAL:
             # Critical underexposure - activate aggressive fast recovery
             self._underexposure_detected = True
             self._underexposure_severity = "critical"
@@ -1165,7 +1562,7 @@ class AdaptiveTimelapse:
                     f"[FastRecovery] CRITICAL UNDEREXPOSURE: brightness={mean_brightness:.1f} "
                     f"- activating aggressive ramp-up"
                 )
-        elif mean_brightness < brightness_warning:
+        elif mean_brightness < t.UNDER_WARNING:
             # Warning level underexposure - activate moderate fast recovery
             self._underexposure_detected = True
             self._underexposure_severity = "warning"
@@ -1174,7 +1571,7 @@ class AdaptiveTimelapse:
                     f"[FastRecovery] UNDEREXPOSURE WARNING: brightness={mean_brightness:.1f} "
                     f"- activating fast ramp-up"
                 )
-        elif mean_brightness > brightness_safe:
+        elif mean_brightness > t.UNDER_SAFE:
             # Back to safe range - deactivate fast recovery
             self._underexposure_detected = False
             self._underexposure_severity = None
@@ -1195,13 +1592,15 @@ class AdaptiveTimelapse:
         moves towards the ideal value rather than jumping instantly.
 
         Args:
-            brightness: Current mean brightness (0-255)
+            brightness: Current mean brightness (0-255). None or NaN means no
+                brightness data: the factor relaxes towards 1.0.
 
         Returns:
             Smoothed correction factor (1.0 = no change, <1.0 = reduce, >1.0 = increase)
         """
-        if brightness is None:
-            # Decay towards 1.0 when no brightness data available
+        if brightness is None or math.isnan(brightness):
+            # Decay towards 1.0 when no brightness data available (NaN fails every
+            # zone compare, and bisect would otherwise file it under the top zone)
             # Use slower speed since we're relaxing without new data
             target_factor = 1.0
             speed = self._emergency_factor_speed * 0.5
@@ -1211,25 +1610,10 @@ class AdaptiveTimelapse:
             self._smoothed_emergency_factor = max(0.5, min(4.0, self._smoothed_emergency_factor))
             return self._smoothed_emergency_factor
 
-        # Calculate the ideal (target) factor based on current brightness
-        target_factor = 1.0
-        zone_name = None
-
-        if brightness > BrightnessZones.EMERGENCY_HIGH:
-            target_factor = BrightnessZones.EMERGENCY_HIGH_FACTOR
-            zone_name = "SEVERE OVEREXPOSURE"
-        elif brightness > BrightnessZones.WARNING_HIGH:
-            target_factor = BrightnessZones.WARNING_HIGH_FACTOR
-            zone_name = "Overexposure warning"
-        elif brightness < BrightnessZones.CRITICAL_LOW:
-            target_factor = BrightnessZones.CRITICAL_LOW_FACTOR
-            zone_name = "CRITICAL UNDEREXPOSURE"
-        elif brightness < BrightnessZones.EMERGENCY_LOW:
-            target_factor = BrightnessZones.EMERGENCY_LOW_FACTOR
-            zone_name = "SEVERE UNDEREXPOSURE"
-        elif brightness < BrightnessZones.WARNING_LOW:
-            target_factor = BrightnessZones.WARNING_LOW_FACTOR
-            zone_name = "Underexposure warning"
+        # Calculate the ideal (target) factor based on current brightness zone
+        target_factor, zone_name = _EMERGENCY_ZONES[
+            bisect.bisect_right(_EMERGENCY_ZONE_BOUNDS, brightness)
+        ]
 
         # Smoothly move towards target factor to prevent oscillation
         # Use faster speed when moving away from 1.0 (applying correction)
@@ -1266,6 +1650,47 @@ class AdaptiveTimelapse:
 
         return self._smoothed_emergency_factor
 
+    def _get_emergency_brightness_factor_batch(self, brightness_values):
+        """
+        Advance the smoothed emergency factor over a whole series of frames.
+
+        Gives the same result as calling _get_emergency_brightness_factor() on
+        each value in turn (including updating the smoothed state, and treating
+        None and NaN as frames without data in both paths). Zone targets
+        are looked up in numpy in one pass; the asymmetric smoothing depends on
+        the running state, so it stays a plain float loop. Useful when catching
+        up on a backlog of frames.
+
+        Args:
+            brightness_values: Sequence of mean brightness values (0-255), oldest
+                first. None or NaN marks a frame without brightness data.
+
+        Returns:
+            numpy array of smoothed factors, one per frame
+        """
+        import numpy as np
+
+        values = np.array([np.nan if b is None else b for b in brightness_values], dtype=np.float64)
+        missing = np.isnan(values)
+        zone_factors = np.array([factor for factor, _ in _EMERGENCY_ZONES])
+        zones = np.searchsorted(_EMERGENCY_ZONE_BOUNDS, values, side="right")
+        targets = np.where(missing, 1.0, zone_factors[zones])
+
+        fast = self._emergency_factor_speed * 2.0
+        slow = self._emergency_factor_speed * 0.5
+        state = self._smoothed_emergency_factor
+        smoothed = []
+        for target, no_data in zip(targets.tolist(), missing.tolist()):
+            # Same rule as the scalar path: correct fast, relax (or decay) slowly
+            speed = fast if not no_data and abs(target - 1.0) > abs(state - 1.0) else slow
+            state += speed * (target - state)
+            state = max(0.5, min(4.0, state))
+            smoothed.append(state)
+
+        self._smoothed_emergency_factor = state
+        logger.debug(f"[Emergency] {len(smoothed)} frames → smoothed factor {state:.2f}")
+        return np.array(smoothed, dtype=np.float64)
+
     def get_brightness_adjusted_trust(self, brightness: float, base_trust: float) -> float:
         """
         Reduce ML trust as brightness deviates from target.
@@ -1280,7 +1705,8 @@ class AdaptiveTimelapse:
         Returns:
             Adjusted trust level (0.0-1.0)
         """
-        if brightness is None:
+        # Normal range (the common case): full trust after one chained compare
+        if brightness is None or 70 <= brightness <= 170:
             return base_trust
 
         # Severe cases: force formula (trust = 0)
@@ -1309,6 +1735,7 @@ class AdaptiveTimelapse:
             )
             return adjusted
 
+        # Only NaN gets here (it fails every compare above): keep full trust
         return base_trust
 
     def get_lux_stability_trust(
@@ -1328,36 +1755,26 @@ class AdaptiveTimelapse:
         Returns:
             Trust multiplier (0.5-1.0)
         """
-        if previous_lux is None or previous_lux <= 0 or elapsed_seconds <= 0:
-            return 1.0
-
-        if current_lux <= 0:
+        # One guard covers every input that would make the log undefined
+        if previous_lux is None or previous_lux <= 0 or current_lux <= 0 or elapsed_seconds <= 0:
             return 1.0
 
-        # Calculate rate of change in log space (lux is logarithmic)
-        try:
-            import math
+        # Rate of change in log space (lux is logarithmic)
+        change_per_minute = abs(math.log10(current_lux / previous_lux)) * 60 / elapsed_seconds
 
-            lux_ratio = current_lux / previous_lux
-            log_change = abs(math.log10(lux_ratio))
-            change_per_minute = (log_change / elapsed_seconds) * 60
-
-            # Above 0.3 log-lux/minute = rapid transition (sunrise/sunset)
-            if change_per_minute > 0.3:
-                # Trust reduction: 0.3→0%, 0.6→25%, 1.0+→50%
-                trust_reduction = min(0.5, (change_per_minute - 0.3) * 0.7)
-                trust = 1.0 - trust_reduction
-
-                logger.debug(
-                    f"[ML-Trust] Rapid lux change: {previous_lux:.1f}→{current_lux:.1f} "
-                    f"({change_per_minute:.2f} log-lux/min) - trust reduced to {trust:.0%}"
-                )
-                return trust
+        # Above 0.3 log-lux/minute = rapid transition (sunrise/sunset)
+        # (written as "not >" so a NaN rate keeps full trust)
+        if not change_per_minute > 0.3:
+            return 1.0
 
-        except (ValueError, ZeroDivisionError):
-            pass
+        # Trust reduction: 0.3→0%, 0.6→25%, 1.0+→50%
+        trust = 1.0 - min(0.5, (change_per_minute - 0.3) * 0.7)
 
-        return 1.0
+        logger.debug(
+            f"[ML-Trust] Rapid lux change: {previous_lux:.1f}→{current_lux:.1f} "
+            f"({change_per_minute:.2f} log-lux/min) - trust reduced to {trust:.0%}"
+        )
+        return trust
 
     def get_p95_highlight_factor(self, p95: float) -> float:
         """
@@ -1378,42 +1795,74 @@ class AdaptiveTimelapse:
         - p95 > 240: Aggressive reduction (imminent clipping)
 
         Args:
-            p95: 95th percentile brightness (0-255)
+            p95: 95th percentile brightness (0-255). None or NaN means no p95
+                data (factor 1.0).
 
         Returns:
             Exposure factor (0.7-1.0, multiply target exposure by this)
         """
-        if p95 is None:
+        if p95 is None or math.isnan(p95):
             return 1.0
 
-        # Thresholds for highlight protection
-        safe_threshold = 200  # Below this, no adjustment needed
-        warning_threshold = 220  # Start gentle reduction
-        critical_threshold = 240  # Near clipping, more aggressive
+        # Piecewise linear with a steeper slope per zone. The zones also log at
+        # different levels, so this stays a branch ladder rather than one formula.
+        hp = HighlightProtectionThresholds
 
-        if p95 <= safe_threshold:
+        # Common case first: highlights have headroom
+        if p95 <= hp.SAFE:
             return 1.0
 
-        if p95 <= warning_threshold:
+        if p95 <= hp.WARNING:
             # Gentle reduction: 200→1.0, 220→0.95
-            factor = 1.0 - ((p95 - safe_threshold) / (warning_threshold - safe_threshold)) * 0.05
+            factor = 1.0 - (p95 - hp.SAFE) / (hp.WARNING - hp.SAFE) * (1.0 - hp.WARNING_FACTOR)
             logger.debug(f"[P95-Protect] Highlight warning: p95={p95:.1f} → factor={factor:.3f}")
             return factor
 
-        if p95 <= critical_threshold:
+        if p95 <= hp.CRITICAL:
             # Moderate reduction: 220→0.95, 240→0.85
-            factor = (
-                0.95 - ((p95 - warning_threshold) / (critical_threshold - warning_threshold)) * 0.10
+            factor = hp.WARNING_FACTOR - (p95 - hp.WARNING) / (hp.CRITICAL - hp.WARNING) * (
+                hp.WARNING_FACTOR - hp.CRITICAL_FACTOR
             )
             logger.info(f"[P95-Protect] Highlight critical: p95={p95:.1f} → factor={factor:.3f}")
             return factor
 
         # Very high p95 (>240): Aggressive reduction to 0.70-0.85
-        # 240→0.85, 250→0.77, 255→0.70
-        factor = max(0.70, 0.85 - ((p95 - critical_threshold) / 15) * 0.15)
+        # 240→0.85, 250→0.75, 255→0.70
+        factor = max(
+            hp.MIN_FACTOR,
+            hp.CRITICAL_FACTOR
+            - (p95 - hp.CRITICAL) / (255 - hp.CRITICAL) * (hp.CRITICAL_FACTOR - hp.MIN_FACTOR),
+        )
         logger.warning(f"[P95-Protect] Highlight EMERGENCY: p95={p95:.1f} → factor={factor:.3f}")
         return factor
 
+    def get_p95_highlight_factor_batch(self, p95_values):
+        """
+        Get highlight protection factors for a whole series of p95 values.
+
+        Gives the same factors as get_p95_highlight_factor() on each value (the
+        zones are piecewise linear, so one np.interp over the zone edges covers
+        them all), without the per-frame logging. Useful for replaying metadata.
+
+        Args:
+            p95_values: Sequence of 95th percentile brightness values (0-255).
+                None or NaN marks a frame without p95 data (factor 1.0).
+
+        Returns:
+            numpy array of exposure factors, one per frame
+        """
+        import numpy as np
+
+        hp = HighlightProtectionThresholds
+        values = np.array([np.nan if p is None else p for p in p95_values], dtype=np.float64)
+        # np.interp holds the end values outside the range: 1.0 below SAFE, the floor above 255
+        factors = np.interp(
+            values,
+            (hp.SAFE, hp.WARNING, hp.CRITICAL, 255),
+            (1.0, hp.WARNING_FACTOR, hp.CRITICAL_FACTOR, hp.MIN_FACTOR),
+        )
+        return np.where(np.isnan(values), 1.0, factors)
+
     def _calculate_target_gain_from_lux(self, lux: float) -> float:
         """
         Calculate target analogue gain based on current lux level.
@@ -1433,11 +1882,9 @@ class AdaptiveTimelapse:
         """
         import math
 
-        adaptive_config = self.config["adaptive_timelapse"]
-
         # Get gain limits from config
-        night_gain = adaptive_config["night_mode"]["analogue_gain"]
-        day_gain = adaptive_config.get("day_mode", {}).get("analogue_gain", 1.0)
+        night_gain = self._night_config["analogue_gain"]
+        day_gain = self._day_config.get("analogue_gain", 1.0)
 
         # Clamp lux to reasonable range
         lux = max(0.01, min(10000, lux))
@@ -1457,11 +1904,8 @@ class AdaptiveTimelapse:
         elif lux >= lux_high:
             return day_gain
         else:
-            # Logarithmic interpolation
-            log_position = (math.log10(lux) - math.log10(lux_low)) / (
-                math.log10(lux_high) - math.log10(lux_low)
-            )
-            log_position = max(0.0, min(1.0, log_position))
+            # Logarithmic interpolation (already inside (0, 1) after the checks above)
+            log_position = math.log10(lux / lux_low) / math.log10(lux_high / lux_low)
 
             # Interpolate gain (higher position = lower gain)
             target_gain = night_gain - log_position * (night_gain - day_gain)
@@ -1489,18 +1933,15 @@ class AdaptiveTimelapse:
         Returns:
             Tuple of (target_exposure_seconds, target_gain)
         """
-        import math
-
-        adaptive_config = self.config["adaptive_timelapse"]
-        night_config = adaptive_config["night_mode"]
+        night_config = self._night_config
 
         # Get limits
         max_exposure = night_config["max_exposure_time"]  # e.g., 20s
         max_gain = night_config["analogue_gain"]  # e.g., 8.0
 
         # Get seed values (from last day mode capture) or reasonable defaults
-        seed_exposure = self._seed_exposure if self._seed_exposure else 0.01  # 10ms default
-        seed_gain = self._seed_gain if self._seed_gain else 1.0
+        seed_exposure = self._seed_exposure or 0.01  # 10ms default
+        seed_gain = self._seed_gain or 1.0
 
         # Transition goes from position=1.0 (day) to position=0.0 (night)
         # So we invert to get progress towards night (0=start, 1=end)
@@ -1511,24 +1952,15 @@ class AdaptiveTimelapse:
         # EV_seed = seed_exposure * seed_gain
         # Total EV increase needed = log2(EV_night / EV_seed)
 
-        ev_seed = seed_exposure * seed_gain
-        ev_night = max_exposure * max_gain
-
-        if ev_seed <= 0 or ev_night <= 0:
+        if seed_exposure * seed_gain <= 0 or max_exposure * max_gain <= 0:
             # Fallback to simple calculation
             return self._calculate_target_exposure_from_lux(
                 lux
             ), self._calculate_target_gain_from_lux(lux)
 
-        # Phase boundary: when does exposure hit max?
-        # Exposure range: seed_exposure → max_exposure
-        # This represents a portion of total EV range
-        exposure_ev_range = math.log2(max_exposure / seed_exposure) if seed_exposure > 0 else 10
-        total_ev_range = math.log2(ev_night / ev_seed) if ev_seed > 0 else 12
-
-        # Phase 1 ends when exposure is maxed
-        phase1_end = exposure_ev_range / total_ev_range if total_ev_range > 0 else 0.5
-        phase1_end = max(0.1, min(0.9, phase1_end))  # Clamp to reasonable range
+        phase1_end, log_seed_exp, log_max_exp, log_seed_gain, log_max_gain = (
+            _sequential_ramp_breakpoints(seed_exposure, seed_gain, max_exposure, max_gain)
+        )
 
         if night_progress <= phase1_end:
             # === PHASE 1: Shutter Priority ===
@@ -1536,10 +1968,7 @@ class AdaptiveTimelapse:
             phase1_progress = night_progress / phase1_end  # 0 to 1 within phase 1
 
             # Logarithmic interpolation for exposure
-            log_seed = math.log10(max(0.0001, seed_exposure))
-            log_max = math.log10(max_exposure)
-            log_target = log_seed + phase1_progress * (log_max - log_seed)
-            target_exposure = 10**log_target
+            target_exposure = 10 ** (log_seed_exp + phase1_progress * (log_max_exp - log_seed_exp))
 
             # Keep gain locked at seed value
             target_gain = seed_gain
@@ -1560,10 +1989,7 @@ class AdaptiveTimelapse:
             target_exposure = max_exposure
 
             # Logarithmic interpolation for gain
-            log_seed = math.log10(max(0.5, seed_gain))
-            log_max = math.log10(max_gain)
-            log_target = log_seed + phase2_progress * (log_max - log_seed)
-            target_gain = 10**log_target
+            target_gain = 10 ** (log_seed_gain + phase2_progress * (log_max_gain - log_seed_gain))
 
             logger.debug(
                 f"[Sequential] Phase 2 (Gain): progress={night_progress:.2f}, "
@@ -1591,14 +2017,13 @@ class AdaptiveTimelapse:
         Returns:
             Target exposure time in seconds
         """
-        import math
         import time as time_module
 
-        adaptive_config = self.config["adaptive_timelapse"]
+        adaptive_config = self._adaptive_config
 
         # Get exposure limits from config
-        night_exposure = adaptive_config["night_mode"]["max_exposure_time"]
-        min_exposure = adaptive_config.get("day_mode", {}).get("exposure_time", 0.01)
+        night_exposure = self._night_config["max_exposure_time"]
+        min_exposure = self._day_config.get("exposure_time", 0.01)
 
         # Clamp lux to reasonable range to avoid extreme values
         lux = max(0.01, min(10000, lux))
@@ -1703,6 +2128,52 @@ class AdaptiveTimelapse:
 
         return target_exposure
 
+    def _calculate_target_exposure_from_lux_batch(self, lux_values):
+        """
+        Calculate target exposure times for a whole series of lux levels.
+
+        Gives the same result as calling _calculate_target_exposure_from_lux()
+        on each value with the current state. Without ML the curve depends on
+        no per-call state, so it is evaluated in numpy in one pass (useful for
+        calibration sweeps). With ML enabled every call updates predictor and
+        drift state, so the scalar method is called per value.
+
+        Args:
+            lux_values: Sequence of lux levels
+
+        Returns:
+            numpy array of target exposure times in seconds
+        """
+        import numpy as np
+
+        lux = np.asarray(lux_values, dtype=np.float64).ravel()
+        if self._ml_enabled and self._ml_predictor is not None:
+            return np.fromiter(
+                (self._calculate_target_exposure_from_lux(float(value)) for value in lux),
+                dtype=np.float64,
+                count=lux.size,
+            )
+
+        night_exposure = self._night_config["max_exposure_time"]
+        min_exposure = self._day_config.get("exposure_time", 0.01)
+        reference_lux = self._adaptive_config.get("reference_lux", 3.8)
+
+        # Same steps as the scalar path: formula, P95 protection, severe clamps
+        lux = np.clip(lux, 0.01, 10000)
+        target = (night_exposure * reference_lux) / lux * self._brightness_correction_factor
+
+        p95_factor = self.get_p95_highlight_factor(self._last_p95)
+        if p95_factor < 1.0:
+            target *= p95_factor
+
+        if self._last_brightness is not None:
+            if self._last_brightness > 220:
+                target *= 0.7
+            elif self._last_brightness < 35:
+                target *= 1.8
+
+        return np.clip(target, min_exposure, night_exposure)
+
     def _calculate_exposure_from_brightness(
         self, actual_brightness: float, lux: Optional[float] = None
     ) -> float:
@@ -1723,8 +2194,8 @@ class AdaptiveTimelapse:
         Returns:
             Target exposure in seconds
         """
-        adaptive_config = self.config["adaptive_timelapse"]
-        night_max = adaptive_config["night_mode"]["max_exposure_time"]
+        adaptive_config = self._adaptive_config
+        night_max = self._night_config["max_exposure_time"]
 
         # Handle missing or invalid brightness
         # If we have seeded exposure but no brightness yet (startup), use seeded exposure
@@ -1764,14 +2235,15 @@ class AdaptiveTimelapse:
         ratio = max(0.25, min(4.0, ratio))
 
         # Apply ratio with damping: new = current * ratio^damping
-        new_exposure = self._last_exposure_time * (ratio**damping)
+        # (0.5, the default, is a plain square root; skip the general pow for it)
+        actual_change = math.sqrt(ratio) if damping == 0.5 else ratio**damping
+        new_exposure = self._last_exposure_time * actual_change
 
         # Clamp to valid range
         new_exposure = max(0.0001, min(night_max, new_exposure))
 
         # Log significant corrections
         if abs(ratio - 1.0) > 0.1:
-            actual_change = ratio**damping
             logger.info(
                 f"[DirectFB] brightness={actual_brightness:.0f}, "
                 f"target={self._target_brightness}, ratio={ratio:.2f}, "
@@ -1791,18 +2263,27 @@ class AdaptiveTimelapse:
         Args:
             metadata: Camera metadata containing ColourGains
         """
-        colour_gains = metadata.get("ColourGains")
+        limits = DayWBReferenceLimits
+        # Only update reference in bright daylight - checked first, as it rules
+        # out every night and transition frame
         lux = metadata.get("Lux", 0)
+        if lux <= limits.MIN_LUX:
+            return
 
-        # Only update reference in bright daylight (>200 lux) with valid gains
-        if colour_gains and lux > 200:
-            # Validate gains are reasonable (not extreme values)
-            if 1.0 < colour_gains[0] < 4.0 and 1.0 < colour_gains[1] < 4.0:
-                self._day_wb_reference = tuple(colour_gains)
-                logger.debug(
-                    f"Updated day WB reference: [{colour_gains[0]:.2f}, {colour_gains[1]:.2f}] "
-                    f"at {lux:.0f} lux"
-                )
+        colour_gains = metadata.get("ColourGains")
+        if not colour_gains:
+            return
+
+        # Validate gains are reasonable (not extreme values)
+        red_gain, blue_gain = colour_gains[0], colour_gains[1]
+        if (
+            limits.GAIN_MIN < red_gain < limits.GAIN_MAX
+            and limits.GAIN_MIN < blue_gain < limits.GAIN_MAX
+        ):
+            self._day_wb_reference = tuple(colour_gains)
+            logger.debug(
+                f"Updated day WB reference: [{red_gain:.2f}, {blue_gain:.2f}] at {lux:.0f} lux"
+            )
 
     def _apply_ev_safety_clamp(
         self, target_exposure: float, target_gain: float
@@ -1823,54 +2304,55 @@ class AdaptiveTimelapse:
         Returns:
             Tuple of (clamped_exposure, clamped_gain)
         """
-        # Check if EV safety clamp is disabled in config
-        transition = self.config["adaptive_timelapse"].get("transition_mode", {})
-        if not transition.get("ev_safety_clamp_enabled", True):
-            return target_exposure, target_gain
-
-        # Only apply clamp on first manual frame (when we have seed values)
-        # Bug fix: only apply ONCE, not every frame
-        if not self._transition_seeded or self._seed_exposure is None or self._seed_gain is None:
-            return target_exposure, target_gain
-
-        # Skip if clamp was already applied (only apply on first frame)
-        if self._ev_clamp_applied:
+        # Fast path: the clamp is a no-op on almost every frame, so bail out
+        # on plain attribute reads before touching config or doing any math.
+        # Only apply clamp on first manual frame (when we have seed values),
+        # only ONCE (not every frame), and only if enabled in config.
+        seed_exposure = self._seed_exposure
+        seed_gain = self._seed_gain
+        if (
+            not self._transition_seeded
+            or seed_exposure is None
+            or seed_gain is None
+            or self._ev_clamp_applied
+            or not self._ev_clamp_enabled
+        ):
             return target_exposure, target_gain
 
-        # Calculate EVs (EV = exposure * gain, proportional to light captured)
-        seed_ev = self._seed_exposure * self._seed_gain
+        # Calculate EVs (EV = exposure * gain, proportional to light captured).
+        # seed_ev is deliberately not cached at seeding time: the seed values are
+        # plain attributes set from several paths, and this point is only reached
+        # on transition frames before the clamp fires.
+        seed_ev = seed_exposure * seed_gain
         proposed_ev = target_exposure * target_gain
 
         if seed_ev <= 0 or proposed_ev <= 0:
             return target_exposure, target_gain
 
-        # Calculate percentage difference
-        ev_ratio = proposed_ev / seed_ev
-        ev_diff_percent = abs(ev_ratio - 1.0) * 100
-
-        if ev_diff_percent > 5.0:
-            # Clamp: adjust exposure to match seed EV while keeping proposed gain
-            # EV_seed = exposure_new * gain_proposed
-            # exposure_new = EV_seed / gain_proposed
-            clamped_exposure = seed_ev / target_gain
+        # Within ±5% of the seed EV: nothing to do (one chained compare, no division)
+        if seed_ev * 0.95 <= proposed_ev <= seed_ev * 1.05:
+            return target_exposure, target_gain
 
-            # Ensure within valid range
-            night_config = self.config["adaptive_timelapse"]["night_mode"]
-            max_exposure = night_config["max_exposure_time"]
-            min_exposure = 0.0001  # 100µs
+        # Clamp: adjust exposure to match seed EV while keeping proposed gain
+        # EV_seed = exposure_new * gain_proposed
+        # exposure_new = EV_seed / gain_proposed
+        clamped_exposure = seed_ev / target_gain
 
-            clamped_exposure = max(min_exposure, min(max_exposure, clamped_exposure))
+        # Ensure within valid range
+        max_exposure = self._night_config["max_exposure_time"]
+        min_exposure = 0.0001  # 100µs
 
-            logger.info(
-                f"[Safety] EV clamp applied: proposed EV differs by {ev_diff_percent:.1f}%. "
-                f"Adjusted exposure {target_exposure:.4f}s → {clamped_exposure:.4f}s "
-                f"to match auto EV={seed_ev:.4f}"
-            )
-            # Mark clamp as applied so it only runs once
-            self._ev_clamp_applied = True
-            return clamped_exposure, target_gain
+        clamped_exposure = max(min_exposure, min(max_exposure, clamped_exposure))
 
-        return target_exposure, target_gain
+        ev_diff_percent = abs(proposed_ev / seed_ev - 1.0) * 100
+        logger.info(
+            f"[Safety] EV clamp applied: proposed EV differs by {ev_diff_percent:.1f}%. "
+            f"Adjusted exposure {target_exposure:.4f}s → {clamped_exposure:.4f}s "
+            f"to match auto EV={seed_ev:.4f}"
+        )
+        # Mark clamp as applied so it only runs once
+        self._ev_clamp_applied = True
+        return clamped_exposure, target_gain
 
     def _seed_from_metadata(self, metadata: Dict, capture_metadata: Dict = None):
         """
@@ -1896,14 +2378,16 @@ class AdaptiveTimelapse:
         if colour_gains is not None:
             # Validate gains are reasonable
             if 1.0 < colour_gains[0] < 4.0 and 1.0 < colour_gains[1] < 4.0:
-                self._seed_wb_gains = tuple(colour_gains)
+                # Build one immutable float tuple and share it (no per-field copies)
+                seed_gains = (float(colour_gains[0]), float(colour_gains[1]))
+                self._seed_wb_gains = seed_gains
                 # Update day WB reference since this is what AWB chose at transition
-                self._day_wb_reference = tuple(colour_gains)
+                self._day_wb_reference = seed_gains
                 # DON'T set _last_colour_gains directly - let interpolation continue
                 # smoothly from wherever it currently is. This prevents abrupt WB jumps.
                 # Only initialize if we don't have any previous gains
                 if self._last_colour_gains is None:
-                    self._last_colour_gains = tuple(colour_gains)
+                    self._last_colour_gains = seed_gains
                     logger.info(
                         f"[Holy Grail] Initialized WB from AWB: "
                         f"[{colour_gains[0]:.2f}, {colour_gains[1]:.2f}]"
@@ -1921,15 +2405,15 @@ class AdaptiveTimelapse:
             analogue_gain = capture_metadata.get("AnalogueGain")
 
             if exposure_time_us is not None:
-                self._seed_exposure = exposure_time_us / 1_000_000
+                self._seed_exposure = float(exposure_time_us) / 1_000_000
                 self._last_exposure_time = self._seed_exposure
                 logger.info(
                     f"[Holy Grail] Seeded exposure from last capture: {self._seed_exposure:.4f}s"
                 )
 
             if analogue_gain is not None:
-                self._seed_gain = analogue_gain
-                self._last_analogue_gain = analogue_gain
+                self._seed_gain = float(analogue_gain)
+                self._last_analogue_gain = self._seed_gain
                 logger.info(f"[Holy Grail] Seeded gain from last capture: {self._seed_gain:.2f}")
 
         self._transition_seeded = True
@@ -1976,16 +2460,14 @@ class AdaptiveTimelapse:
         Returns:
             Target colour gains tuple (red, blue)
         """
-        night_config = self.config["adaptive_timelapse"]["night_mode"]
-        night_gains = tuple(night_config.get("colour_gains", [1.83, 2.02]))
+        night_gains = tuple(self._night_config.get("colour_gains", [1.83, 2.02]))
 
         if mode == LightMode.NIGHT:
             return night_gains
 
         # For day and transition, we need day reference
         # Priority: 1) Fixed config gains, 2) Learned AWB reference, 3) Default
-        day_config = self.config["adaptive_timelapse"].get("day_mode", {})
-        fixed_gains = day_config.get("fixed_colour_gains")
+        fixed_gains = self._day_config.get("fixed_colour_gains")
         if fixed_gains:
             day_gains = tuple(fixed_gains)
         else:
@@ -2029,13 +2511,15 @@ class AdaptiveTimelapse:
             from PIL import Image
             import numpy as np
 
-            # Open image and convert to grayscale
-            img = Image.open(test_image_path)
-            img_gray = img.convert("L")  # Convert to grayscale
-            img_array = np.array(img_gray)
+            with Image.open(test_image_path) as img:
+                # Mean brightness needs no full-resolution decode: let libjpeg
+                # decode scaled-down luma directly (no-op for non-JPEG files)
+                img.draft("L", (512, 512))
+                img_gray = img if img.mode == "L" else img.convert("L")
 
-            # Calculate mean brightness (0-255)
-            mean_brightness = np.mean(img_array)
+                # Calculate mean brightness (0-255) as one vectorized reduction
+                # over a zero-copy view of the pixel buffer
+                mean_brightness = float(np.asarray(img_gray, dtype=np.uint8).mean())
 
             # Calculate lux based on brightness and camera settings
             # The brighter the image with less exposure time/gain, the more ambient light
@@ -2093,7 +2577,7 @@ class AdaptiveTimelapse:
         Returns:
             Light mode (night, day, or transition)
         """
-        thresholds = self.config["adaptive_timelapse"]["light_thresholds"]
+        thresholds = self._light_thresholds
         night_threshold = thresholds["night"]
         day_threshold = thresholds["day"]
 
@@ -2170,11 +2654,11 @@ class AdaptiveTimelapse:
         Returns:
             Dictionary of camera control settings
         """
-        adaptive_config = self.config["adaptive_timelapse"]
+        adaptive_config = self._adaptive_config
         settings = {}
 
         if mode == LightMode.NIGHT:
-            night = adaptive_config["night_mode"]
+            night = self._night_config
             # Disable auto-exposure, auto-gain, and auto-white-balance for manual control
             settings["AeEnable"] = 0
 
@@ -2259,12 +2743,7 @@ class AdaptiveTimelapse:
             else:
                 # Normal operation - use standard ramps with over/underexposure adjustments
                 gain_speed = None
-                if self._underexposure_detected:
-                    exposure_speed = self._get_rampup_speed()
-                elif self._overexposure_detected:
-                    exposure_speed = self._get_rampdown_speed()
-                else:
-                    exposure_speed = None
+                exposure_speed = self._get_exposure_ramp_speed()
 
             smooth_gain = self._interpolate_gain(target_gain, gain_speed)
             smooth_exposure = self._interpolate_exposure(target_exposure, exposure_speed)
@@ -2286,8 +2765,8 @@ class AdaptiveTimelapse:
             )
 
         elif mode == LightMode.DAY:
-            day = adaptive_config["day_mode"]
-            transition_config = adaptive_config.get("transition_mode", {})
+            day = self._day_config
+            transition_config = self._transition_config
 
             # Check if direct brightness control is enabled (new simple approach)
             direct_control = adaptive_config.get("direct_brightness_control", False)
@@ -2323,12 +2802,7 @@ class AdaptiveTimelapse:
 
                 # Apply smooth interpolation to prevent jumps
                 # Use fast ramp-up for underexposure or fast ramp-down for overexposure
-                if self._underexposure_detected:
-                    exposure_speed = self._get_rampup_speed()
-                elif self._overexposure_detected:
-                    exposure_speed = self._get_rampdown_speed()
-                else:
-                    exposure_speed = None
+                exposure_speed = self._get_exposure_ramp_speed()
                 smooth_gain = self._interpolate_gain(target_gain)
                 smooth_exposure = self._interpolate_exposure(target_exposure, exposure_speed)
 
@@ -2379,8 +2853,8 @@ class AdaptiveTimelapse:
             logger.info(f"Day mode: {exposure_info}, {gain_info}, {wb_info}")
 
         elif mode == LightMode.TRANSITION:
-            transition = adaptive_config["transition_mode"]
-            thresholds = adaptive_config["light_thresholds"]
+            transition = self._transition_config
+            thresholds = self._light_thresholds
 
             # Disable auto-exposure for manual control
             settings["AeEnable"] = 0
@@ -2391,8 +2865,8 @@ class AdaptiveTimelapse:
             if direct_control and lux is not None:
                 # DIRECT BRIGHTNESS FEEDBACK for transition mode
                 # Simple physics-based control - no ML, no complex interpolation
-                night_max = adaptive_config["night_mode"]["max_exposure_time"]
-                night_gain = adaptive_config["night_mode"]["analogue_gain"]
+                night_max = self._night_config["max_exposure_time"]
+                night_gain = self._night_config["analogue_gain"]
 
                 # Calculate exposure directly from brightness error
                 target_exposure = self._calculate_exposure_from_brightness(
@@ -2474,12 +2948,8 @@ class AdaptiveTimelapse:
                 if self._brightness_correction_factor != 1.0:
                     corrected_exposure = target_exposure * self._brightness_correction_factor
                     # Clamp to valid range
-                    max_exp = self.config["adaptive_timelapse"]["night_mode"]["max_exposure_time"]
-                    min_exp = (
-                        self.config["adaptive_timelapse"]
-                        .get("day_mode", {})
-                        .get("exposure_time", 0.01)
-                    )
+                    max_exp = self._night_config["max_exposure_time"]
+                    min_exp = self._day_config.get("exposure_time", 0.01)
                     corrected_exposure = max(min_exp, min(max_exp, corrected_exposure))
                     logger.debug(
                         f"[Transition] Brightness correction: {target_exposure:.4f}s x "
@@ -2493,12 +2963,8 @@ class AdaptiveTimelapse:
                 if emergency_factor != 1.0:
                     target_exposure *= emergency_factor
                     # Clamp to valid range (same as brightness correction block)
-                    max_exp = self.config["adaptive_timelapse"]["night_mode"]["max_exposure_time"]
-                    min_exp = (
-                        self.config["adaptive_timelapse"]
-                        .get("day_mode", {})
-                        .get("exposure_time", 0.01)
-                    )
+                    max_exp = self._night_config["max_exposure_time"]
+                    min_exp = self._day_config.get("exposure_time", 0.01)
                     target_exposure = max(min_exp, min(max_exp, target_exposure))
                     logger.debug(
                         f"[Transition] Emergency factor {emergency_factor:.2f} -> "
@@ -2513,12 +2979,7 @@ class AdaptiveTimelapse:
 
                 # Apply smooth interpolation to prevent jumps
                 # Use fast ramp-up for underexposure or fast ramp-down for overexposure
-                if self._underexposure_detected:
-                    exposure_speed = self._get_rampup_speed()
-                elif self._overexposure_detected:
-                    exposure_speed = self._get_rampdown_speed()
-                else:
-                    exposure_speed = None
+                exposure_speed = self._get_exposure_ramp_speed()
                 smooth_gain = self._interpolate_gain(target_gain)
                 smooth_exposure = self._interpolate_exposure(target_exposure, exposure_speed)
 
@@ -2577,7 +3038,7 @@ class AdaptiveTimelapse:
         """
         logger.info("Taking test shot to measure light levels...")
 
-        test_config = self.config["adaptive_timelapse"]["test_shot"]
+        test_config = self._adaptive_config["test_shot"]
 
         # Temporarily modify camera config for test shot
         original_controls = self.camera_config.config["camera"].get("controls", {})
@@ -2596,18 +3057,15 @@ class AdaptiveTimelapse:
         self.camera_config.config["system"]["save_metadata"] = False
 
         # Create metadata directory (files get overwritten, not accumulated)
-        metadata_dir = Path(self.config.get("system", {}).get("metadata_folder", "metadata"))
-        metadata_dir.mkdir(exist_ok=True)
+        self._metadata_dir.mkdir(exist_ok=True)
 
         # Capture test image (overwritten each time - no timestamps)
         # Since save_metadata=False, this won't create timestamped metadata files
         metadata = {}
         with ImageCapture(self.camera_config) as capture:
-            test_path = metadata_dir / "test_shot.jpg"
+            test_path = self._test_shot_path
 
             # Capture test image using capture_request to get metadata directly
-            import json
-
             try:
                 request = capture.picam2.capture_request()
                 try:
@@ -2616,9 +3074,8 @@ class AdaptiveTimelapse:
                     # Get metadata from request
                     metadata = request.get_metadata()
                     # Save test shot metadata manually with fixed filename (overwritten each time)
-                    test_metadata_path = metadata_dir / "test_shot_metadata.json"
-                    with open(test_metadata_path, "w") as f:
-                        json.dump(metadata, f, indent=2, default=str)
+                    test_metadata_path = self._test_shot_metadata_path
+                    _write_json_file(test_metadata_path, metadata)
                     logger.debug(f"Test shot metadata saved: {test_metadata_path}")
                 finally:
                     request.release()
@@ -2636,14 +3093,20 @@ class AdaptiveTimelapse:
         logger.debug(f"Test shot saved: {image_path}")
         return image_path, metadata
 
-    def _analyze_image_brightness(self, image_path: str) -> Dict:
+    def _analyze_image_brightness(self, image_path: Union[str, BinaryIO]) -> Dict:
         """
         Analyze brightness characteristics of a captured image.
 
         Calculates histogram statistics to help diagnose exposure issues.
+        All metrics are derived from a single 256-bin histogram of the 8-bit
+        grayscale image, so the pixel data is only scanned once. Only every
+        Nth row and column is sampled (brightness_sample_stride, default 4),
+        which gives the same statistics for exposure control at 1/16 of the
+        memory traffic. JPEGs are decoded at reduced scale (at least 512px).
 
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or a binary file-like object
+                (e.g. BytesIO) holding the encoded image
 
         Returns:
             Dictionary with brightness metrics
@@ -2652,38 +3115,66 @@ class AdaptiveTimelapse:
             from PIL import Image
             import numpy as np
 
+            # Check the SOI marker before handing a .jpg to PIL, so an empty or
+            # partially written file is rejected without a decoder exception
+            if isinstance(image_path, (str, Path)) and str(image_path).lower().endswith(
+                (".jpg", ".jpeg")
+            ):
+                with open(image_path, "rb") as f:
+                    head = f.read(len(_JPEG_MAGIC))
+                if head != _JPEG_MAGIC:
+                    logger.warning(f"Could not analyze image brightness: not a JPEG: {image_path}")
+                    return {}
+
             with Image.open(image_path) as img:
-                # Convert to grayscale for brightness analysis
-                gray = img.convert("L")
-                pixels = np.array(gray)
-
-                # Calculate statistics
-                mean_brightness = float(np.mean(pixels))
-                median_brightness = float(np.median(pixels))
-                std_brightness = float(np.std(pixels))
-
-                # Percentiles for exposure analysis
-                p5 = float(np.percentile(pixels, 5))
-                p25 = float(np.percentile(pixels, 25))
-                p75 = float(np.percentile(pixels, 75))
-                p95 = float(np.percentile(pixels, 95))
-
-                # Calculate under/overexposure percentages
-                total_pixels = pixels.size
-                underexposed = float(np.sum(pixels < 10) / total_pixels * 100)
-                overexposed = float(np.sum(pixels > 245) / total_pixels * 100)
-
-                return {
-                    "mean_brightness": round(mean_brightness, 2),
-                    "median_brightness": round(median_brightness, 2),
-                    "std_brightness": round(std_brightness, 2),
-                    "percentile_5": round(p5, 2),
-                    "percentile_25": round(p25, 2),
-                    "percentile_75": round(p75, 2),
-                    "percentile_95": round(p95, 2),
-                    "underexposed_percent": round(underexposed, 2),
-                    "overexposed_percent": round(overexposed, 2),
-                }
+                # Let libjpeg decode straight to reduced-size luma (DCT scaling)
+                # instead of decoding full resolution. No-op for non-JPEG files.
+                img.draft("L", (512, 512))
+                # Convert to grayscale for brightness analysis. After draft() a JPEG
+                # already decodes as "L", so use it as-is instead of copying it.
+                gray = img if img.mode == "L" else img.convert("L")
+                stride = self._brightness_sample_stride
+                pixels = np.asarray(gray, dtype=np.uint8)[::stride, ::stride].ravel()
+
+            # One O(N) pass over the pixels, everything else is O(256)
+            hist = np.bincount(pixels, minlength=256)
+            total_pixels = pixels.size
+            levels = np.arange(256, dtype=np.int64)
+
+            # Calculate statistics from exact integer sums (E[X] and E[X^2])
+            level_sum = int(np.dot(hist, levels))
+            level_sq_sum = int(np.dot(hist, levels * levels))
+            mean_brightness = level_sum / total_pixels
+            variance = (level_sq_sum - level_sum * level_sum / total_pixels) / total_pixels
+            std_brightness = float(np.sqrt(max(0.0, variance)))
+
+            # Percentiles (linear interpolation, same as np.percentile).
+            # The k-th sorted pixel is the first level whose cumulative count exceeds k.
+            cumulative = np.cumsum(hist)
+            positions = (total_pixels - 1) * np.array(_BRIGHTNESS_PERCENTILES) / 100.0
+            lower = np.floor(positions)
+            upper = np.ceil(positions)
+            lower_values = np.searchsorted(cumulative, lower, side="right")
+            upper_values = np.searchsorted(cumulative, upper, side="right")
+            p5, p25, median_brightness, p75, p95 = (
+                lower_values + (upper_values - lower_values) * (positions - lower)
+            ).tolist()
+
+            # Calculate under/overexposure percentages (< 10 and > 245)
+            underexposed = float(hist[:10].sum() / total_pixels * 100)
+            overexposed = float(hist[246:].sum() / total_pixels * 100)
+
+            return {
+                "mean_brightness": round(mean_brightness, 2),
+                "median_brightness": round(median_brightness, 2),
+                "std_brightness": round(std_brightness, 2),
+                "percentile_5": round(p5, 2),
+                "percentile_25": round(p25, 2),
+                "percentile_75": round(p75, 2),
+                "percentile_95": round(p95, 2),
+                "underexposed_percent": round(underexposed, 2),
+                "overexposed_percent": round(overexposed, 2),
+            }
 
         except Exception as e:
             logger.warning(f"Could not analyze image brightness: {e}")
@@ -2704,6 +3195,12 @@ class AdaptiveTimelapse:
         Adds brightness analysis, exposure calculation details, and mode state
         to help with future tuning and debugging.
 
+        With diagnostics.sidecar enabled, the diagnostics are appended to a
+        "<name>_metadata.diag.jsonl" file next to the metadata instead, which
+        avoids reading and rewriting the whole metadata file every frame
+        (gzipped to ".diag.jsonl.gz" with diagnostics.compress). The analysis
+        tools merge the sidecar back in when loading metadata.
+
         Args:
             metadata_path: Path to the metadata JSON file
             image_path: Path to the captured image
@@ -2715,12 +3212,11 @@ class AdaptiveTimelapse:
         Returns:
             True if successful, False otherwise
         """
-        import json
-
         try:
-            # Load existing metadata
-            with open(metadata_path, "r") as f:
-                metadata = json.load(f)
+            diagnostics_config = self._adaptive_config.get("diagnostics", {})
+            use_sidecar = diagnostics_config.get("sidecar", False)
+            # Load existing metadata (not needed when appending to the sidecar)
+            metadata = None if use_sidecar else _read_json_file(metadata_path)
 
             # Add diagnostics section
             diagnostics = {
@@ -2777,12 +3273,14 @@ class AdaptiveTimelapse:
             if brightness_analysis:
                 diagnostics["brightness"] = brightness_analysis
 
-            # Add diagnostics to metadata
-            metadata["diagnostics"] = diagnostics
-
-            # Save enriched metadata
-            with open(metadata_path, "w") as f:
-                json.dump(metadata, f, indent=2, default=str)
+            if use_sidecar:
+                compress = diagnostics_config.get("compress", False)
+                sidecar_path = _diagnostics_sidecar_path(metadata_path, compress)
+                _append_json_line(sidecar_path, {"diagnostics": diagnostics}, compress=compress)
+            else:
+                # Add diagnostics to metadata and save it
+                metadata["diagnostics"] = diagnostics
+                _write_json_file(metadata_path, metadata)
 
             logger.debug(f"Enriched metadata with diagnostics: {metadata_path}")
             return True
@@ -2791,33 +3289,52 @@ class AdaptiveTimelapse:
             logger.warning(f"Could not enrich metadata with diagnostics: {e}")
             return False
 
-    def _create_latest_symlink(self, image_path: str):
+    def _create_latest_symlink(self, image_path: str) -> Optional[Path]:
         """
         Create a symlink to the latest captured image.
 
+        The link target is also cached in _last_symlink_target, so anything
+        that needs to know where "latest" points can read it without a
+        readlink/realpath round-trip to the filesystem.
+
         Args:
             image_path: Path to the latest image
+
+        Returns:
+            Absolute path the symlink now points to, or None if not created
         """
         symlink_config = self.config.get("output", {}).get("symlink_latest", {})
         if not symlink_config.get("enabled", False):
-            return
+            return None
 
         symlink_path = symlink_config.get("path")
         if not symlink_path:
             logger.warning("Symlink enabled but no path specified")
-            return
+            return None
 
         try:
             symlink_path = Path(symlink_path)
-            image_path = Path(image_path).resolve()  # Get absolute path
-
-            # Remove existing symlink/file if it exists
-            if symlink_path.exists() or symlink_path.is_symlink():
-                symlink_path.unlink()
+            # Absolute path by string manipulation - no per-component stat like resolve()
+            image_path = Path(os.path.abspath(image_path))
 
-            # Create new symlink
-            symlink_path.symlink_to(image_path)
+            # Create the new symlink under a temporary name, then atomically
+            # rename it over the old one. Readers (web server, status page)
+            # never see a missing link, and no exists() probe is needed.
+            temp_link = symlink_path.with_name(symlink_path.name + ".tmp")
+            try:
+                temp_link.symlink_to(image_path)
+            except FileExistsError:
+                # Leftover from an interrupted run - only then pay for the unlink
+                temp_link.unlink()
+                temp_link.symlink_to(image_path)
+            try:
+                os.replace(temp_link, symlink_path)
+            except OSError:
+                temp_link.unlink(missing_ok=True)
+                raise
             logger.debug(f"Created symlink: {symlink_path} -> {image_path}")
+            self._last_symlink_target = image_path
+            return image_path
 
         except PermissionError:
             logger.error(
@@ -2826,6 +3343,7 @@ class AdaptiveTimelapse:
             )
         except Exception as e:
             logger.error(f"Failed to create symlink: {e}")
+        return None
 
     def capture_frame(
         self, capture: ImageCapture, mode: str, calculated_lux: float = None
@@ -2885,7 +3403,7 @@ class AdaptiveTimelapse:
         Args:
             test_mode: If True, capture one image then exit
         """
-        adaptive_config = self.config["adaptive_timelapse"]
+        adaptive_config = self._adaptive_config
 
         if not adaptive_config.get("enabled", True):
             logger.warning("Adaptive timelapse is disabled in configuration")
@@ -2975,8 +3493,9 @@ class AdaptiveTimelapse:
 
                         # Calculate transition position for diagnostics
                         if mode == LightMode.TRANSITION:
-                            night_threshold = adaptive_config["light_thresholds"]["night"]
-                            day_threshold = adaptive_config["light_thresholds"]["day"]
+                            thresholds = self._light_thresholds
+                            night_threshold = thresholds["night"]
+                            day_threshold = thresholds["day"]
                             transition_position = (lux - night_threshold) / (
                                 day_threshold - night_threshold
                             )
@@ -3041,10 +3560,8 @@ class AdaptiveTimelapse:
                     logger.info(f"Frame captured: {image_path}")
 
                     # Enrich metadata with diagnostic information (if enabled)
-                    diagnostics_enabled = (
-                        self.config.get("adaptive_timelapse", {})
-                        .get("diagnostics", {})
-                        .get("enabled", False)
+                    diagnostics_enabled = self._adaptive_config.get("diagnostics", {}).get(
+                        "enabled", False
                     )
                     if metadata_path and diagnostics_enabled:
                         self._enrich_metadata_with_diagnostics(
@@ -3059,10 +3576,8 @@ class AdaptiveTimelapse:
                     # Apply brightness feedback for butter-smooth transitions
                     # Uses lores stream brightness (from capture.last_brightness_metrics)
                     # which avoids disk I/O and overlay contamination
-                    brightness_feedback_enabled = (
-                        self.config.get("adaptive_timelapse", {})
-                        .get("transition_mode", {})
-                        .get("brightness_feedback_enabled", True)
+                    brightness_feedback_enabled = self._transition_config.get(
+                        "brightness_feedback_enabled", True
                     )
                     if brightness_feedback_enabled:
                         try:
@@ -3105,10 +3620,7 @@ class AdaptiveTimelapse:
                     # Also store for Holy Grail seeding when entering transition
                     if metadata_path and mode == LightMode.DAY:
                         try:
-                            import json
-
-                            with open(metadata_path, "r") as f:
-                                capture_metadata = json.load(f)
+                            capture_metadata = _read_json_file(metadata_path)
                             self._update_day_wb_reference(capture_metadata)
                             # Store for Holy Grail seeding
                             self._last_day_capture_metadata = capture_metadata
@@ -3119,11 +3631,8 @@ class AdaptiveTimelapse:
                     if self._database is not None:
                         try:
                             # Load metadata if not already loaded
-                            import json
-
                             if metadata_path:
-                                with open(metadata_path, "r") as f:
-                                    db_metadata = json.load(f)
+                                db_metadata = _read_json_file(metadata_path)
                             else:
                                 db_metadata = {}
 
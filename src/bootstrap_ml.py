@@ -25,6 +25,7 @@ import yaml
 # Add src directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from diagnostics_sidecar import load_sidecar_diagnostics
 from ml_exposure import MLExposurePredictor
 
 # Setup logging
@@ -90,6 +91,11 @@ def process_metadata_file(filepath: str) -> Optional[Dict]:
         with open(filepath, "r") as f:
             metadata = json.load(f)
 
+        # Diagnostics may live in an append-only sidecar (diagnostics.sidecar),
+        # optionally gzipped (diagnostics.compress)
+        if "diagnostics" not in metadata:
+            metadata.update(load_sidecar_diagnostics(filepath))
+
         # Check for enriched format first (has diagnostics)
         diagnostics = metadata.get("diagnostics", {})
         brightness_info = diagnostics.get("brightness", {})
@@ -8,6 +8,12 @@ from pathlib import Path
 from typing import Dict, Optional, Tuple
 import yaml
 
+# Use the libyaml C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 # Handle imports for both module and script execution
 try:
     from src.logging_config import get_logger
@@ -23,20 +29,21 @@ logger = get_logger("capture_image")
 class CameraConfig:
     """Camera configuration loaded from YAML file."""
 
-    def __init__(self, config_path: str = "config/config.yml"):
+    def __init__(self, config_path: str = "config/config.yml", config: Optional[Dict] = None):
         """
         Initialize camera configuration.
 
         Args:
             config_path: Path to YAML configuration file
+            config: Already parsed contents of config_path (skips reading the file)
         """
         self.config_path = config_path
         logger.info(f"Loading configuration from: {config_path}")
-        self.config = self._load_config()
+        self.config = config if config is not None else self._load_config()
         logger.debug(f"Configuration loaded successfully")
 
     def _load_config(self) -> Dict:
-        """Load configuration from YAML file."""
+        """Load configuration from YAML file (or a .json file with the same structure)."""
         config_file = Path(self.config_path)
         if not config_file.exists():
             logger.error(f"Configuration file not found: {self.config_path}")
@@ -44,10 +51,13 @@ class CameraConfig:
 
         try:
             with open(config_file, "r") as f:
-                config = yaml.safe_load(f)
-                logger.debug(f"Successfully parsed YAML configuration")
+                if config_file.suffix == ".json":
+                    config = json.load(f)
+                else:
+                    config = yaml.load(f, Loader=_YamlLoader)
+                logger.debug(f"Successfully parsed configuration")
                 return config
-        except yaml.YAMLError as e:
+        except (yaml.YAMLError, ValueError) as e:
             logger.error(f"Failed to parse configuration file: {e}")
             raise
 
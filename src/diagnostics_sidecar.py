@@ -0,0 +1,39 @@
+"""Diagnostics sidecar files written next to capture metadata.
+
+With diagnostics.sidecar enabled, auto_timelapse.py appends each frame's
+diagnostics as one JSON line to "<name>_metadata.diag.jsonl" (or
+".diag.jsonl.gz" with diagnostics.compress) instead of rewriting the metadata
+file. The analysis and ML bootstrap tools read them back through this module,
+so every tool finds plain and gzipped sidecars the same way.
+"""
+
+import gzip
+import json
+from pathlib import Path
+from typing import Dict, Union
+
+SIDECAR_SUFFIX = ".diag.jsonl"
+COMPRESSED_SIDECAR_SUFFIX = ".diag.jsonl.gz"
+
+
+def sidecar_path(metadata_path: Union[str, Path], compress: bool = False) -> Path:
+    """Path of the diagnostics sidecar belonging to a metadata file."""
+    suffix = COMPRESSED_SIDECAR_SUFFIX if compress else SIDECAR_SUFFIX
+    return Path(metadata_path).with_suffix(suffix)
+
+
+def load_sidecar_diagnostics(metadata_path: Union[str, Path]) -> Dict:
+    """Latest entry of the plain or gzipped sidecar for metadata_path, if any.
+
+    Returns:
+        Dict with a "diagnostics" key, or an empty dict when there is no
+        sidecar (or it is empty)
+    """
+    for compress, opener in ((False, open), (True, gzip.open)):
+        path = sidecar_path(metadata_path, compress)
+        if path.exists():
+            with opener(path, "rt") as f:
+                lines = f.read().splitlines()
+            if lines:
+                return json.loads(lines[-1])
+    return {}
@@ -13,6 +13,7 @@ Tests the analysis script's ability to:
 """
 
 import pytest
+import gzip
 import json
 import tempfile
 import shutil
@@ -191,6 +192,28 @@ class TestLoadMetadata:
         assert "ExposureTime" in metadata
         assert isinstance(metadata["Lux"], (int, float))
 
+    def test_load_metadata_merges_diagnostics_sidecar(self, temp_dir):
+        """Test diagnostics from a .diag.jsonl sidecar are merged (latest entry wins)."""
+        meta_path = temp_dir / "img_metadata.json"
+        meta_path.write_text(json.dumps({"Lux": 12.0}))
+        (temp_dir / "img_metadata.diag.jsonl").write_text(
+            '{"diagnostics": {"mode": "night"}}\n{"diagnostics": {"mode": "transition"}}\n'
+        )
+
+        metadata = load_metadata(meta_path)
+
+        assert metadata["Lux"] == 12.0
+        assert metadata["diagnostics"] == {"mode": "transition"}
+
+    def test_load_metadata_merges_gzipped_sidecar(self, temp_dir):
+        """Test diagnostics are read from a gzipped .diag.jsonl.gz sidecar."""
+        meta_path = temp_dir / "img_metadata.json"
+        meta_path.write_text(json.dumps({"Lux": 12.0}))
+        with gzip.open(temp_dir / "img_metadata.diag.jsonl.gz", "wt") as f:
+            f.write('{"diagnostics": {"mode": "day"}}\n')
+
+        assert load_metadata(meta_path)["diagnostics"] == {"mode": "day"}
+
     def test_load_nonexistent_metadata(self, temp_dir):
         """Test loading non-existent metadata file."""
         fake_path = temp_dir / "nonexistent_metadata.json"
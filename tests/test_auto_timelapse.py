@@ -1,23 +1,45 @@
 """Tests for auto_timelapse module."""
 
+import copy
+import gzip
+import hashlib
+import io
+import json
 import os
-import tempfile
+import random
+import sys
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 import pytest
 import yaml
 
-import sys
-
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
-from src.auto_timelapse import AdaptiveTimelapse, LightMode
-
-
-@pytest.fixture
-def test_config_file():
-    """Create a temporary test configuration file."""
-    config_data = {
+from src import auto_timelapse
+from src.auto_timelapse import (
+    AdaptiveTimelapse,
+    ImageCapture,
+    LightMode,
+    SustainedDriftCorrector,
+    main,
+)
+
+# Import PIL once per process; tests that build or decode images need it
+try:
+    from PIL import Image as _PilImage, JpegImagePlugin as _JpegImagePlugin
+except ImportError:
+    _PilImage = _JpegImagePlugin = None
+
+requires_pil = pytest.mark.skipif(_PilImage is None, reason="PIL not available")
+
+# Prefer libyaml C bindings for writing test configs, fall back to pure Python
+try:
+    from yaml import CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeDumper as _Dumper
+
+
+def _make_test_config():
+    """Build the default test configuration dictionary."""
+    return {
         "camera": {
             "resolution": {"width": 1280, "height": 720},
             "transforms": {"horizontal_flip": False, "vertical_flip": False},
@@ -28,7 +50,9 @@ def test_config_file():
             "filename_pattern": "{name}_{counter}.jpg",
             "project_name": "test_project",
             "quality": 85,
-            "symlink_latest": {"enabled": True, "path": "/tmp/test_status.jpg"},
+            # No shared default: _patch_config and the timelapse fixture point
+            # the path into the test's own tmp directory
+            "symlink_latest": {"enabled": True, "path": None},
         },
         "system": {
             "create_directories": True,
@@ -69,149 +93,194 @@ def test_config_file():
         },
     }
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
-        yaml.dump(config_data, f)
-        config_path = f.name
 
-    yield config_path
+def _deep_update(base, overrides):
+    """Recursively merge overrides into base (nested dicts are merged, not replaced)."""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _deep_update(base[key], value)
+        else:
+            base[key] = value
+    return base
 
-    # Cleanup
-    os.unlink(config_path)
 
+def _patch_config(config_path, **overrides):
+    """Write the default test config with overrides merged in.
 
-class TestSymlinkFunctionality:
-    """Test symlink creation for latest image."""
+    Builds the dict in memory and dumps it once, instead of re-parsing the
+    file just to change a key. The "latest" symlink and the metadata folder
+    default to paths next to the config file, so tests never share them or
+    write into the working directory.
+    """
+    config_data = _make_test_config()
+    config_data["output"]["symlink_latest"]["path"] = str(Path(config_path).with_name("status.jpg"))
+    config_data["system"]["metadata_folder"] = str(Path(config_path).with_name("metadata"))
+    _deep_update(config_data, overrides)
+    Path(config_path).write_bytes(json.dumps(config_data).encode("utf-8"))
 
-    def test_create_symlink_enabled(self, test_config_file):
-        """Test symlink creation when enabled."""
-        timelapse = AdaptiveTimelapse(test_config_file)
 
-        # Create a test image
-        temp_dir = tempfile.mkdtemp()
-        image_path = os.path.join(temp_dir, "test_image.jpg")
-        with open(image_path, "w") as f:
-            f.write("test")
+@pytest.fixture(scope="session")
+def readonly_config_file(tmp_path_factory):
+    """Write the default test configuration once per session. Do not modify.
 
-        try:
-            # Create symlink
-            timelapse._create_latest_symlink(image_path)
+    Written as JSON, which the config loaders accept and parse much faster
+    than YAML. Tests that exercise YAML parsing write their own .yml files.
+    """
+    config_path = tmp_path_factory.mktemp("config") / "config.json"
+    _patch_config(config_path)
 
-            # Verify symlink exists
-            symlink_path = Path("/tmp/test_status.jpg")
-            assert symlink_path.exists() or symlink_path.is_symlink()
+    return str(config_path)
 
-            # Verify it points to the correct file
-            if symlink_path.is_symlink():
-                target = symlink_path.resolve()
-                assert target == Path(image_path).resolve()
 
-            # Cleanup
-            if symlink_path.exists():
-                symlink_path.unlink()
-        finally:
-            os.unlink(image_path)
-            os.rmdir(temp_dir)
+@pytest.fixture
+def test_config_file(tmp_path):
+    """Per-test default configuration for tests that edit it."""
+    config_path = tmp_path / "config.json"
+    _patch_config(config_path)
 
-    def test_create_symlink_disabled(self, test_config_file):
-        """Test symlink not created when disabled."""
-        # Load config and disable symlink
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
+    return str(config_path)
+
+
+_timelapse_cache = {}
+
+
+def _timelapse_for(config_path):
+    """Fresh AdaptiveTimelapse for config_path, built from a cached instance.
+
+    The cache is keyed on a hash of the file contents, so rewriting the config
+    (e.g. with _patch_config) gives a newly constructed instance, however
+    quickly it happens. Files with identical contents share one instance.
+    """
+    key = hashlib.sha1(Path(config_path).read_bytes()).hexdigest()
+    if key not in _timelapse_cache:
+        _timelapse_cache[key] = AdaptiveTimelapse(str(config_path))
+    return copy.deepcopy(_timelapse_cache[key])
+
+
+class _FakeCapture:
+    """Minimal stand-in for ImageCapture.capture() that records its keyword arguments.
+
+    Cheaper than a Mock for tests that only need a return value and the calls.
+    """
+
+    def __init__(self, result):
+        self._result = result
+        self.calls = []
+
+    def capture(self, **kwargs):
+        self.calls.append(kwargs)
+        return self._result
 
-        config_data["output"]["symlink_latest"]["enabled"] = False
 
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
+@pytest.fixture(scope="session")
+def _image_capture_mock():
+    """Build the mocked ImageCapture class tree once per session."""
+    capture_class = MagicMock()
+    capture = capture_class.return_value.__enter__.return_value
+    capture_class.return_value.__exit__.return_value = None
 
-        timelapse = AdaptiveTimelapse(test_config_file)
+    # capture_request() hands back a request with test shot metadata
+    request = capture.picam2.capture_request.return_value
+    request.get_metadata.side_effect = lambda: {"ExposureTime": 100000, "AnalogueGain": 1.0}
+    return capture_class
 
+
+@pytest.fixture
+def mock_image_capture(_image_capture_mock):
+    """Session ImageCapture mock with call history cleared for this test."""
+    _image_capture_mock.reset_mock()
+    return _image_capture_mock
+
+
+@pytest.fixture(scope="session")
+def tiny_gray_jpeg(tmp_path_factory):
+    """Encode one 100x100 mid-gray JPEG per session. Do not modify."""
+    if _PilImage is None:
+        pytest.skip("PIL not available")
+
+    image_path = tmp_path_factory.mktemp("img") / "gray.jpg"
+    _PilImage.new("RGB", (100, 100), color=(128, 128, 128)).save(
+        image_path, quality=50, optimize=False
+    )
+    return str(image_path)
+
+
+@pytest.fixture
+def timelapse(readonly_config_file, tmp_path):
+    """Fresh copy of the shared instance for tests that don't edit the config file.
+
+    The "latest" symlink is pointed into tmp_path so tests can run in parallel.
+    """
+    timelapse = _timelapse_for(readonly_config_file)
+    timelapse.config["output"]["symlink_latest"]["path"] = str(tmp_path / "status.jpg")
+    return timelapse
+
+
+class TestSymlinkFunctionality:
+    """Test symlink creation for latest image."""
+
+    def test_create_symlink_enabled(self, timelapse, tmp_path):
+        """Test symlink creation when enabled."""
         # Create a test image
-        temp_dir = tempfile.mkdtemp()
-        image_path = os.path.join(temp_dir, "test_image.jpg")
-        with open(image_path, "w") as f:
-            f.write("test")
+        image_path = tmp_path / "test_image.jpg"
+        image_path.write_bytes(b"test")
 
-        try:
-            # Attempt to create symlink (should do nothing)
-            timelapse._create_latest_symlink(image_path)
+        # Create symlink
+        timelapse._create_latest_symlink(str(image_path))
+
+        # readlink() fails unless this is a symlink, so it also proves the link exists
+        symlink_path = Path(timelapse.config["output"]["symlink_latest"]["path"])
+        assert os.readlink(symlink_path) == str(image_path)
+
+    def test_create_symlink_disabled(self, timelapse, tmp_path):
+        """Test symlink not created when disabled."""
+        # Disable symlink (read from the live config, so no rebuild is needed)
+        timelapse.config["output"]["symlink_latest"]["enabled"] = False
+
+        # Create a test image
+        image_path = tmp_path / "test_image.jpg"
+        image_path.write_bytes(b"test")
 
-            # Symlink should not exist (or if it does, it's from another test)
-            # We just verify the function doesn't crash
-            assert True
+        # Attempt to create symlink (should do nothing)
+        result = timelapse._create_latest_symlink(str(image_path))
 
-        finally:
-            os.unlink(image_path)
-            os.rmdir(temp_dir)
+        # The symlink path is per-test, so nothing may exist there
+        assert result is None
+        assert timelapse._last_symlink_target is None
+        symlink_path = Path(timelapse.config["output"]["symlink_latest"]["path"])
+        assert symlink_path.parent == tmp_path
+        assert not symlink_path.is_symlink()
 
-    def test_symlink_updates_on_new_capture(self, test_config_file):
+    def test_symlink_updates_on_new_capture(self, timelapse, tmp_path):
         """Test symlink updates to point to latest image."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        temp_dir = tempfile.mkdtemp()
-        symlink_path = Path("/tmp/test_status.jpg")
-
-        try:
-            # Create first image
-            image1 = os.path.join(temp_dir, "image1.jpg")
-            with open(image1, "w") as f:
-                f.write("image1")
-
-            timelapse._create_latest_symlink(image1)
-
-            if symlink_path.is_symlink():
-                target1 = symlink_path.resolve()
-                assert target1 == Path(image1).resolve()
-
-            # Create second image
-            image2 = os.path.join(temp_dir, "image2.jpg")
-            with open(image2, "w") as f:
-                f.write("image2")
-
-            timelapse._create_latest_symlink(image2)
-
-            # Symlink should now point to image2
-            if symlink_path.is_symlink():
-                target2 = symlink_path.resolve()
-                assert target2 == Path(image2).resolve()
-
-        finally:
-            # Cleanup
-            if symlink_path.exists():
-                symlink_path.unlink()
-            if os.path.exists(image1):
-                os.unlink(image1)
-            if os.path.exists(image2):
-                os.unlink(image2)
-            os.rmdir(temp_dir)
-
-    def test_symlink_permission_error(self, test_config_file):
-        """Test handling of permission errors."""
-        # Update config to use a restricted path
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
+        symlink_path = Path(timelapse.config["output"]["symlink_latest"]["path"])
 
-        config_data["output"]["symlink_latest"]["path"] = "/root/status.jpg"
+        # Create both images up front; link targets are the absolute paths
+        image1, image2 = (str(tmp_path / name) for name in ("image1.jpg", "image2.jpg"))
+        for image in (image1, image2):
+            Path(image).write_bytes(b"test")
 
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
+        assert timelapse._create_latest_symlink(image1) == Path(image1)
+        assert os.readlink(symlink_path) == image1
 
-        timelapse = AdaptiveTimelapse(test_config_file)
+        # Symlink should now point to image2
+        assert timelapse._create_latest_symlink(image2) == Path(image2)
+        assert os.readlink(symlink_path) == image2
+
+    def test_symlink_permission_error(self, timelapse, tmp_path):
+        """Test handling of permission errors."""
+        # Update config to use a restricted path
+        timelapse.config["output"]["symlink_latest"]["path"] = "/root/status.jpg"
 
         # Create test image
-        temp_dir = tempfile.mkdtemp()
-        image_path = os.path.join(temp_dir, "test.jpg")
-        with open(image_path, "w") as f:
-            f.write("test")
+        image_path = tmp_path / "test.jpg"
+        image_path.write_bytes(b"test")
 
-        try:
-            # This should log an error but not crash
-            timelapse._create_latest_symlink(image_path)
+        # This should log an error but not crash
+        timelapse._create_latest_symlink(str(image_path))
 
-            # If we get here without exception, test passes
-            assert True
-        finally:
-            os.unlink(image_path)
-            os.rmdir(temp_dir)
+        # If we get here without exception, test passes
+        assert True
 
 
 class TestLightMode:
@@ -227,45 +296,142 @@ class TestLightMode:
 class TestAdaptiveTimelapse:
     """Test AdaptiveTimelapse class."""
 
-    def test_init(self, test_config_file):
+    def test_init(self, timelapse):
         """Test initialization."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         assert timelapse.config is not None
         assert timelapse.running is True
         assert timelapse.frame_count == 0
 
-    def test_calculate_lux(self, test_config_file):
+    def test_load_config_json_matches_yaml(self, readonly_config_file, tmp_path):
+        """Test a .json config loads to the same dict as the equivalent YAML."""
+        yaml_path = tmp_path / "config.yml"
+        config_data = json.loads(Path(readonly_config_file).read_bytes())
+        with open(yaml_path, "w") as f:
+            yaml.dump(config_data, f, Dumper=_Dumper)
+
+        json_timelapse = AdaptiveTimelapse(readonly_config_file)
+        yaml_timelapse = AdaptiveTimelapse(str(yaml_path))
+
+        assert json_timelapse.config == yaml_timelapse.config
+        assert json_timelapse.camera_config.config == json_timelapse.config
+
+    def test_load_config_invalid_json(self, tmp_path):
+        """Test malformed JSON config raises instead of loading partially."""
+        config_path = tmp_path / "config.json"
+        config_path.write_text("{not json")
+
+        with pytest.raises(ValueError):
+            AdaptiveTimelapse(str(config_path))
+
+    def test_load_config_cached_per_file_version(self, test_config_file):
+        """Test unchanged configs are parsed once and each instance gets its own copy."""
+        auto_timelapse._parse_config_file.cache_clear()
+        first = AdaptiveTimelapse(test_config_file)
+        second = AdaptiveTimelapse(test_config_file)
+
+        assert auto_timelapse._parse_config_file.cache_info().misses == 1
+        assert first.config == second.config
+        first.config["adaptive_timelapse"]["night_mode"]["analogue_gain"] = 99.0
+        assert second.config["adaptive_timelapse"]["night_mode"]["analogue_gain"] != 99.0
+
+        # Rewriting the file is picked up on the next load
+        _patch_config(test_config_file, adaptive_timelapse={"night_mode": {"analogue_gain": 3.25}})
+        third = AdaptiveTimelapse(test_config_file)
+        assert third.config["adaptive_timelapse"]["night_mode"]["analogue_gain"] == 3.25
+
+    def test_from_config_dict_matches_file(self, readonly_config_file):
+        """Test an in-memory config gives the same instance config as the file."""
+        config = json.loads(Path(readonly_config_file).read_bytes())
+
+        timelapse = AdaptiveTimelapse.from_config_dict(config)
+
+        assert timelapse.config is config
+        assert timelapse.config == AdaptiveTimelapse(readonly_config_file).config
+        assert timelapse.camera_config.config == config
+        assert timelapse.camera_config.config is not config
+
+    def test_load_config_disk_cache(self, test_config_file, tmp_path, monkeypatch):
+        """Test RASPILAPSE_CONFIG_CACHE keeps a JSON copy of the YAML that is reused."""
+        yaml_path = tmp_path / "config.yml"
+        config = AdaptiveTimelapse(test_config_file).config
+        with open(yaml_path, "w") as f:
+            yaml.dump(config, f, Dumper=_Dumper)
+        cache_path = tmp_path / "config.yml.cache.json"
+
+        monkeypatch.setenv("RASPILAPSE_CONFIG_CACHE", "1")
+        auto_timelapse._parse_config_file.cache_clear()
+        assert AdaptiveTimelapse(str(yaml_path)).config == config
+        assert cache_path.exists()
+
+        # A fresh process (empty in-memory cache) reads the JSON, not the YAML
+        auto_timelapse._parse_config_file.cache_clear()
+        with patch("src.auto_timelapse.yaml.load") as mock_load:
+            assert AdaptiveTimelapse(str(yaml_path)).config == config
+        mock_load.assert_not_called()
+
+        # Editing the YAML invalidates the cache
+        config["adaptive_timelapse"]["night_mode"]["analogue_gain"] = 3.25
+        with open(yaml_path, "w") as f:
+            yaml.dump(config, f, Dumper=_Dumper)
+        auto_timelapse._parse_config_file.cache_clear()
+        reloaded = AdaptiveTimelapse(str(yaml_path))
+        assert reloaded.config["adaptive_timelapse"]["night_mode"]["analogue_gain"] == 3.25
+
+    def test_load_config_disk_cache_disabled_by_default(self, tmp_path, monkeypatch):
+        """Test no cache file is written unless RASPILAPSE_CONFIG_CACHE=1."""
+        monkeypatch.delenv("RASPILAPSE_CONFIG_CACHE", raising=False)
+        yaml_path = tmp_path / "config.yml"
+        with open(yaml_path, "w") as f:
+            yaml.dump(_make_test_config(), f, Dumper=_Dumper)
+
+        AdaptiveTimelapse(str(yaml_path))
+
+        assert not (tmp_path / "config.yml.cache.json").exists()
+
+    def test_load_config_disk_cache_enabled_mid_process(self, tmp_path, monkeypatch):
+        """Test enabling RASPILAPSE_CONFIG_CACHE applies without the config changing."""
+        monkeypatch.delenv("RASPILAPSE_CONFIG_CACHE", raising=False)
+        yaml_path = tmp_path / "config.yml"
+        with open(yaml_path, "w") as f:
+            yaml.dump(_make_test_config(), f, Dumper=_Dumper)
+        cache_path = tmp_path / "config.yml.cache.json"
+
+        AdaptiveTimelapse(str(yaml_path))
+        assert not cache_path.exists()
+
+        # Same file version, already in the in-memory cache
+        monkeypatch.setenv("RASPILAPSE_CONFIG_CACHE", "1")
+        AdaptiveTimelapse(str(yaml_path))
+        assert cache_path.exists()
+
+    def test_init_caches_config_sections(self, timelapse):
+        """Test cached config sections are live references into config."""
+        adaptive = timelapse.config["adaptive_timelapse"]
+
+        assert timelapse._adaptive_config is adaptive
+        assert timelapse._night_config is adaptive["night_mode"]
+        assert timelapse._day_config is adaptive["day_mode"]
+        assert timelapse._transition_config is adaptive["transition_mode"]
+
+        # Runtime config edits are seen through the cached sections
+        adaptive["night_mode"]["max_exposure_time"] = 10.0
+        assert timelapse._calculate_target_exposure_from_lux(0.01) == 10.0
+
+    def test_calculate_lux(self, timelapse, tiny_gray_jpeg):
         """Test lux calculation."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        # Create test image for calculate_lux
-        temp_dir = tempfile.mkdtemp()
-        test_image = os.path.join(temp_dir, "test.jpg")
-
-        try:
-            # Create a dummy image
-            from PIL import Image
-
-            img = Image.new("RGB", (100, 100), color=(128, 128, 128))
-            img.save(test_image)
-
-            # Test typical metadata
-            metadata = {
-                "ExposureTime": 10000,  # 10ms
-                "AnalogueGain": 2.0,
-            }
+        # Test typical metadata
+        metadata = {
+            "ExposureTime": 10000,  # 10ms
+            "AnalogueGain": 2.0,
+        }
 
-            lux = timelapse.calculate_lux(test_image, metadata)
-            assert isinstance(lux, float)
-            assert lux > 0
-        finally:
-            os.unlink(test_image)
-            os.rmdir(temp_dir)
+        lux = timelapse.calculate_lux(tiny_gray_jpeg, metadata)
+        assert isinstance(lux, float)
+        # Mid-gray at 10ms / gain 2.0: (128/128) * 100 * 0.5 * 100
+        assert lux == pytest.approx(5000.0, rel=0.02)
 
-    def test_determine_light_mode(self, test_config_file):
+    def test_determine_light_mode(self, timelapse):
         """Test light mode determination."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Night
         assert timelapse.determine_mode(5.0) == LightMode.NIGHT
 
@@ -275,36 +441,75 @@ class TestAdaptiveTimelapse:
         # Transition
         assert timelapse.determine_mode(50.0) == LightMode.TRANSITION
 
-    def test_get_camera_settings_night(self, test_config_file):
-        """Test camera settings for night mode."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-        settings = timelapse.get_camera_settings(LightMode.NIGHT, lux=5.0)
-
-        assert "ExposureTime" in settings
-        assert "AnalogueGain" in settings
-        assert "AeEnable" in settings
-        assert settings["AeEnable"] == 0  # Auto-exposure disabled
-        assert settings["AwbEnable"] == 0  # AWB disabled for night
-
-    def test_get_camera_settings_day(self, test_config_file):
-        """Test camera settings for day mode with smooth exposure transitions."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-        settings = timelapse.get_camera_settings(LightMode.DAY, lux=500.0)
-
-        # Day mode now uses manual exposure with smooth transitions (prevents ISO jumps)
-        # smooth_exposure_in_day_mode defaults to True
-        assert "AeEnable" in settings
-        assert settings["AeEnable"] == 0  # Manual exposure control
-        assert "ExposureTime" in settings  # Calculated exposure
-        assert "AnalogueGain" in settings  # Calculated gain
-        # With smooth_wb_in_day_mode (default True), AWB is disabled
-        # and manual interpolated ColourGains are used instead
-        assert settings["AwbEnable"] == 0
-        assert "ColourGains" in settings
-
-    def test_get_camera_settings_transition(self, test_config_file):
+    @pytest.mark.parametrize(
+        "mode,lux,config_patch,expected",
+        [
+            # Night: manual exposure, AWB disabled
+            (
+                LightMode.NIGHT,
+                5.0,
+                {},
+                {"ExposureTime": ..., "AnalogueGain": ..., "AeEnable": 0, "AwbEnable": 0},
+            ),
+            # Day: smooth manual exposure with interpolated manual ColourGains (defaults)
+            (
+                LightMode.DAY,
+                500.0,
+                {},
+                {
+                    "ExposureTime": ...,
+                    "AnalogueGain": ...,
+                    "AeEnable": 0,
+                    "AwbEnable": 0,
+                    "ColourGains": ...,
+                },
+            ),
+            # Night applies manual colour gains from config
+            (
+                LightMode.NIGHT,
+                None,
+                {"night_mode": {"colour_gains": [1.8, 1.5]}},
+                {"ColourGains": (1.8, 1.5)},
+            ),
+            # Day with manual exposure (10ms)
+            (
+                LightMode.DAY,
+                None,
+                {"day_mode": {"exposure_time": 0.01, "analogue_gain": 1.0}},
+                {"AeEnable": 0, "ExposureTime": ..., "AnalogueGain": ...},
+            ),
+            # Day brightness adjustment
+            (LightMode.DAY, None, {"day_mode": {"brightness": 0.2}}, {"Brightness": 0.2}),
+            # Transition without smooth transition uses fixed middle values
+            (
+                LightMode.TRANSITION,
+                50.0,
+                {"transition_mode": {"smooth_transition": False}},
+                {"ExposureTime": int(5.0 * 1_000_000)},
+            ),
+        ],
+        ids=[
+            "night",
+            "day",
+            "night_with_colour_gains",
+            "day_manual_exposure",
+            "day_with_brightness",
+            "transition_no_smooth",
+        ],
+    )
+    def test_get_camera_settings(self, timelapse, mode, lux, config_patch, expected):
+        """Test camera settings per mode (``...`` means the key only has to be present)."""
+        _deep_update(timelapse.config["adaptive_timelapse"], copy.deepcopy(config_patch))
+
+        settings = timelapse.get_camera_settings(mode, lux=lux)
+
+        for key, value in expected.items():
+            assert key in settings
+            if value is not ...:
+                assert settings[key] == value
+
+    def test_get_camera_settings_transition(self, timelapse):
         """Test camera settings for transition mode."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         settings = timelapse.get_camera_settings(LightMode.TRANSITION, lux=50.0)
 
         assert "ExposureTime" in settings
@@ -314,18 +519,10 @@ class TestAdaptiveTimelapse:
         night_gain = timelapse.config["adaptive_timelapse"]["night_mode"]["analogue_gain"]
         assert settings["AnalogueGain"] <= night_gain
 
-    def test_get_camera_settings_transition_long_exposure(self, test_config_file):
+    def test_get_camera_settings_transition_long_exposure(self, timelapse):
         """Test transition mode always uses manual WB for smooth transitions."""
         # Add colour_gains to night_mode config
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-
-        config_data["adaptive_timelapse"]["night_mode"]["colour_gains"] = [1.8, 1.5]
-
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
-
-        timelapse = AdaptiveTimelapse(test_config_file)
+        timelapse.config["adaptive_timelapse"]["night_mode"]["colour_gains"] = [1.8, 1.5]
 
         # Test long exposure (>1s) - should use manual WB
         settings_long = timelapse.get_camera_settings(LightMode.TRANSITION, lux=15.0)
@@ -338,158 +535,65 @@ class TestAdaptiveTimelapse:
         assert settings_short["AwbEnable"] == 0  # AWB always disabled in transition
         assert "ColourGains" in settings_short  # Interpolated gains used
 
-    def test_signal_handler(self, test_config_file):
+    def test_signal_handler(self, timelapse):
         """Test signal handler stops the timelapse."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         assert timelapse.running is True
 
         # Simulate SIGTERM
         timelapse._signal_handler(15, None)
         assert timelapse.running is False
 
-    def test_take_test_shot(self, test_config_file):
+    def test_take_test_shot(self, readonly_config_file, mock_image_capture):
         """Test taking a test shot."""
-        import tempfile
-        import json
-
-        # Create metadata file
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump({"ExposureTime": 100000, "AnalogueGain": 1.0}, f)
-            metadata_path = f.name
-
-        try:
-            # Mock ImageCapture class completely
-            with patch("src.auto_timelapse.ImageCapture") as mock_capture_class:
-                # Mock the context manager
-                mock_instance = MagicMock()
-                mock_capture_class.return_value.__enter__.return_value = mock_instance
-                mock_capture_class.return_value.__exit__.return_value = None
-
-                # Mock capture_request to return metadata
-                mock_request = MagicMock()
-                mock_request.get_metadata.return_value = {
-                    "ExposureTime": 100000,
-                    "AnalogueGain": 1.0,
-                }
-                mock_instance.picam2.capture_request.return_value = mock_request
-
-                timelapse = AdaptiveTimelapse(test_config_file)
-                image_path, metadata = timelapse.take_test_shot()
-
-                assert image_path is not None
-                assert isinstance(metadata, dict)
-                assert "ExposureTime" in metadata
-                # Verify capture_request was called
-                mock_instance.picam2.capture_request.assert_called_once()
-                # Verify request was released
-                mock_request.release.assert_called_once()
-        finally:
-            os.unlink(metadata_path)
-
-    def test_calculate_lux_no_pil(self, test_config_file):
+        # Mock ImageCapture class completely
+        with patch("src.auto_timelapse.ImageCapture", mock_image_capture):
+            mock_instance = mock_image_capture.return_value.__enter__.return_value
+            mock_request = mock_instance.picam2.capture_request.return_value
+
+            timelapse = AdaptiveTimelapse(readonly_config_file)
+            image_path, metadata = timelapse.take_test_shot()
+
+            assert image_path is not None
+            assert isinstance(metadata, dict)
+            assert "ExposureTime" in metadata
+            # Verify capture_request was called
+            mock_instance.picam2.capture_request.assert_called_once()
+            # Verify request was released
+            mock_request.release.assert_called_once()
+            # Test image goes to the path cached at init
+            mock_request.save.assert_called_once_with("main", str(timelapse._test_shot_path))
+
+    @requires_pil
+    def test_calculate_lux_no_pil(self, timelapse):
         """Test lux calculation fallback when PIL not available."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         metadata = {
             "ExposureTime": 50000,  # 50ms
             "AnalogueGain": 1.5,
         }
 
         # Mock PIL.Image.open to raise ImportError
-        with patch("PIL.Image.open", side_effect=ImportError("PIL not available")):
+        with patch.object(_PilImage, "open", side_effect=ImportError("PIL not available")):
             lux = timelapse.calculate_lux("/fake/path.jpg", metadata)
             assert isinstance(lux, float)
             assert lux > 0
 
-    def test_get_camera_settings_night_with_colour_gains(self, test_config_file):
-        """Test night mode applies manual colour gains."""
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-
-        config_data["adaptive_timelapse"]["night_mode"]["colour_gains"] = [1.8, 1.5]
-
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
-
-        timelapse = AdaptiveTimelapse(test_config_file)
-        settings = timelapse.get_camera_settings(LightMode.NIGHT)
-
-        assert "ColourGains" in settings
-        assert settings["ColourGains"] == (1.8, 1.5)
-
-    def test_get_camera_settings_day_manual_exposure(self, test_config_file):
-        """Test day mode with manual exposure."""
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-
-        config_data["adaptive_timelapse"]["day_mode"]["exposure_time"] = 0.01  # 10ms
-        config_data["adaptive_timelapse"]["day_mode"]["analogue_gain"] = 1.0
-
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
-
-        timelapse = AdaptiveTimelapse(test_config_file)
-        settings = timelapse.get_camera_settings(LightMode.DAY)
-
-        assert settings["AeEnable"] == 0  # Manual mode
-        assert "ExposureTime" in settings
-        assert "AnalogueGain" in settings
-
-    def test_get_camera_settings_day_with_brightness(self, test_config_file):
-        """Test day mode brightness adjustment."""
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-
-        config_data["adaptive_timelapse"]["day_mode"]["brightness"] = 0.2
-
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
-
-        timelapse = AdaptiveTimelapse(test_config_file)
-        settings = timelapse.get_camera_settings(LightMode.DAY)
-
-        assert "Brightness" in settings
-        assert settings["Brightness"] == 0.2
-
-    def test_get_camera_settings_transition_no_smooth(self, test_config_file):
-        """Test transition mode without smooth transition."""
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-
-        config_data["adaptive_timelapse"]["transition_mode"]["smooth_transition"] = False
-
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
-
-        timelapse = AdaptiveTimelapse(test_config_file)
-        settings = timelapse.get_camera_settings(LightMode.TRANSITION, lux=50.0)
-
-        # Should use fixed middle values
-        assert "ExposureTime" in settings
-        assert settings["ExposureTime"] == int(5.0 * 1_000_000)
-
-    def test_close_camera_fast(self, test_config_file):
+    def test_close_camera_fast(self, timelapse):
         """Test fast camera close method."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Mock capture object
-        mock_capture = MagicMock()
-        mock_capture.picam2 = MagicMock()
+        mock_capture = Mock(spec=ImageCapture)
+        mock_capture.picam2 = Mock()
 
         # Should not raise exception
         timelapse._close_camera_fast(mock_capture, "night")
         mock_capture.close.assert_called_once()
 
-    def test_close_camera_fast_none(self, test_config_file):
+    def test_close_camera_fast_none(self, timelapse):
         """Test close with None capture."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         # Should not raise exception
         timelapse._close_camera_fast(None, "day")
 
-    def test_calculate_lux_error_handling(self, test_config_file):
+    def test_calculate_lux_error_handling(self, timelapse):
         """Test lux calculation handles image read errors."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         metadata = {
             "ExposureTime": 10000,
             "AnalogueGain": 1.0,
@@ -504,32 +608,27 @@ class TestAdaptiveTimelapse:
 class TestLuxSmoothing:
     """Test lux smoothing (EMA) functionality."""
 
-    def test_smooth_lux_first_reading(self, test_config_file):
+    def test_smooth_lux_first_reading(self, timelapse):
         """Test first lux reading initializes smoothed value."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         assert timelapse._smoothed_lux is None
 
         result = timelapse._smooth_lux(100.0)
         assert result == 100.0
         assert timelapse._smoothed_lux == 100.0
 
-    def test_smooth_lux_dampens_spikes(self, test_config_file):
+    def test_smooth_lux_dampens_spikes(self, timelapse):
         """Test that EMA dampens sudden lux spikes."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Initialize with stable reading
         timelapse._smooth_lux(100.0)
 
         # Sudden spike should be dampened
         result = timelapse._smooth_lux(500.0)
         # With alpha=0.3: 0.3 * 500 + 0.7 * 100 = 150 + 70 = 220
-        assert result < 500.0
-        assert result > 100.0
+        assert result == pytest.approx(220.0)
+        assert timelapse._smoothed_lux == result
 
-    def test_smooth_lux_converges(self, test_config_file):
+    def test_smooth_lux_converges(self, timelapse):
         """Test that smoothed lux converges to stable value."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._smooth_lux(100.0)
 
         # Apply same value repeatedly - should converge
@@ -539,31 +638,49 @@ class TestLuxSmoothing:
         # Should be very close to 200 after many iterations
         assert abs(result - 200.0) < 1.0
 
+    def test_smooth_lux_batch_matches_scalar(self, readonly_config_file):
+        """Test batch smoothing gives the same series as per-frame smoothing."""
+        raw = [100.0, 500.0, 80.0, 3.5, 0.2, 1200.0] * 25  # Spans several blocks
+
+        scalar = _timelapse_for(readonly_config_file)
+        expected = [scalar._smooth_lux(value) for value in raw]
+
+        batch = _timelapse_for(readonly_config_file)
+        result = batch._smooth_lux_batch(raw)
+
+        assert len(result) == len(raw)
+        for got, want in zip(result, expected):
+            assert abs(got - want) < 1e-9 * max(1.0, want)
+        assert abs(batch._smoothed_lux - scalar._smoothed_lux) < 1e-9 * scalar._smoothed_lux
+
+        # Continuing from existing state also matches
+        assert abs(batch._smooth_lux_batch([50.0])[0] - scalar._smooth_lux(50.0)) < 1e-9
+
+    def test_smooth_lux_batch_empty(self, timelapse):
+        """Test empty batch leaves smoothing state untouched."""
+        assert len(timelapse._smooth_lux_batch([])) == 0
+        assert timelapse._smoothed_lux is None
+
 
 class TestHysteresis:
     """Test mode change hysteresis."""
 
-    def test_hysteresis_first_mode(self, test_config_file):
+    def test_hysteresis_first_mode(self, timelapse):
         """Test first mode is accepted immediately."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         result = timelapse._apply_hysteresis("night")
         assert result == "night"
         assert timelapse._last_mode == "night"
 
-    def test_hysteresis_same_mode(self, test_config_file):
+    def test_hysteresis_same_mode(self, timelapse):
         """Test same mode resets counter."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._apply_hysteresis("day")
         timelapse._apply_hysteresis("day")
         timelapse._apply_hysteresis("day")
 
         assert timelapse._mode_hold_count == 0
 
-    def test_hysteresis_holds_mode(self, test_config_file):
+    def test_hysteresis_holds_mode(self, timelapse):
         """Test mode change is held until threshold reached."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._hysteresis_frames = 3
 
         timelapse._apply_hysteresis("night")
@@ -581,9 +698,8 @@ class TestHysteresis:
         assert result3 == "day"  # Now day
         assert timelapse._mode_hold_count == 0
 
-    def test_hysteresis_resets_on_same_mode(self, test_config_file):
+    def test_hysteresis_resets_on_same_mode(self, timelapse):
         """Test counter resets when same mode as current is requested."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._hysteresis_frames = 3
 
         timelapse._apply_hysteresis("night")
@@ -594,9 +710,8 @@ class TestHysteresis:
         assert timelapse._mode_hold_count == 0
         assert timelapse._last_mode == "night"
 
-    def test_hysteresis_counts_any_different_mode(self, test_config_file):
+    def test_hysteresis_counts_any_different_mode(self, timelapse):
         """Test any different mode increments counter."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._hysteresis_frames = 4  # Need 4 frames
 
         timelapse._apply_hysteresis("night")  # accepted
@@ -608,21 +723,45 @@ class TestHysteresis:
         assert timelapse._last_mode == "night"
         assert timelapse._mode_hold_count == 3
 
+    @pytest.mark.parametrize("hysteresis_frames", [0, 1, 3, 5])
+    def test_hysteresis_batch_matches_scalar(self, timelapse, hysteresis_frames):
+        """Test batch hysteresis gives the same modes and state as per-frame calls."""
+        rng = random.Random(hysteresis_frames)
+        modes = [LightMode.NIGHT, LightMode.TRANSITION, LightMode.DAY]
+        candidates = []
+        for _ in range(60):
+            candidates.extend([rng.choice(modes)] * rng.randint(1, 6))
+
+        scalar = copy.deepcopy(timelapse)
+        scalar._hysteresis_frames = hysteresis_frames
+        expected = [scalar._apply_hysteresis(mode) for mode in candidates]
+
+        batch = copy.deepcopy(timelapse)
+        batch._hysteresis_frames = hysteresis_frames
+        # Split in two to also cover carrying state between batches
+        result = list(batch._apply_hysteresis_batch(candidates[:37]))
+        result += list(batch._apply_hysteresis_batch(candidates[37:]))
+
+        assert result == expected
+        assert batch._last_mode == scalar._last_mode
+        assert batch._mode_hold_count == scalar._mode_hold_count
+
+    def test_hysteresis_batch_empty(self, timelapse):
+        """Test empty batch leaves hysteresis state untouched."""
+        assert len(timelapse._apply_hysteresis_batch([])) == 0
+        assert timelapse._last_mode is None
+
 
 class TestInterpolation:
     """Test interpolation methods for smooth transitions."""
 
-    def test_interpolate_colour_gains_first_frame(self, test_config_file):
+    def test_interpolate_colour_gains_first_frame(self, timelapse):
         """Test first frame accepts target gains."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         result = timelapse._interpolate_colour_gains((2.0, 1.5))
         assert result == (2.0, 1.5)
 
-    def test_interpolate_colour_gains_gradual(self, test_config_file):
+    def test_interpolate_colour_gains_gradual(self, timelapse):
         """Test gains change gradually."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._interpolate_colour_gains((1.5, 2.0))
         result = timelapse._interpolate_colour_gains((2.5, 1.0))
 
@@ -630,52 +769,40 @@ class TestInterpolation:
         assert result[0] > 1.5 and result[0] < 2.5
         assert result[1] < 2.0 and result[1] > 1.0
 
-    def test_interpolate_gain_first_frame(self, test_config_file):
+    def test_interpolate_gain_first_frame(self, timelapse):
         """Test first frame accepts target gain."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         result = timelapse._interpolate_gain(4.0)
         assert result == 4.0
 
-    def test_interpolate_gain_gradual(self, test_config_file):
+    def test_interpolate_gain_gradual(self, timelapse):
         """Test gain changes gradually."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._interpolate_gain(1.0)
         result = timelapse._interpolate_gain(6.0)
 
         assert result > 1.0 and result < 6.0
 
-    def test_interpolate_gain_clamps(self, test_config_file):
+    def test_interpolate_gain_clamps(self, timelapse):
         """Test gain is clamped to valid range."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._interpolate_gain(1.0)
         result = timelapse._interpolate_gain(0.1)  # Below min
 
         assert result >= 1.0  # Clamped to min
 
-    def test_interpolate_exposure_first_frame(self, test_config_file):
+    def test_interpolate_exposure_first_frame(self, timelapse):
         """Test first frame accepts target exposure."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         result = timelapse._interpolate_exposure(5.0)
         assert result == 5.0
 
-    def test_interpolate_exposure_logarithmic(self, test_config_file):
+    def test_interpolate_exposure_logarithmic(self, timelapse):
         """Test exposure uses logarithmic interpolation."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._interpolate_exposure(1.0)
         result = timelapse._interpolate_exposure(10.0)
 
         # Log interpolation: should be between 1 and 10
         assert result > 1.0 and result < 10.0
 
-    def test_interpolate_exposure_clamps(self, test_config_file):
+    def test_interpolate_exposure_clamps(self, timelapse):
         """Test exposure is clamped to valid range."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._interpolate_exposure(1.0)
         result = timelapse._interpolate_exposure(100.0)  # Above max
 
@@ -685,22 +812,17 @@ class TestInterpolation:
 class TestBrightnessFeedback:
     """Test brightness feedback system for smooth transitions."""
 
-    def test_brightness_feedback_initial(self, test_config_file):
+    def test_brightness_feedback_initial(self, timelapse):
         """Test initial correction factor is 1.0."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         assert timelapse._brightness_correction_factor == 1.0
 
-    def test_brightness_feedback_none_brightness(self, test_config_file):
+    def test_brightness_feedback_none_brightness(self, timelapse):
         """Test None brightness returns current factor."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         result = timelapse._apply_brightness_feedback(None)
         assert result == 1.0
 
-    def test_brightness_feedback_within_tolerance(self, test_config_file):
+    def test_brightness_feedback_within_tolerance(self, timelapse):
         """Test brightness within tolerance decays towards 1.0."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._brightness_correction_factor = 1.2  # Above 1.0
 
         # Brightness within tolerance (120 ± 40)
@@ -709,30 +831,24 @@ class TestBrightnessFeedback:
         # Should decay towards 1.0
         assert timelapse._brightness_correction_factor < 1.2
 
-    def test_brightness_feedback_too_bright(self, test_config_file):
+    def test_brightness_feedback_too_bright(self, timelapse):
         """Test correction decreases when image too bright."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Image much too bright (200 vs target 120)
         timelapse._apply_brightness_feedback(200.0)
 
         # Correction should decrease (reduce exposure)
         assert timelapse._brightness_correction_factor < 1.0
 
-    def test_brightness_feedback_too_dark(self, test_config_file):
+    def test_brightness_feedback_too_dark(self, timelapse):
         """Test correction increases when image too dark."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Image too dark (50 vs target 120)
         timelapse._apply_brightness_feedback(50.0)
 
         # Correction should increase (boost exposure)
         assert timelapse._brightness_correction_factor > 1.0
 
-    def test_brightness_feedback_clamps(self, test_config_file):
+    def test_brightness_feedback_clamps(self, timelapse):
         """Test correction factor is clamped to valid range."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Apply extreme dark correction repeatedly
         for _ in range(50):
             timelapse._apply_brightness_feedback(10.0)
@@ -752,20 +868,16 @@ class TestBrightnessFeedback:
 class TestExposureCalculation:
     """Test lux-based exposure and gain calculations."""
 
-    def test_calculate_target_exposure_inverse_relationship(self, test_config_file):
+    def test_calculate_target_exposure_inverse_relationship(self, timelapse):
         """Test exposure has inverse relationship with lux."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         exp_low_lux = timelapse._calculate_target_exposure_from_lux(10.0)
         exp_high_lux = timelapse._calculate_target_exposure_from_lux(1000.0)
 
         # Higher lux = shorter exposure
         assert exp_high_lux < exp_low_lux
 
-    def test_calculate_target_exposure_clamps(self, test_config_file):
+    def test_calculate_target_exposure_clamps(self, timelapse):
         """Test exposure is clamped to config limits."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Very low lux - should clamp to max
         exp_night = timelapse._calculate_target_exposure_from_lux(0.01)
         assert exp_night <= 20.0
@@ -774,10 +886,8 @@ class TestExposureCalculation:
         exp_bright = timelapse._calculate_target_exposure_from_lux(10000.0)
         assert exp_bright >= 0.01
 
-    def test_calculate_target_exposure_applies_correction(self, test_config_file):
+    def test_calculate_target_exposure_applies_correction(self, timelapse):
         """Test brightness correction factor is applied."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Get base exposure
         exp_base = timelapse._calculate_target_exposure_from_lux(100.0)
 
@@ -788,20 +898,16 @@ class TestExposureCalculation:
         # Corrected should be ~2x base (within clamping limits)
         assert exp_corrected > exp_base
 
-    def test_calculate_target_gain_inverse_relationship(self, test_config_file):
+    def test_calculate_target_gain_inverse_relationship(self, timelapse):
         """Test gain has inverse relationship with lux."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         gain_low_lux = timelapse._calculate_target_gain_from_lux(1.0)
         gain_high_lux = timelapse._calculate_target_gain_from_lux(1000.0)
 
         # Higher lux = lower gain
         assert gain_high_lux < gain_low_lux
 
-    def test_calculate_target_gain_clamps(self, test_config_file):
+    def test_calculate_target_gain_clamps(self, timelapse):
         """Test gain clamps at extremes."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Very low lux - should be night gain
         gain_night = timelapse._calculate_target_gain_from_lux(0.1)
         assert gain_night == 6.0  # Night mode gain from config
@@ -814,36 +920,28 @@ class TestExposureCalculation:
 class TestTargetColourGains:
     """Test colour gain calculation for different modes."""
 
-    def test_target_colour_gains_night(self, test_config_file):
+    def test_target_colour_gains_night(self):
         """Test night mode uses night gains."""
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-        config_data["adaptive_timelapse"]["night_mode"]["colour_gains"] = [1.8, 2.0]
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
+        config = _make_test_config()
+        config["adaptive_timelapse"]["night_mode"]["colour_gains"] = [1.8, 2.0]
 
-        timelapse = AdaptiveTimelapse(test_config_file)
+        timelapse = AdaptiveTimelapse.from_config_dict(config)
         gains = timelapse._get_target_colour_gains(LightMode.NIGHT)
 
         assert gains == (1.8, 2.0)
 
-    def test_target_colour_gains_day(self, test_config_file):
+    def test_target_colour_gains_day(self, timelapse):
         """Test day mode uses day reference or default."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # No day reference learned yet - should use default
         gains = timelapse._get_target_colour_gains(LightMode.DAY)
         assert gains == (2.5, 1.6)  # Default day gains
 
-    def test_target_colour_gains_transition_interpolates(self, test_config_file):
+    def test_target_colour_gains_transition_interpolates(self):
         """Test transition mode interpolates between night and day."""
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-        config_data["adaptive_timelapse"]["night_mode"]["colour_gains"] = [1.0, 3.0]
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
+        config = _make_test_config()
+        config["adaptive_timelapse"]["night_mode"]["colour_gains"] = [1.0, 3.0]
 
-        timelapse = AdaptiveTimelapse(test_config_file)
+        timelapse = AdaptiveTimelapse.from_config_dict(config)
         timelapse._day_wb_reference = (3.0, 1.0)
 
         # Position 0.5 = midpoint
@@ -857,10 +955,8 @@ class TestTargetColourGains:
 class TestDayWBReference:
     """Test day white balance reference learning."""
 
-    def test_update_day_wb_reference_bright(self, test_config_file):
+    def test_update_day_wb_reference_bright(self, timelapse):
         """Test WB reference is updated in bright conditions."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         metadata = {
             "ColourGains": [2.8, 1.5],
             "Lux": 500,  # Bright enough
@@ -869,10 +965,8 @@ class TestDayWBReference:
         timelapse._update_day_wb_reference(metadata)
         assert timelapse._day_wb_reference == (2.8, 1.5)
 
-    def test_update_day_wb_reference_too_dark(self, test_config_file):
+    def test_update_day_wb_reference_too_dark(self, timelapse):
         """Test WB reference not updated when too dark."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         metadata = {
             "ColourGains": [2.8, 1.5],
             "Lux": 50,  # Too dark
@@ -881,10 +975,8 @@ class TestDayWBReference:
         timelapse._update_day_wb_reference(metadata)
         assert timelapse._day_wb_reference is None
 
-    def test_update_day_wb_reference_invalid_gains(self, test_config_file):
+    def test_update_day_wb_reference_invalid_gains(self, timelapse):
         """Test WB reference rejects invalid gains."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         metadata = {
             "ColourGains": [0.5, 5.0],  # Out of valid range
             "Lux": 500,
@@ -893,120 +985,172 @@ class TestDayWBReference:
         timelapse._update_day_wb_reference(metadata)
         assert timelapse._day_wb_reference is None
 
+    @pytest.mark.parametrize(
+        "metadata",
+        [
+            {"ColourGains": [2.8, 1.5], "Lux": 200},  # Limit is exclusive
+            {"ColourGains": [4.0, 1.5], "Lux": 500},  # Gain limit is exclusive
+            {"ColourGains": None, "Lux": 500},
+            {"Lux": 500},
+        ],
+    )
+    def test_update_day_wb_reference_rejects(self, timelapse, metadata):
+        """Test WB reference is kept at the boundaries and without gains."""
+        timelapse._update_day_wb_reference(metadata)
+        assert timelapse._day_wb_reference is None
+
 
 class TestBrightnessAnalysis:
     """Test image brightness analysis."""
 
-    def test_analyze_image_brightness(self, test_config_file):
+    def test_analyze_image_brightness(self, timelapse, tiny_gray_jpeg):
         """Test brightness analysis returns expected metrics."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        # Create test image
-        temp_dir = tempfile.mkdtemp()
-        test_image = os.path.join(temp_dir, "test.jpg")
-
-        try:
-            from PIL import Image
-
-            # Create image with known brightness
-            img = Image.new("L", (100, 100), color=128)  # Mid-gray
-            img.save(test_image)
-
-            result = timelapse._analyze_image_brightness(test_image)
-
-            assert "mean_brightness" in result
-            assert "median_brightness" in result
-            assert "std_brightness" in result
-            assert "underexposed_percent" in result
-            assert "overexposed_percent" in result
+        # Mid-gray image with known brightness
+        result = timelapse._analyze_image_brightness(tiny_gray_jpeg)
+
+        assert "mean_brightness" in result
+        assert "median_brightness" in result
+        assert "std_brightness" in result
+        assert "underexposed_percent" in result
+        assert "overexposed_percent" in result
+
+        # Mid-gray image should have mean ~128
+        assert abs(result["mean_brightness"] - 128) < 5
+
+    @requires_pil
+    def test_analyze_image_brightness_stride(self, timelapse):
+        """Test sub-sampled analysis matches full analysis on a uniform image."""
+        assert timelapse._brightness_sample_stride == 4
+
+        # Analyzed straight from memory, no file needed
+        buffer = io.BytesIO()
+        _PilImage.new("L", (64, 48), color=200).save(buffer, format="PNG")
+
+        buffer.seek(0)
+        sampled = timelapse._analyze_image_brightness(buffer)
+        timelapse._brightness_sample_stride = 1
+        buffer.seek(0)
+        full = timelapse._analyze_image_brightness(buffer)
+
+        assert sampled == full
+        assert sampled["mean_brightness"] == 200.0
+        assert sampled["percentile_95"] == 200.0
+
+    @requires_pil
+    def test_analyze_image_brightness_large_jpeg(self, timelapse, tmp_path):
+        """Test large JPEGs are analyzed via reduced-scale decoding."""
+        temp_dir = str(tmp_path)
+        test_image = os.path.join(temp_dir, "large.jpg")
+
+        img = _PilImage.new("RGB", (2048, 1536), color=(90, 90, 90))
+        img.save(test_image)
+
+        draft = _JpegImagePlugin.JpegImageFile.draft
+        with patch.object(
+            _JpegImagePlugin.JpegImageFile, "draft", autospec=True, side_effect=draft
+        ) as mock_draft:
+            timelapse._analyze_image_brightness(test_image)
+        mock_draft.assert_called_once()
+
+        result = timelapse._analyze_image_brightness(test_image)
+        assert abs(result["mean_brightness"] - 90) < 2
+        assert result["overexposed_percent"] == 0.0
+
+    def test_analyze_image_brightness_error(self, timelapse):
+        """Test brightness analysis handles errors gracefully."""
+        result = timelapse._analyze_image_brightness("/nonexistent/image.jpg")
+        assert result == {}
 
-            # Mid-gray image should have mean ~128
-            assert abs(result["mean_brightness"] - 128) < 5
-        finally:
-            os.unlink(test_image)
-            os.rmdir(temp_dir)
+    def test_analyze_image_brightness_rejects_non_jpeg_header(self, timelapse, tmp_path):
+        """Test a .jpg without the SOI marker is rejected before decoding."""
+        image_path = tmp_path / "truncated.jpg"
+        image_path.write_bytes(b"")
 
-    def test_analyze_image_brightness_error(self, test_config_file):
-        """Test brightness analysis handles errors gracefully."""
-        timelapse = AdaptiveTimelapse(test_config_file)
+        with patch("PIL.Image.open") as mock_open:
+            result = timelapse._analyze_image_brightness(str(image_path))
 
-        result = timelapse._analyze_image_brightness("/nonexistent/image.jpg")
         assert result == {}
+        mock_open.assert_not_called()
 
 
 class TestTimelapseCaptureFlow:
     """Test the main timelapse capture flow."""
 
-    def test_capture_frame(self, test_config_file):
+    def test_capture_frame(self, timelapse):
         """Test single frame capture."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        # Mock ImageCapture
-        mock_capture = MagicMock()
-        mock_capture.capture.return_value = ("/tmp/frame.jpg", "/tmp/frame_metadata.json")
+        fake_capture = _FakeCapture(("/tmp/frame.jpg", "/tmp/frame_metadata.json"))
 
         # Test capture
-        image_path, metadata_path = timelapse.capture_frame(mock_capture, "night")
+        image_path, metadata_path = timelapse.capture_frame(fake_capture, "night")
 
         assert image_path == "/tmp/frame.jpg"
         assert timelapse.frame_count == 1
-        mock_capture.capture.assert_called_once()
+        assert fake_capture.calls == [{"mode": "night", "extra_metadata": None}]
+
+    def test_capture_frame_passes_calculated_lux(self, timelapse):
+        """Test calculated lux is passed to the capture as extra metadata."""
+        fake_capture = _FakeCapture(("/tmp/frame.jpg", None))
+
+        timelapse.capture_frame(fake_capture, "day", calculated_lux=250.0)
+
+        assert fake_capture.calls == [{"mode": "day", "extra_metadata": {"Lux": 250.0}}]
 
-    def test_capture_frame_increments_counter(self, test_config_file):
+    def test_capture_frame_increments_counter(self, timelapse):
         """Test that frame counter increments."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-        mock_capture = MagicMock()
-        mock_capture.capture.return_value = ("/tmp/frame.jpg", None)
+        fake_capture = _FakeCapture(("/tmp/frame.jpg", None))
 
         # Capture multiple frames
-        timelapse.capture_frame(mock_capture, "day")
-        timelapse.capture_frame(mock_capture, "day")
-        timelapse.capture_frame(mock_capture, "day")
+        timelapse.capture_frame(fake_capture, "day")
+        timelapse.capture_frame(fake_capture, "day")
+        timelapse.capture_frame(fake_capture, "day")
 
         assert timelapse.frame_count == 3
+        assert len(fake_capture.calls) == 3
 
 
 class TestPolarAwareness:
     """Test polar day/night awareness functionality."""
 
-    def test_init_location_with_config(self, test_config_file):
+    def test_init_location_with_config(self):
         """Test location initialization with valid config."""
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-        config_data["location"] = {
+        config = _make_test_config()
+        config["location"] = {
             "latitude": 68.7,
             "longitude": 15.4,
             "timezone": "Europe/Oslo",
             "civil_twilight_threshold": -6.0,
         }
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
 
-        timelapse = AdaptiveTimelapse(test_config_file)
+        timelapse = AdaptiveTimelapse.from_config_dict(config)
 
         # Location should be initialized (if astral is available)
         # The test is valid regardless of astral availability
         assert timelapse._civil_twilight_threshold == -6.0
 
-    def test_init_location_without_config(self, test_config_file):
-        """Test location initialization without config."""
-        timelapse = AdaptiveTimelapse(test_config_file)
+    @pytest.mark.skipif(not auto_timelapse.ASTRAL_AVAILABLE, reason="astral not available")
+    def test_location_enables_sun_elevation(self):
+        """Test a configured location loads astral and gives a sun elevation."""
+        config = _make_test_config()
+        config["location"] = {"latitude": 68.7, "longitude": 15.4, "timezone": "Europe/Oslo"}
+
+        timelapse = AdaptiveTimelapse.from_config_dict(config)
+
+        assert timelapse._location is not None
+        assert -90.0 <= timelapse._get_sun_elevation() <= 90.0
 
+    def test_init_location_without_config(self, timelapse):
+        """Test location initialization without config."""
         # Without location config, location should be None
         assert timelapse._location is None
 
-    def test_is_polar_day_returns_false_without_location(self, test_config_file):
+    def test_is_polar_day_returns_false_without_location(self, timelapse):
         """Test polar day returns False when no location configured."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         result = timelapse._is_polar_day(lux=100.0)
 
         assert result is False
 
-    def test_get_sun_elevation_without_location(self, test_config_file):
+    def test_get_sun_elevation_without_location(self, timelapse):
         """Test sun elevation returns None without location."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         result = timelapse._get_sun_elevation()
 
         assert result is None
@@ -1015,123 +1159,88 @@ class TestPolarAwareness:
 class TestOverexposureDetection:
     """Test overexposure detection and fast ramp-down."""
 
-    def test_check_overexposure_triggers_on_high_brightness(self, test_config_file):
-        """Test overexposure detected with high brightness."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        brightness_metrics = {
-            "mean_brightness": 190,  # Above 180 threshold
-            "overexposed_percent": 5,
-        }
-
-        result = timelapse._check_overexposure(brightness_metrics)
-
-        assert result is True
-        assert timelapse._overexposure_detected is True
-
-    def test_check_overexposure_triggers_on_clipped_pixels(self, test_config_file):
-        """Test overexposure detected with many clipped pixels."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        brightness_metrics = {
-            "mean_brightness": 150,  # Normal brightness
-            "overexposed_percent": 15,  # Above 10% threshold
-        }
-
-        result = timelapse._check_overexposure(brightness_metrics)
-
-        assert result is True
-
-    def test_check_overexposure_clears_on_safe_values(self, test_config_file):
-        """Test overexposure cleared when values are safe."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-        timelapse._overexposure_detected = True  # Previously triggered
-        timelapse._overexposure_severity = "warning"  # Set severity
-
-        brightness_metrics = {
-            "mean_brightness": 120,  # Below 130 safe threshold
-            "overexposed_percent": 2,  # Below 3% safe threshold
-        }
-
-        result = timelapse._check_overexposure(brightness_metrics)
-
-        assert result is False
-        assert timelapse._overexposure_detected is False
+    @pytest.mark.parametrize(
+        "prior_severity,metrics,expected_severity",
+        [
+            (None, {"mean_brightness": 190, "overexposed_percent": 5}, "critical"),
+            (None, {"mean_brightness": 150, "overexposed_percent": 15}, "critical"),
+            (None, {"mean_brightness": 100, "overexposed_percent": 7}, "warning"),
+            ("warning", {"mean_brightness": 120, "overexposed_percent": 2}, None),
+            ("warning", {}, "warning"),
+            (None, None, None),
+        ],
+        ids=[
+            "high_brightness",
+            "clipped_pixels",
+            "clipped_warning",
+            "clears_on_safe_values",
+            "empty_metrics_keep_state",
+            "none_metrics",
+        ],
+    )
+    def test_check_overexposure(self, timelapse, prior_severity, metrics, expected_severity):
+        """Test overexposure detection, severity and clearing from a given prior state."""
+        timelapse._overexposure_detected = prior_severity is not None
+        timelapse._overexposure_severity = prior_severity
+
+        result = timelapse._check_overexposure(metrics)
+
+        assert result is (expected_severity is not None)
+        assert timelapse._overexposure_detected is result
+        assert timelapse._overexposure_severity == expected_severity
+
+    def test_check_overexposure_threshold_boundaries(self, timelapse):
+        """Test warning thresholds are exclusive (normal-frame fast path)."""
+        # Exactly at the warning thresholds - not overexposed
+        assert not timelapse._check_overexposure({"mean_brightness": 150, "overexposed_percent": 5})
         assert timelapse._overexposure_severity is None
 
-    def test_check_overexposure_empty_metrics(self, test_config_file):
-        """Test overexposure handling with empty metrics."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-        timelapse._overexposure_detected = True
-
-        result = timelapse._check_overexposure({})
-
-        # Should retain previous state
-        assert result is True
-
-    def test_check_overexposure_none_metrics(self, test_config_file):
-        """Test overexposure handling with None metrics."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        result = timelapse._check_overexposure(None)
+        # Just above - warning
+        assert timelapse._check_overexposure({"mean_brightness": 150.1, "overexposed_percent": 0})
+        assert timelapse._overexposure_severity == "warning"
 
-        assert result is False  # Default state
+        # Above warning but not safe yet - state is held
+        assert timelapse._check_overexposure({"mean_brightness": 140, "overexposed_percent": 0})
+        assert timelapse._overexposure_severity == "warning"
 
 
 class TestUnderexposureDetection:
     """Test underexposure detection and fast ramp-up."""
 
-    def test_check_underexposure_triggers_on_low_brightness(self, test_config_file):
-        """Test underexposure detected with low brightness (warning level)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        brightness_metrics = {
-            "mean_brightness": 85,  # Below 90 warning threshold
-        }
-
-        result = timelapse._check_underexposure(brightness_metrics)
-
-        assert result is True
-        assert timelapse._underexposure_detected is True
-        assert timelapse._underexposure_severity == "warning"
-
-    def test_check_underexposure_triggers_critical(self, test_config_file):
-        """Test critical underexposure detected with very low brightness."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        brightness_metrics = {
-            "mean_brightness": 60,  # Below 70 critical threshold
-        }
-
-        result = timelapse._check_underexposure(brightness_metrics)
-
-        assert result is True
-        assert timelapse._underexposure_detected is True
-        assert timelapse._underexposure_severity == "critical"
-
-    def test_check_underexposure_clears_on_safe_values(self, test_config_file):
-        """Test underexposure cleared when brightness is safe."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-        timelapse._underexposure_detected = True
-        timelapse._underexposure_severity = "warning"
-
-        brightness_metrics = {
-            "mean_brightness": 115,  # Above 105 safe threshold
-        }
-
-        result = timelapse._check_underexposure(brightness_metrics)
-
-        assert result is False
-        assert timelapse._underexposure_detected is False
-        assert timelapse._underexposure_severity is None
-
-    def test_check_underexposure_works_in_any_mode(self, test_config_file):
+    @pytest.mark.parametrize(
+        "prior_severity,metrics,expected_severity",
+        [
+            (None, {"mean_brightness": 85}, "warning"),
+            (None, {"mean_brightness": 60}, "critical"),
+            ("warning", {"mean_brightness": 115}, None),
+            ("warning", {}, "warning"),
+            (None, None, None),
+        ],
+        ids=[
+            "low_brightness_warning",
+            "very_low_brightness_critical",
+            "clears_on_safe_values",
+            "empty_metrics_keep_state",
+            "none_metrics",
+        ],
+    )
+    def test_check_underexposure(self, timelapse, prior_severity, metrics, expected_severity):
+        """Test underexposure detection, severity and clearing from a given prior state."""
+        timelapse._underexposure_detected = prior_severity is not None
+        timelapse._underexposure_severity = prior_severity
+
+        result = timelapse._check_underexposure(metrics)
+
+        assert result is (expected_severity is not None)
+        assert timelapse._underexposure_detected is result
+        assert timelapse._underexposure_severity == expected_severity
+
+    def test_check_underexposure_works_in_any_mode(self, timelapse):
         """Test underexposure detection works regardless of exposure level.
 
         This is critical - the old version only triggered at minimum exposure,
         but we need it to work during transitions too.
         """
-        timelapse = AdaptiveTimelapse(test_config_file)
         # Simulate being in middle of transition (not at min exposure)
         timelapse._last_exposure_time = 5.0  # 5 seconds - far from min
 
@@ -1145,40 +1254,20 @@ class TestUnderexposureDetection:
         assert result is True
         assert timelapse._underexposure_detected is True
 
-    def test_check_underexposure_empty_metrics(self, test_config_file):
-        """Test underexposure handling with empty metrics."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-        timelapse._underexposure_detected = True
-
-        result = timelapse._check_underexposure({})
-
-        # Should retain previous state
-        assert result is True
-
-    def test_check_underexposure_none_metrics(self, test_config_file):
-        """Test underexposure handling with None metrics."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        result = timelapse._check_underexposure(None)
-
-        assert result is False  # Default state
-
 
 class TestRampUpSpeed:
     """Test fast ramp-up speed for underexposure recovery."""
 
-    def test_get_rampup_speed_returns_none_when_not_underexposed(self, test_config_file):
+    def test_get_rampup_speed_returns_none_when_not_underexposed(self, timelapse):
         """Test rampup speed returns None when no underexposure."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._underexposure_detected = False
 
         speed = timelapse._get_rampup_speed()
 
         assert speed is None
 
-    def test_get_rampup_speed_returns_fast_on_warning(self, test_config_file):
+    def test_get_rampup_speed_returns_fast_on_warning(self, timelapse):
         """Test rampup speed returns fast speed on warning level."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._underexposure_detected = True
         timelapse._underexposure_severity = "warning"
 
@@ -1187,9 +1276,8 @@ class TestRampUpSpeed:
         assert speed == timelapse._fast_rampup_speed
         assert speed == 0.50  # Default value
 
-    def test_get_rampup_speed_returns_critical_on_severe(self, test_config_file):
+    def test_get_rampup_speed_returns_critical_on_severe(self, timelapse):
         """Test rampup speed returns critical speed on severe underexposure."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._underexposure_detected = True
         timelapse._underexposure_severity = "critical"
 
@@ -1198,10 +1286,8 @@ class TestRampUpSpeed:
         assert speed == timelapse._critical_rampup_speed
         assert speed == 0.70  # Default value
 
-    def test_rampup_speed_configurable(self, test_config_file):
+    def test_rampup_speed_configurable(self, timelapse):
         """Test that rampup speeds are loaded from config."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # These should be loaded from config (with defaults if not present)
         assert hasattr(timelapse, "_fast_rampup_speed")
         assert hasattr(timelapse, "_critical_rampup_speed")
@@ -1214,9 +1300,8 @@ class TestRampUpSpeed:
 class TestExposureSpeedSelection:
     """Test exposure speed selection for both over and underexposure."""
 
-    def test_exposure_uses_rampup_when_underexposed(self, test_config_file):
+    def test_exposure_uses_rampup_when_underexposed(self, timelapse):
         """Test that underexposure triggers fast ramp-up in camera settings."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._underexposure_detected = True
         timelapse._underexposure_severity = "warning"
         timelapse._overexposure_detected = False
@@ -1233,9 +1318,8 @@ class TestExposureSpeedSelection:
         assert "ExposureTime" in settings
         assert settings["ExposureTime"] > 0
 
-    def test_exposure_uses_rampdown_when_overexposed(self, test_config_file):
+    def test_exposure_uses_rampdown_when_overexposed(self, timelapse):
         """Test that overexposure triggers fast ramp-down in camera settings."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._overexposure_detected = True
         timelapse._overexposure_severity = "warning"
         timelapse._underexposure_detected = False
@@ -1249,9 +1333,8 @@ class TestExposureSpeedSelection:
         assert "ExposureTime" in settings
         assert settings["ExposureTime"] > 0
 
-    def test_underexposure_takes_priority_over_overexposure(self, test_config_file):
+    def test_underexposure_takes_priority_over_overexposure(self, timelapse):
         """Test that underexposure detection takes priority (edge case)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         # Both flags set (shouldn't happen, but test the priority)
         timelapse._underexposure_detected = True
         timelapse._underexposure_severity = "warning"
@@ -1266,14 +1349,33 @@ class TestExposureSpeedSelection:
 
         assert "ExposureTime" in settings
 
+    @pytest.mark.parametrize(
+        "under,over,expected_attr",
+        [
+            (None, None, None),
+            ("warning", None, "_fast_rampup_speed"),
+            ("critical", None, "_critical_rampup_speed"),
+            (None, "warning", "_fast_rampdown_speed"),
+            (None, "critical", "_critical_rampdown_speed"),
+            ("warning", "critical", "_fast_rampup_speed"),  # Underexposure wins
+        ],
+    )
+    def test_get_exposure_ramp_speed(self, timelapse, under, over, expected_attr):
+        """Test the ramp speed selected for every over/underexposure state."""
+        timelapse._underexposure_detected = under is not None
+        timelapse._underexposure_severity = under
+        timelapse._overexposure_detected = over is not None
+        timelapse._overexposure_severity = over
+
+        expected = getattr(timelapse, expected_attr) if expected_attr else None
+        assert timelapse._get_exposure_ramp_speed() == expected
+
 
 class TestTransitionSeeding:
     """Test transition seeding from metadata."""
 
-    def test_seed_from_metadata(self, test_config_file):
+    def test_seed_from_metadata(self, timelapse):
         """Test seeding transition state from captured metadata."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Test shot metadata has ColourGains from AWB
         test_shot_metadata = {
             "ColourGains": [2.0, 1.5],
@@ -1291,10 +1393,8 @@ class TestTransitionSeeding:
         assert timelapse._seed_wb_gains == (2.0, 1.5)
         assert timelapse._transition_seeded is True
 
-    def test_seed_from_metadata_updates_last_values(self, test_config_file):
+    def test_seed_from_metadata_updates_last_values(self, timelapse):
         """Test seeding updates interpolation state."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         test_shot_metadata = {
             "ColourGains": [2.2, 1.6],
         }
@@ -1310,203 +1410,262 @@ class TestTransitionSeeding:
         assert timelapse._last_analogue_gain == 3.0
         assert timelapse._last_colour_gains == (2.2, 1.6)
 
+    def test_seed_from_metadata_coerces_to_float(self, timelapse):
+        """Test seeded values are plain floats even from integer metadata."""
+        timelapse._seed_from_metadata({"ColourGains": [2, 3]}, {"AnalogueGain": 2})
+
+        assert timelapse._seed_wb_gains == (2.0, 3.0)
+        assert all(type(gain) is float for gain in timelapse._seed_wb_gains)
+        assert timelapse._day_wb_reference is timelapse._seed_wb_gains
+        assert type(timelapse._seed_gain) is float
+
 
 class TestDiagnosticEnrichment:
     """Test metadata enrichment with diagnostics."""
 
-    def test_enrich_metadata_with_diagnostics(self, test_config_file):
+    def test_enrich_metadata_with_diagnostics(self, timelapse, tmp_path):
         """Test diagnostic data is added to metadata."""
-        import json
-
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._smoothed_lux = 500.0
         timelapse._last_mode = LightMode.DAY
         timelapse._sun_elevation = 15.0
 
-        temp_dir = tempfile.mkdtemp()
-        try:
-            # Create test metadata file
-            metadata_path = os.path.join(temp_dir, "test_meta.json")
-            image_path = os.path.join(temp_dir, "test_image.jpg")
-
-            with open(metadata_path, "w") as f:
-                json.dump({"ExposureTime": 5000}, f)
+        temp_dir = str(tmp_path)
+        # Create test metadata file
+        metadata_path = os.path.join(temp_dir, "test_meta.json")
+        image_path = os.path.join(temp_dir, "test_image.jpg")
 
-            # Create dummy image
-            with open(image_path, "wb") as f:
-                f.write(b"\xff\xd8\xff\xe0")
+        Path(metadata_path).write_bytes(json.dumps({"ExposureTime": 5000}).encode("utf-8"))
 
-            result = timelapse._enrich_metadata_with_diagnostics(
-                metadata_path, image_path, LightMode.DAY, lux=500.0, raw_lux=520.0
-            )
+        # Create dummy image
+        Path(image_path).write_bytes(b"\xff\xd8\xff\xe0")
 
-            assert result is True
+        result = timelapse._enrich_metadata_with_diagnostics(
+            metadata_path, image_path, LightMode.DAY, lux=500.0, raw_lux=520.0
+        )
 
-            # Read enriched metadata
-            with open(metadata_path, "r") as f:
-                enriched = json.load(f)
+        assert result is True
 
-            assert "diagnostics" in enriched
-            diag = enriched["diagnostics"]
-            assert diag["mode"] == LightMode.DAY
-            assert diag["raw_lux"] == 520.0
-            assert diag["smoothed_lux"] == 500.0
-            assert diag["sun_elevation"] == 15.0
-        finally:
-            import shutil
+        # Read enriched metadata
+        enriched = json.loads(Path(metadata_path).read_bytes())
 
-            shutil.rmtree(temp_dir)
+        assert "diagnostics" in enriched
+        diag = enriched["diagnostics"]
+        assert diag["mode"] == LightMode.DAY
+        assert diag["raw_lux"] == 520.0
+        assert diag["smoothed_lux"] == 500.0
+        assert diag["sun_elevation"] == 15.0
 
-    def test_enrich_metadata_with_transition_position(self, test_config_file):
+    def test_enrich_metadata_with_transition_position(self, timelapse, tmp_path):
         """Test transition position is added to diagnostics."""
-        import json
-
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse._sun_elevation = 5.0
 
-        temp_dir = tempfile.mkdtemp()
-        try:
-            metadata_path = os.path.join(temp_dir, "test_meta.json")
-            image_path = os.path.join(temp_dir, "test_image.jpg")
+        temp_dir = str(tmp_path)
+        metadata_path = os.path.join(temp_dir, "test_meta.json")
+        image_path = os.path.join(temp_dir, "test_image.jpg")
 
-            with open(metadata_path, "w") as f:
-                json.dump({}, f)
+        Path(metadata_path).write_bytes(b"{}")
 
-            with open(image_path, "wb") as f:
-                f.write(b"\xff\xd8\xff\xe0")
+        Path(image_path).write_bytes(b"\xff\xd8\xff\xe0")
 
-            result = timelapse._enrich_metadata_with_diagnostics(
-                metadata_path,
-                image_path,
-                LightMode.TRANSITION,
-                lux=100.0,
-                transition_position=0.5,
+        result = timelapse._enrich_metadata_with_diagnostics(
+            metadata_path,
+            image_path,
+            LightMode.TRANSITION,
+            lux=100.0,
+            transition_position=0.5,
+        )
+
+        assert result is True
+
+        enriched = json.loads(Path(metadata_path).read_bytes())
+
+        assert "diagnostics" in enriched
+        assert enriched["diagnostics"]["transition_position"] == 0.5
+
+    @pytest.mark.parametrize(
+        "compress,sidecar_name,opener",
+        [(False, "img_metadata.diag.jsonl", open), (True, "img_metadata.diag.jsonl.gz", gzip.open)],
+    )
+    def test_enrich_metadata_sidecar_appends(
+        self, timelapse, tmp_path, compress, sidecar_name, opener
+    ):
+        """Test sidecar mode appends diagnostics and leaves the metadata file untouched."""
+        timelapse._adaptive_config["diagnostics"] = {
+            "enabled": True,
+            "sidecar": True,
+            "compress": compress,
+        }
+        metadata_path = tmp_path / "img_metadata.json"
+        image_path = tmp_path / "img.jpg"
+        metadata_path.write_text('{"ExposureTime": 5000}')
+        image_path.write_bytes(b"\xff\xd8\xff\xe0")
+
+        for lux in (100.0, 50.0):
+            assert timelapse._enrich_metadata_with_diagnostics(
+                str(metadata_path), str(image_path), LightMode.TRANSITION, lux=lux
             )
 
-            assert result is True
+        assert json.loads(metadata_path.read_text()) == {"ExposureTime": 5000}
+        with opener(tmp_path / sidecar_name, "rt") as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line)["diagnostics"]["smoothed_lux"] for line in lines] == [
+            100.0,
+            50.0,
+        ]
+
+    @pytest.mark.parametrize("use_orjson", [False, True])
+    def test_json_file_helpers_roundtrip(self, tmp_path, use_orjson):
+        """Test metadata JSON helpers with and without orjson."""
+        if use_orjson and not auto_timelapse.ORJSON_AVAILABLE:
+            pytest.skip("orjson not installed")
 
-            with open(metadata_path, "r") as f:
-                enriched = json.load(f)
+        path = tmp_path / "meta.json"
+        data = {"ExposureTime": 5000, "diagnostics": {"mode": "day", "lux": 12.5}}
 
-            assert "diagnostics" in enriched
-            assert enriched["diagnostics"]["transition_position"] == 0.5
-        finally:
-            import shutil
+        with patch.object(auto_timelapse, "ORJSON_AVAILABLE", use_orjson):
+            auto_timelapse._write_json_file(path, data)
+            assert auto_timelapse._read_json_file(path) == data
 
-            shutil.rmtree(temp_dir)
+        # Output stays plain indented JSON readable by the stdlib
+        assert json.loads(path.read_text()) == data
+        assert path.read_text().startswith('{\n  "ExposureTime"')
 
 
 class TestSymlinkCreation:
     """Test latest image symlink creation."""
 
-    def test_create_latest_symlink(self):
-        """Test symlink is created to latest image."""
-        import yaml
-
-        temp_dir = tempfile.mkdtemp()
-        try:
-            # Create config with symlink enabled
-            symlink_path = os.path.join(temp_dir, "latest.jpg")
-            config_path = os.path.join(temp_dir, "config.yml")
-            config = {
-                "output": {
-                    "directory": temp_dir,
-                    "symlink_latest": {
-                        "enabled": True,
-                        "path": symlink_path,
-                    },
-                },
-                "camera": {"resolution": {"width": 640, "height": 480}},
-            }
-            with open(config_path, "w") as f:
-                yaml.dump(config, f)
+    @staticmethod
+    def _make_timelapse(tmp_path):
+        """Build a timelapse from a minimal YAML config with the symlink enabled."""
+        symlink_path = str(tmp_path / "latest.jpg")
+        config_path = tmp_path / "config.yml"
+        config = {
+            "output": {
+                "directory": str(tmp_path),
+                "symlink_latest": {"enabled": True, "path": symlink_path},
+            },
+            "camera": {"resolution": {"width": 640, "height": 480}},
+        }
+        with open(config_path, "w") as f:
+            yaml.dump(config, f, Dumper=_Dumper)
 
-            timelapse = AdaptiveTimelapse(config_path)
+        return AdaptiveTimelapse(str(config_path)), symlink_path
 
-            # Create test image
-            image_path = os.path.join(temp_dir, "test_image.jpg")
-            with open(image_path, "wb") as f:
-                f.write(b"\xff\xd8\xff\xe0")
+    def test_create_latest_symlink(self, tmp_path):
+        """Test symlink is created to latest image."""
+        temp_dir = str(tmp_path)
+        timelapse, symlink_path = self._make_timelapse(tmp_path)
 
-            # Test symlink creation
-            timelapse._create_latest_symlink(image_path)
+        # Create test image
+        image_path = os.path.join(temp_dir, "test_image.jpg")
+        Path(image_path).write_bytes(b"\xff\xd8\xff\xe0")
+
+        # Test symlink creation
+        target = timelapse._create_latest_symlink(image_path)
 
-            assert os.path.islink(symlink_path)
-            assert os.path.realpath(symlink_path) == os.path.realpath(image_path)
-        finally:
-            import shutil
+        assert os.readlink(symlink_path) == image_path
 
-            shutil.rmtree(temp_dir)
+        # Target is returned and cached without resolving the link again
+        assert target == Path(image_path)
+        assert timelapse._last_symlink_target == target
 
-    def test_create_latest_symlink_updates_existing(self):
+    def test_create_latest_symlink_updates_existing(self, tmp_path):
         """Test symlink is updated when already exists."""
-        import yaml
-
-        temp_dir = tempfile.mkdtemp()
-        try:
-            symlink_path = os.path.join(temp_dir, "latest.jpg")
-            config_path = os.path.join(temp_dir, "config.yml")
-            config = {
-                "output": {
-                    "directory": temp_dir,
-                    "symlink_latest": {
-                        "enabled": True,
-                        "path": symlink_path,
-                    },
-                },
-                "camera": {"resolution": {"width": 640, "height": 480}},
-            }
-            with open(config_path, "w") as f:
-                yaml.dump(config, f)
+        temp_dir = str(tmp_path)
+        timelapse, symlink_path = self._make_timelapse(tmp_path)
+
+        # Create test images
+        image1 = os.path.join(temp_dir, "image1.jpg")
+        image2 = os.path.join(temp_dir, "image2.jpg")
+        for image in (image1, image2):
+            Path(image).write_bytes(b"\xff\xd8\xff\xe0")
+
+        # Create initial symlink
+        timelapse._create_latest_symlink(image1)
+        assert os.readlink(symlink_path) == image1
 
-            timelapse = AdaptiveTimelapse(config_path)
+        # Update symlink
+        timelapse._create_latest_symlink(image2)
+        assert os.readlink(symlink_path) == image2
 
-            # Create test images
-            image1 = os.path.join(temp_dir, "image1.jpg")
-            image2 = os.path.join(temp_dir, "image2.jpg")
-            with open(image1, "wb") as f:
-                f.write(b"\xff\xd8\xff\xe0")
-            with open(image2, "wb") as f:
-                f.write(b"\xff\xd8\xff\xe0")
+    def test_create_latest_symlink_replaces_atomically(self, tmp_path):
+        """Test symlink replaces stale files and leaves no temp link behind."""
+        temp_dir = str(tmp_path)
+        timelapse, symlink_path = self._make_timelapse(tmp_path)
 
-            # Create initial symlink
-            timelapse._create_latest_symlink(image1)
-            assert os.path.realpath(symlink_path) == os.path.realpath(image1)
+        image_path = os.path.join(temp_dir, "image.jpg")
+        Path(image_path).write_bytes(b"\xff\xd8\xff\xe0")
 
-            # Update symlink
-            timelapse._create_latest_symlink(image2)
-            assert os.path.realpath(symlink_path) == os.path.realpath(image2)
-        finally:
-            import shutil
+        # Regular file at the link path plus a leftover temp link from a crash
+        Path(symlink_path).write_bytes(b"stale")
+        os.symlink("/nonexistent", symlink_path + ".tmp")
 
-            shutil.rmtree(temp_dir)
+        timelapse._create_latest_symlink(image_path)
+
+        assert os.readlink(symlink_path) == image_path
+        assert not os.path.lexists(symlink_path + ".tmp")
+
+    def test_create_latest_symlink_relative_path_is_absolute(self, tmp_path, monkeypatch):
+        """Test a relative image path gets an absolute link target."""
+        timelapse, symlink_path = self._make_timelapse(tmp_path)
+        (tmp_path / "image.jpg").write_bytes(b"\xff\xd8\xff\xe0")
+        monkeypatch.chdir(tmp_path)
+
+        timelapse._create_latest_symlink("image.jpg")
+
+        assert os.readlink(symlink_path) == str(tmp_path / "image.jpg")
+
+    def test_create_latest_symlink_update_does_not_unlink(self, tmp_path):
+        """Test a normal update swaps the link by rename alone, without unlinking."""
+        timelapse, symlink_path = self._make_timelapse(tmp_path)
+        image_path = str(tmp_path / "image.jpg")
+        Path(image_path).write_bytes(b"\xff\xd8\xff\xe0")
+        timelapse._create_latest_symlink(image_path)
+
+        with patch.object(Path, "unlink") as mock_unlink:
+            timelapse._create_latest_symlink(image_path)
+
+        mock_unlink.assert_not_called()
+        assert os.readlink(symlink_path) == image_path
 
 
 class TestExposureCalculation:
     """Test exposure calculation from lux values."""
 
-    def test_calculate_target_exposure_from_lux_night(self, test_config_file):
+    def test_calculate_target_exposure_from_lux_night(self, timelapse):
         """Test exposure calculation for night conditions."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Very low lux should give max night exposure
         exposure = timelapse._calculate_target_exposure_from_lux(0.1)
 
         assert exposure > 10.0  # Should be long exposure
 
-    def test_calculate_target_exposure_from_lux_day(self, test_config_file):
+    @pytest.mark.parametrize(
+        "last_brightness,last_p95", [(None, None), (230.0, 252.0), (20.0, None)]
+    )
+    def test_calculate_target_exposure_batch_matches_scalar(
+        self, timelapse, last_brightness, last_p95
+    ):
+        """Batched lux lookups match the per-value path when ML is off."""
+        timelapse._ml_enabled = False
+        timelapse._brightness_correction_factor = 1.3
+        timelapse._last_brightness = last_brightness
+        timelapse._last_p95 = last_p95
+        lux_values = [0.001, 0.5, 3.8, 42.0, 800.0, 20000.0]
+
+        batch = timelapse._calculate_target_exposure_from_lux_batch(lux_values)
+
+        expected = [timelapse._calculate_target_exposure_from_lux(lux) for lux in lux_values]
+        assert batch.tolist() == pytest.approx(expected, rel=1e-12)
+
+    def test_calculate_target_exposure_from_lux_day(self, timelapse):
         """Test exposure calculation for day conditions."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # High lux should give short exposure
         exposure = timelapse._calculate_target_exposure_from_lux(10000.0)
 
         assert exposure < 0.1  # Should be short exposure
 
-    def test_calculate_target_exposure_from_lux_transition(self, test_config_file):
+    def test_calculate_target_exposure_from_lux_transition(self, timelapse):
         """Test exposure calculation for transition conditions."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Transition lux should give intermediate exposure
         exposure = timelapse._calculate_target_exposure_from_lux(50.0)
 
@@ -1517,12 +1676,10 @@ class TestExposureCalculation:
 class TestEVSafetyClamp:
     """Test EV safety clamp functionality (Holy Grail technique)."""
 
-    def test_ev_clamp_disabled_in_config(self, test_config_file):
+    def test_ev_clamp_disabled_in_config(self, timelapse):
         """Test EV clamp is bypassed when disabled in config."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Explicitly disable EV clamp
-        timelapse.config["adaptive_timelapse"]["transition_mode"]["ev_safety_clamp_enabled"] = False
+        timelapse._ev_clamp_enabled = False
 
         # Seed with short exposure (simulating bright auto-exposure reading)
         timelapse._transition_seeded = True
@@ -1541,12 +1698,19 @@ class TestEVSafetyClamp:
         assert result_exposure == 20.0
         assert result_gain == 6.0
 
-    def test_ev_clamp_enabled_within_threshold(self, test_config_file):
-        """Test EV clamp allows small differences (<5%)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
+    def test_ev_clamp_enabled_read_from_config(self, timelapse):
+        """Test ev_safety_clamp_enabled is read from transition_mode config."""
+        assert timelapse._ev_clamp_enabled is True
+
+        config = _make_test_config()
+        config["adaptive_timelapse"]["transition_mode"]["ev_safety_clamp_enabled"] = False
+
+        assert AdaptiveTimelapse.from_config_dict(config)._ev_clamp_enabled is False
 
+    def test_ev_clamp_enabled_within_threshold(self, timelapse):
+        """Test EV clamp allows small differences (<5%)."""
         # Enable EV clamp (default)
-        timelapse.config["adaptive_timelapse"]["transition_mode"]["ev_safety_clamp_enabled"] = True
+        timelapse._ev_clamp_enabled = True
 
         timelapse._transition_seeded = True
         timelapse._seed_exposure = 1.0
@@ -1566,12 +1730,27 @@ class TestEVSafetyClamp:
         assert result_exposure == 1.02
         assert result_gain == 2.0
 
-    def test_ev_clamp_enabled_exceeds_threshold(self, test_config_file):
-        """Test EV clamp corrects large differences (>5%)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
+    @pytest.mark.parametrize(
+        "target_exposure,clamped",
+        [(0.96, False), (1.04, False), (0.94, True), (1.06, True)],
+    )
+    def test_ev_clamp_threshold_is_symmetric(self, timelapse, target_exposure, clamped):
+        """Test EV clamp triggers just outside ±5% in either direction."""
+        timelapse._ev_clamp_enabled = True
+        timelapse._transition_seeded = True
+        timelapse._seed_exposure = 1.0
+        timelapse._seed_gain = 2.0
+
+        result_exposure, result_gain = timelapse._apply_ev_safety_clamp(target_exposure, 2.0)
 
+        assert result_exposure == (1.0 if clamped else target_exposure)
+        assert result_gain == 2.0
+        assert timelapse._ev_clamp_applied is clamped
+
+    def test_ev_clamp_enabled_exceeds_threshold(self, timelapse):
+        """Test EV clamp corrects large differences (>5%)."""
         # Enable EV clamp
-        timelapse.config["adaptive_timelapse"]["transition_mode"]["ev_safety_clamp_enabled"] = True
+        timelapse._ev_clamp_enabled = True
 
         timelapse._transition_seeded = True
         timelapse._seed_exposure = 0.01  # 10ms
@@ -1596,10 +1775,8 @@ class TestEVSafetyClamp:
         assert abs(result_exposure - expected_clamped) < 0.0001
         assert result_gain == 6.0  # Gain unchanged
 
-    def test_ev_clamp_not_applied_before_seeding(self, test_config_file):
+    def test_ev_clamp_not_applied_before_seeding(self, timelapse):
         """Test EV clamp is not applied before transition is seeded."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Not seeded yet
         timelapse._transition_seeded = False
         timelapse._seed_exposure = None
@@ -1616,7 +1793,7 @@ class TestEVSafetyClamp:
         assert result_exposure == 20.0
         assert result_gain == 6.0
 
-    def test_ev_clamp_street_lamp_scenario(self, test_config_file):
+    def test_ev_clamp_street_lamp_scenario(self, timelapse):
         """Test EV clamp causes dark images when street lamp fools auto-exposure.
 
         This is the actual bug scenario: a bright street lamp in frame causes
@@ -1624,8 +1801,6 @@ class TestEVSafetyClamp:
         night mode, the EV clamp forces exposures to match this incorrect seed,
         resulting in severely underexposed images (330ms instead of 20s).
         """
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Simulate street lamp fooling auto-exposure
         # Auto-exposure sees bright lamp and uses short exposure
         timelapse._transition_seeded = True
@@ -1639,7 +1814,7 @@ class TestEVSafetyClamp:
         # Proposed EV = 120.0 - HUGE difference!
 
         # With EV clamp ENABLED - this causes the bug
-        timelapse.config["adaptive_timelapse"]["transition_mode"]["ev_safety_clamp_enabled"] = True
+        timelapse._ev_clamp_enabled = True
         clamped_exp, clamped_gain = timelapse._apply_ev_safety_clamp(target_exposure, target_gain)
 
         # Clamped exposure will be way too short!
@@ -1647,7 +1822,7 @@ class TestEVSafetyClamp:
         assert clamped_exp < 0.001  # Less than 1ms - severely underexposed!
 
         # With EV clamp DISABLED - correct behavior
-        timelapse.config["adaptive_timelapse"]["transition_mode"]["ev_safety_clamp_enabled"] = False
+        timelapse._ev_clamp_enabled = False
         unclamped_exp, unclamped_gain = timelapse._apply_ev_safety_clamp(
             target_exposure, target_gain
         )
@@ -1656,7 +1831,7 @@ class TestEVSafetyClamp:
         assert unclamped_exp == 20.0
         assert unclamped_gain == 6.0
 
-    def test_ev_clamp_applies_only_once(self, test_config_file):
+    def test_ev_clamp_applies_only_once(self, timelapse):
         """Test EV clamp only applies on first frame, not every frame.
 
         This was a critical bug: the clamp was applying on EVERY frame,
@@ -1664,10 +1839,8 @@ class TestEVSafetyClamp:
         an _ev_clamp_applied flag that ensures the clamp only runs once
         per transition cycle.
         """
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Enable EV clamp
-        timelapse.config["adaptive_timelapse"]["transition_mode"]["ev_safety_clamp_enabled"] = True
+        timelapse._ev_clamp_enabled = True
 
         # Seed with short exposure (day mode values)
         timelapse._transition_seeded = True
@@ -1691,14 +1864,12 @@ class TestEVSafetyClamp:
         assert second_exp == target_exposure
         assert second_gain == target_gain
 
-    def test_ev_clamp_flag_resets_on_day_mode(self, test_config_file):
+    def test_ev_clamp_flag_resets_on_day_mode(self, timelapse):
         """Test _ev_clamp_applied flag resets when returning to day mode.
 
         When the camera returns to day mode, the seed state should reset
         so the clamp can apply again on the next transition.
         """
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Simulate clamp was applied during previous transition
         timelapse._transition_seeded = True
         timelapse._ev_clamp_applied = True
@@ -1718,10 +1889,8 @@ class TestEVSafetyClamp:
 class TestSequentialRamping:
     """Test sequential ramping (shutter-first, then gain) for noise reduction."""
 
-    def test_sequential_ramping_phase1_shutter_priority(self, test_config_file):
+    def test_sequential_ramping_phase1_shutter_priority(self, timelapse):
         """Test Phase 1: shutter increases while gain stays at minimum."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Setup for sequential ramping
         timelapse._transition_seeded = True
         timelapse._seed_exposure = 0.01  # 10ms starting point
@@ -1735,10 +1904,8 @@ class TestSequentialRamping:
         assert gain <= 2.0  # Should be close to minimum
         assert exposure > 0.01  # Should be longer than seed
 
-    def test_sequential_ramping_phase2_gain_priority(self, test_config_file):
+    def test_sequential_ramping_phase2_gain_priority(self, timelapse):
         """Test Phase 2: gain increases after shutter maxed out."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Setup
         timelapse._transition_seeded = True
         timelapse._seed_exposure = 0.01
@@ -1751,10 +1918,8 @@ class TestSequentialRamping:
         assert exposure >= 10.0  # Should be at or near max exposure
         assert gain > 1.0  # Gain should be increasing
 
-    def test_sequential_ramping_reduces_noise(self, test_config_file):
+    def test_sequential_ramping_reduces_noise(self, timelapse):
         """Test that sequential ramping keeps gain lower for same brightness."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._transition_seeded = True
         timelapse._seed_exposure = 0.01
         timelapse._seed_gain = 1.0
@@ -1772,18 +1937,44 @@ class TestSequentialRamping:
         # Sequential should give us lower gain for same EV
         assert gain < 4.0  # Should prioritize shutter over gain
 
+    def test_sequential_ramping_endpoints(self, timelapse):
+        """Ramp starts at the seed and ends at the night limits."""
+        timelapse._transition_seeded = True
+        timelapse._seed_exposure = 0.01
+        timelapse._seed_gain = 1.0
+        night = timelapse._night_config
+
+        exposure, gain = timelapse._calculate_sequential_ramping(lux=100.0, position=1.0)
+        assert exposure == pytest.approx(0.01)
+        assert gain == pytest.approx(1.0)
+
+        exposure, gain = timelapse._calculate_sequential_ramping(lux=0.0, position=0.0)
+        assert exposure == pytest.approx(night["max_exposure_time"])
+        assert gain == pytest.approx(night["analogue_gain"])
+
+    def test_sequential_ramping_follows_new_seed(self, timelapse):
+        """Cached breakpoints are keyed on the seed, so a re-seed takes effect."""
+        timelapse._transition_seeded = True
+        timelapse._seed_gain = 1.0
+
+        timelapse._seed_exposure = 0.01
+        first, _ = timelapse._calculate_sequential_ramping(lux=50.0, position=1.0)
+        timelapse._seed_exposure = 0.02
+        second, _ = timelapse._calculate_sequential_ramping(lux=50.0, position=1.0)
+
+        assert first == pytest.approx(0.01)
+        assert second == pytest.approx(0.02)
+
 
 class TestBrightPointLightEdgeCases:
     """Test edge cases involving bright point light sources (street lamps, etc.)."""
 
-    def test_lux_calculation_with_bright_spot(self, test_config_file):
+    def test_lux_calculation_with_bright_spot(self, timelapse):
         """Test that a bright spot doesn't overly influence lux calculation.
 
         Note: This tests the overall behavior - the actual lux calculation
         happens in the test shot processing.
         """
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Simulate test shot metadata with short exposure (bright spot present)
         # This is what happens when a street lamp is in frame
         test_metadata = {
@@ -1798,10 +1989,8 @@ class TestBrightPointLightEdgeCases:
         # Verify the timelapse object can handle this scenario
         assert timelapse is not None
 
-    def test_transition_with_inconsistent_light_readings(self, test_config_file):
+    def test_transition_with_inconsistent_light_readings(self, timelapse):
         """Test handling of inconsistent light readings during transition."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Initialize smoothing state
         timelapse._smoothed_lux = 5.0  # Previous reading was dark
 
@@ -1815,10 +2004,8 @@ class TestBrightPointLightEdgeCases:
         assert smoothed < spike_lux
         assert smoothed > 5.0  # But still increase somewhat
 
-    def test_hysteresis_prevents_mode_flapping(self, test_config_file):
+    def test_hysteresis_prevents_mode_flapping(self, timelapse):
         """Test hysteresis prevents rapid mode changes from bright spots."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Initialize in night mode
         timelapse._last_mode = LightMode.NIGHT
         timelapse._mode_hold_count = 0
@@ -1847,9 +2034,6 @@ class TestMainFunction:
             ["auto_timelapse.py", "--config", "/nonexistent/config.yml"],
         )
 
-        # Import and run main
-        from src.auto_timelapse import main
-
         result = main()
         assert result == 1
 
@@ -1857,8 +2041,6 @@ class TestMainFunction:
         """Test main with --help flag."""
         monkeypatch.setattr("sys.argv", ["auto_timelapse.py", "--help"])
 
-        from src.auto_timelapse import main
-
         with pytest.raises(SystemExit) as exc_info:
             main()
 
@@ -1869,8 +2051,8 @@ class TestMLv2Integration:
     """Test ML v2 integration in AdaptiveTimelapse."""
 
     @pytest.fixture
-    def ml_enabled_config_file(self):
-        """Create a config file with ML v2 enabled."""
+    def ml_enabled_config(self, tmp_path):
+        """Config with ML v2 enabled and its database under tmp_path."""
         config_data = {
             "camera": {
                 "resolution": {"width": 1280, "height": 720},
@@ -1892,7 +2074,7 @@ class TestMLv2Integration:
             "overlay": {"enabled": False},
             "database": {
                 "enabled": True,
-                "path": "test_data/test_timelapse.db",
+                "path": str(tmp_path / "test_timelapse.db"),
             },
             "adaptive_timelapse": {
                 "enabled": True,
@@ -1908,35 +2090,33 @@ class TestMLv2Integration:
             },
         }
 
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
-            yaml.dump(config_data, f)
-            config_path = f.name
-
-        yield config_path
-        os.unlink(config_path)
+        return config_data
 
-    def test_ml_v2_disabled_by_default(self, test_config_file):
+    def test_ml_v2_disabled_by_default(self, timelapse):
         """Test ML v2 is disabled when not configured."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         assert timelapse._ml_enabled is False
         assert timelapse._ml_predictor is None
 
-    def test_ml_v2_requires_database(self, ml_enabled_config_file):
-        """Test ML v2 initializes when database is enabled."""
-        # Create the test database directory
-        os.makedirs("test_data", exist_ok=True)
+    def test_ml_v2_module_not_loaded_when_disabled(self, readonly_config_file, monkeypatch):
+        """The ML predictor module is only imported when ML is enabled."""
+        monkeypatch.delitem(sys.modules, "src.ml_exposure_v2", raising=False)
+
+        AdaptiveTimelapse(readonly_config_file)
+
+        assert "src.ml_exposure_v2" not in sys.modules
 
-        try:
-            timelapse = AdaptiveTimelapse(ml_enabled_config_file)
-            # ML should attempt to initialize (may fail if no data, but should try)
-            # The key test is that it doesn't crash and handles gracefully
-            assert timelapse is not None
-        finally:
-            # Cleanup
-            import shutil
+    def test_ml_v2_loaded_when_enabled(self, ml_enabled_config):
+        """Enabling ML with a database imports and creates the predictor."""
+        timelapse = AdaptiveTimelapse.from_config_dict(ml_enabled_config)
+        assert timelapse._ml_enabled is True
+        assert timelapse._ml_predictor is not None
 
-            if os.path.exists("test_data"):
-                shutil.rmtree("test_data")
+    def test_ml_v2_requires_database(self, ml_enabled_config):
+        """Test ML v2 initializes when database is enabled."""
+        timelapse = AdaptiveTimelapse.from_config_dict(ml_enabled_config)
+        # ML should attempt to initialize (may fail if no data, but should try)
+        # The key test is that it doesn't crash and handles gracefully
+        assert timelapse is not None
 
     def test_ml_v2_disabled_without_database(self):
         """Test ML v2 is disabled when database is disabled."""
@@ -1963,30 +2143,62 @@ class TestMLv2Integration:
             },
         }
 
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
-            yaml.dump(config_data, f)
-            config_path = f.name
-
-        try:
-            timelapse = AdaptiveTimelapse(config_path)
-            # ML should be disabled because database is disabled
-            assert timelapse._ml_enabled is False
-        finally:
-            os.unlink(config_path)
+        timelapse = AdaptiveTimelapse.from_config_dict(config_data)
+        # ML should be disabled because database is disabled
+        assert timelapse._ml_enabled is False
 
 
 class TestSmoothedEmergencyFactor:
     """Test smoothed emergency brightness factor to prevent oscillation."""
 
-    def test_emergency_factor_starts_at_one(self, test_config_file):
+    def test_emergency_factor_starts_at_one(self, timelapse):
         """Test that smoothed emergency factor starts at 1.0 (no correction)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         assert timelapse._smoothed_emergency_factor == 1.0
 
-    def test_emergency_factor_reduces_for_overexposure(self, test_config_file):
-        """Test factor decreases when brightness is above emergency threshold."""
-        timelapse = AdaptiveTimelapse(test_config_file)
+    @pytest.mark.parametrize(
+        "brightness,expected_factor",
+        [
+            (0.0, 4.0),
+            (39.9, 4.0),
+            (40.0, 2.0),
+            (59.9, 2.0),
+            (60.0, 1.2),
+            (79.9, 1.2),
+            (80.0, 1.0),
+            (160.0, 1.0),
+            (160.1, 0.85),
+            (180.0, 0.85),
+            (180.1, 0.7),
+            (255.0, 0.7),
+            (float("nan"), 1.0),  # No data: no zone, target stays 1.0
+        ],
+    )
+    def test_emergency_zone_boundaries(self, timelapse, brightness, expected_factor):
+        """Test zone thresholds are strict: low zones below, high zones above."""
+        timelapse._emergency_factor_speed = 0.5  # Full step towards the target in one frame
+
+        assert timelapse._get_emergency_brightness_factor(brightness) == pytest.approx(
+            expected_factor
+        )
 
+    def test_emergency_factor_batch_matches_scalar(self, timelapse):
+        """Test the batch path matches frame-by-frame calls, including missing frames."""
+        scalar = copy.deepcopy(timelapse)
+        rng = random.Random(7)
+        frames = [rng.uniform(0, 255) for _ in range(60)] + [None, None, 30.0, 250.0, 180.0]
+        # Missing data (None or NaN) in the middle of a correction, in both forms
+        frames += [20.0, float("nan"), None, float("nan"), 200.0, float("nan")]
+
+        batch_result = timelapse._get_emergency_brightness_factor_batch(frames)
+
+        expected = [scalar._get_emergency_brightness_factor(b) for b in frames]
+        assert batch_result.tolist() == pytest.approx(expected, rel=1e-12)
+        assert timelapse._smoothed_emergency_factor == pytest.approx(
+            scalar._smoothed_emergency_factor, rel=1e-12
+        )
+
+    def test_emergency_factor_reduces_for_overexposure(self, timelapse):
+        """Test factor decreases when brightness is above emergency threshold."""
         # Simulate several frames with severe overexposure (brightness > 180)
         for _ in range(10):
             factor = timelapse._get_emergency_brightness_factor(200)
@@ -1995,10 +2207,8 @@ class TestSmoothedEmergencyFactor:
         assert factor < 1.0
         assert factor < 0.9  # Should have moved significantly towards 0.7
 
-    def test_emergency_factor_increases_for_underexposure(self, test_config_file):
+    def test_emergency_factor_increases_for_underexposure(self, timelapse):
         """Test factor increases when brightness is below emergency threshold."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Simulate several frames with critical underexposure (brightness < 40)
         for _ in range(15):
             factor = timelapse._get_emergency_brightness_factor(30)
@@ -2007,10 +2217,8 @@ class TestSmoothedEmergencyFactor:
         assert factor > 1.0
         assert factor > 3.0  # Should have moved significantly towards 4.0
 
-    def test_emergency_factor_stays_stable_in_normal_range(self, test_config_file):
+    def test_emergency_factor_stays_stable_in_normal_range(self, timelapse):
         """Test factor stays at 1.0 when brightness is in normal range."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Simulate frames with normal brightness (around target 120)
         for _ in range(10):
             factor = timelapse._get_emergency_brightness_factor(120)
@@ -2018,10 +2226,8 @@ class TestSmoothedEmergencyFactor:
         # Factor should stay at or very close to 1.0
         assert 0.98 < factor < 1.02
 
-    def test_emergency_factor_smoothing_prevents_oscillation(self, test_config_file):
+    def test_emergency_factor_smoothing_prevents_oscillation(self, timelapse):
         """Test that alternating brightness values don't cause factor oscillation."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Simulate the oscillation pattern: alternating above/below threshold
         factors = []
         for i in range(20):
@@ -2036,10 +2242,8 @@ class TestSmoothedEmergencyFactor:
             # Maximum change per frame should be limited by smoothing
             assert diff < 0.15, f"Factor jumped too much: {factors[i-1]:.3f} -> {factors[i]:.3f}"
 
-    def test_emergency_factor_applies_faster_when_worsening(self, test_config_file):
+    def test_emergency_factor_applies_faster_when_worsening(self, timelapse):
         """Test that corrections apply faster when brightness is getting worse."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # First, apply overexposure correction for 5 frames
         for _ in range(5):
             timelapse._get_emergency_brightness_factor(200)
@@ -2063,10 +2267,8 @@ class TestSmoothedEmergencyFactor:
         # Correction should be faster (larger change) than relaxation
         assert correction_amount > relaxation_amount * 0.5
 
-    def test_emergency_factor_none_brightness_decays_towards_1(self, test_config_file):
+    def test_emergency_factor_none_brightness_decays_towards_1(self, timelapse):
         """Test that None brightness decays factor towards 1.0."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Set a non-default factor (below 1.0)
         timelapse._smoothed_emergency_factor = 0.85
 
@@ -2091,8 +2293,6 @@ class TestSustainedDriftCorrector:
 
     def test_drift_corrector_init(self):
         """Test drift corrector initialization."""
-        from src.auto_timelapse import SustainedDriftCorrector
-
         corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
         assert corrector._threshold_frames == 3
         assert corrector._min_error == 20.0
@@ -2100,8 +2300,6 @@ class TestSustainedDriftCorrector:
 
     def test_drift_corrector_no_correction_initially(self):
         """Test no correction when not enough frames."""
-        from src.auto_timelapse import SustainedDriftCorrector
-
         corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
 
         # Only 1-2 frames
@@ -2110,8 +2308,6 @@ class TestSustainedDriftCorrector:
 
     def test_drift_corrector_triggers_on_sustained_low(self):
         """Test correction triggers after sustained underexposure."""
-        from src.auto_timelapse import SustainedDriftCorrector
-
         corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
 
         # 3 consecutive frames all too dark (error < -20)
@@ -2124,8 +2320,6 @@ class TestSustainedDriftCorrector:
 
     def test_drift_corrector_triggers_on_sustained_high(self):
         """Test correction triggers after sustained overexposure."""
-        from src.auto_timelapse import SustainedDriftCorrector
-
         corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
 
         # 3 consecutive frames all too bright (error > +20)
@@ -2138,8 +2332,6 @@ class TestSustainedDriftCorrector:
 
     def test_drift_corrector_no_trigger_on_mixed_errors(self):
         """Test no correction when errors are mixed direction."""
-        from src.auto_timelapse import SustainedDriftCorrector
-
         corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
 
         # Mixed: dark, bright, dark
@@ -2152,8 +2344,6 @@ class TestSustainedDriftCorrector:
 
     def test_drift_corrector_decays_towards_neutral(self):
         """Test correction decays when pattern breaks."""
-        from src.auto_timelapse import SustainedDriftCorrector
-
         corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
 
         # Trigger a correction
@@ -2172,8 +2362,6 @@ class TestSustainedDriftCorrector:
 
     def test_drift_corrector_reset(self):
         """Test reset clears history."""
-        from src.auto_timelapse import SustainedDriftCorrector
-
         corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
 
         # Build up some history
@@ -2187,10 +2375,41 @@ class TestSustainedDriftCorrector:
         assert len(corrector._error_history) == 0
         assert corrector._last_correction == 1.0
 
+    def test_drift_corrector_uses_only_recent_frames(self):
+        """Test only the last threshold_frames errors decide, and history stays bounded."""
+        corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
+
+        # One in-range frame followed by three dark frames still triggers correction
+        for brightness in (120.0, 60.0, 60.0):
+            assert corrector.update(brightness) == 1.0
+        correction = corrector.update(60.0)
+
+        assert correction == pytest.approx(1.15)
+        assert list(corrector._error_history) == [-60.0, -60.0, -60.0]
+
+    def test_drift_corrector_counts_track_history(self):
+        """The above/below counts always agree with the buffered errors."""
+        rng = random.Random(7)
+        corrector = SustainedDriftCorrector(threshold_frames=5, min_error=20.0)
+
+        for step in range(300):
+            if step == 150:
+                corrector.reset()
+            corrector.update(rng.uniform(40.0, 200.0))
+            history = list(corrector._error_history)
+            assert corrector._n_below == sum(e < -20.0 for e in history)
+            assert corrector._n_above == sum(e > 20.0 for e in history)
+
+    def test_drift_corrector_has_no_instance_dict(self):
+        """The corrector uses __slots__, so stray attributes are rejected."""
+        corrector = SustainedDriftCorrector()
+
+        assert not hasattr(corrector, "__dict__")
+        with pytest.raises(AttributeError):
+            corrector.history = []
+
     def test_drift_corrector_clamped_range(self):
         """Test correction is clamped to 0.5-2.0 range."""
-        from src.auto_timelapse import SustainedDriftCorrector
-
         corrector = SustainedDriftCorrector(threshold_frames=3, min_error=20.0)
 
         # Extreme underexposure
@@ -2210,10 +2429,8 @@ class TestSustainedDriftCorrector:
 class TestBrightnessAdjustedTrust:
     """Tests for get_brightness_adjusted_trust method."""
 
-    def test_brightness_adjusted_trust_normal_range(self, test_config_file):
+    def test_brightness_adjusted_trust_normal_range(self, timelapse):
         """Test full trust in normal brightness range."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Normal brightness (70-170) should return full base trust
         trust = timelapse.get_brightness_adjusted_trust(120.0, 0.7)
         assert trust == 0.7
@@ -2224,10 +2441,8 @@ class TestBrightnessAdjustedTrust:
         trust = timelapse.get_brightness_adjusted_trust(150.0, 0.9)
         assert trust == 0.9
 
-    def test_brightness_adjusted_trust_severe_low(self, test_config_file):
+    def test_brightness_adjusted_trust_severe_low(self, timelapse):
         """Test zero trust for severe underexposure."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Below 50: force formula (trust = 0)
         trust = timelapse.get_brightness_adjusted_trust(40.0, 0.7)
         assert trust == 0.0
@@ -2235,10 +2450,8 @@ class TestBrightnessAdjustedTrust:
         trust = timelapse.get_brightness_adjusted_trust(20.0, 0.9)
         assert trust == 0.0
 
-    def test_brightness_adjusted_trust_severe_high(self, test_config_file):
+    def test_brightness_adjusted_trust_severe_high(self, timelapse):
         """Test zero trust for severe overexposure."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Above 200: force formula (trust = 0)
         trust = timelapse.get_brightness_adjusted_trust(210.0, 0.7)
         assert trust == 0.0
@@ -2246,10 +2459,8 @@ class TestBrightnessAdjustedTrust:
         trust = timelapse.get_brightness_adjusted_trust(250.0, 0.9)
         assert trust == 0.0
 
-    def test_brightness_adjusted_trust_warning_low_ramp(self, test_config_file):
+    def test_brightness_adjusted_trust_warning_low_ramp(self, timelapse):
         """Test graduated reduction in low warning zone."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Between 50-70: ramp from 0% to 100%
         trust_at_50 = timelapse.get_brightness_adjusted_trust(50.0, 0.8)
         trust_at_60 = timelapse.get_brightness_adjusted_trust(60.0, 0.8)
@@ -2260,10 +2471,8 @@ class TestBrightnessAdjustedTrust:
         # At 70, should be full trust
         assert abs(trust_at_70 - 0.8) < 0.01
 
-    def test_brightness_adjusted_trust_warning_high_ramp(self, test_config_file):
+    def test_brightness_adjusted_trust_warning_high_ramp(self, timelapse):
         """Test graduated reduction in high warning zone."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Between 170-200: ramp from 100% to 0%
         trust_at_170 = timelapse.get_brightness_adjusted_trust(170.0, 0.8)
         trust_at_185 = timelapse.get_brightness_adjusted_trust(185.0, 0.8)
@@ -2276,77 +2485,91 @@ class TestBrightnessAdjustedTrust:
         # At 200, should be zero
         assert trust_at_200 == 0.0
 
-    def test_brightness_adjusted_trust_none_brightness(self, test_config_file):
-        """Test None brightness returns base trust unchanged."""
-        timelapse = AdaptiveTimelapse(test_config_file)
+    @pytest.mark.parametrize(
+        "brightness,expected", [(69.5, 0.78), (170.0, 0.8), (170.3, 0.792), (199.7, 0.008)]
+    )
+    def test_brightness_adjusted_trust_fractional_brightness(self, timelapse, brightness, expected):
+        """Test ramps are continuous for fractional mean brightness values."""
+        assert timelapse.get_brightness_adjusted_trust(brightness, 0.8) == pytest.approx(expected)
 
+    def test_brightness_adjusted_trust_none_brightness(self, timelapse):
+        """Test None brightness returns base trust unchanged."""
         trust = timelapse.get_brightness_adjusted_trust(None, 0.7)
         assert trust == 0.7
 
+    def test_brightness_adjusted_trust_nan_brightness(self, timelapse):
+        """Test NaN brightness returns base trust unchanged, like None."""
+        trust = timelapse.get_brightness_adjusted_trust(float("nan"), 0.8)
+        assert trust == 0.8
+
 
 class TestLuxStabilityTrust:
     """Tests for get_lux_stability_trust method."""
 
-    def test_lux_stability_stable_light(self, test_config_file):
+    def test_lux_stability_stable_light(self, timelapse):
         """Test full trust when light is stable."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Small lux change over 30 seconds - stable
         trust = timelapse.get_lux_stability_trust(100.0, 95.0, 30.0)
         assert trust == 1.0
 
-    def test_lux_stability_rapid_change(self, test_config_file):
+    def test_lux_stability_rapid_change(self, timelapse):
         """Test reduced trust during rapid light changes."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Large lux change (10x) over 30 seconds - rapid
         trust = timelapse.get_lux_stability_trust(1000.0, 100.0, 30.0)
         assert trust < 1.0
 
-    def test_lux_stability_no_previous_lux(self, test_config_file):
+    def test_lux_stability_no_previous_lux(self, timelapse):
         """Test full trust when no previous lux available."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         trust = timelapse.get_lux_stability_trust(100.0, None, 30.0)
         assert trust == 1.0
 
-    def test_lux_stability_zero_previous_lux(self, test_config_file):
+    def test_lux_stability_zero_previous_lux(self, timelapse):
         """Test full trust when previous lux is zero."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         trust = timelapse.get_lux_stability_trust(100.0, 0.0, 30.0)
         assert trust == 1.0
 
-    def test_lux_stability_zero_elapsed(self, test_config_file):
+    def test_lux_stability_zero_elapsed(self, timelapse):
         """Test full trust when elapsed time is zero."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         trust = timelapse.get_lux_stability_trust(100.0, 50.0, 0.0)
         assert trust == 1.0
 
-    def test_lux_stability_never_below_half(self, test_config_file):
+    def test_lux_stability_never_below_half(self, timelapse):
         """Test trust never goes below 0.5 even for extreme changes."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         # Extremely rapid change - 100x in 10 seconds
         trust = timelapse.get_lux_stability_trust(10000.0, 100.0, 10.0)
         assert trust >= 0.5
 
+    @pytest.mark.parametrize(
+        "current_lux, previous_lux, elapsed, expected",
+        [
+            (100.0, 100.0, 30.0, 1.0),  # No change
+            (0.0, 100.0, 30.0, 1.0),  # Current lux unusable
+            (-5.0, 100.0, 30.0, 1.0),
+            (200.0, 100.0, 30.0, 1.0 - (0.602 - 0.3) * 0.7),  # ~0.6 log-lux/min
+            (50.0, 100.0, 30.0, 1.0 - (0.602 - 0.3) * 0.7),  # Falling light counts too
+            (1000.0, 100.0, 30.0, 0.5),  # 2 log-lux/min is capped
+            (float("nan"), 100.0, 30.0, 1.0),  # Unusable reading keeps full trust
+            (100.0, float("nan"), 30.0, 1.0),
+        ],
+    )
+    def test_lux_stability_trust_values(
+        self, timelapse, current_lux, previous_lux, elapsed, expected
+    ):
+        """Trust falls linearly above 0.3 log-lux/minute, floored at 0.5."""
+        trust = timelapse.get_lux_stability_trust(current_lux, previous_lux, elapsed)
+        assert trust == pytest.approx(expected, abs=1e-3)
+
 
 class TestDriftCorrectorIntegration:
     """Tests for drift corrector integration in AdaptiveTimelapse."""
 
-    def test_drift_corrector_initialized(self, test_config_file):
+    def test_drift_corrector_initialized(self, timelapse):
         """Test drift corrector is initialized on startup."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         assert hasattr(timelapse, "_drift_corrector")
         assert timelapse._drift_corrector is not None
 
-    def test_lux_tracking_initialized(self, test_config_file):
+    def test_lux_tracking_initialized(self, timelapse):
         """Test lux tracking variables are initialized."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         assert hasattr(timelapse, "_previous_lux_for_stability")
         assert hasattr(timelapse, "_last_lux_timestamp")
 
@@ -2354,77 +2577,49 @@ class TestDriftCorrectorIntegration:
 class TestP95HighlightProtection:
     """Tests for proactive p95-based highlight protection."""
 
-    def test_p95_factor_safe_range(self, test_config_file):
-        """Test no adjustment when p95 is in safe range (<200)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        # Safe range - no adjustment
-        assert timelapse.get_p95_highlight_factor(100.0) == 1.0
-        assert timelapse.get_p95_highlight_factor(150.0) == 1.0
-        assert timelapse.get_p95_highlight_factor(199.0) == 1.0
-
-    def test_p95_factor_warning_range(self, test_config_file):
-        """Test gentle reduction in warning range (200-220)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        # At 200 - just entering warning
-        factor_200 = timelapse.get_p95_highlight_factor(200.0)
-        assert factor_200 == 1.0
-
-        # At 210 - mid warning (should be ~0.975)
-        factor_210 = timelapse.get_p95_highlight_factor(210.0)
-        assert 0.97 < factor_210 < 0.98
-
-        # At 220 - end of warning (should be ~0.95)
-        factor_220 = timelapse.get_p95_highlight_factor(220.0)
-        assert 0.94 < factor_220 < 0.96
-
-    def test_p95_factor_critical_range(self, test_config_file):
-        """Test moderate reduction in critical range (220-240)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        # At 230 - mid critical (should be ~0.90)
-        factor_230 = timelapse.get_p95_highlight_factor(230.0)
-        assert 0.88 < factor_230 < 0.92
-
-        # At 240 - end of critical (should be ~0.85)
-        factor_240 = timelapse.get_p95_highlight_factor(240.0)
-        assert 0.84 < factor_240 < 0.86
-
-    def test_p95_factor_emergency_range(self, test_config_file):
-        """Test aggressive reduction for imminent clipping (>240)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        # At 245 - emergency (should be ~0.82)
-        factor_245 = timelapse.get_p95_highlight_factor(245.0)
-        assert 0.78 < factor_245 < 0.84
-
-        # At 250 - severe emergency (should be ~0.75)
-        factor_250 = timelapse.get_p95_highlight_factor(250.0)
-        assert 0.74 <= factor_250 <= 0.80
-
-        # At 255 - maximum (should be ~0.70)
-        factor_255 = timelapse.get_p95_highlight_factor(255.0)
-        assert factor_255 >= 0.70
-
-    def test_p95_factor_none_returns_1(self, test_config_file):
-        """Test that None p95 returns factor of 1.0."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        assert timelapse.get_p95_highlight_factor(None) == 1.0
-
-    def test_p95_factor_never_below_0_7(self, test_config_file):
-        """Test factor never goes below 0.70."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
-        # Even for impossible values
-        assert timelapse.get_p95_highlight_factor(255.0) >= 0.70
-        assert timelapse.get_p95_highlight_factor(300.0) >= 0.70
-
-    def test_p95_tracking_initialized(self, test_config_file):
+    @pytest.mark.parametrize("p95", [None, float("nan"), 100.0, 150.0, 199.0, 200.0])
+    def test_p95_factor_no_adjustment(self, timelapse, p95):
+        """No adjustment without p95 or while highlights have headroom (<=200)."""
+        assert timelapse.get_p95_highlight_factor(p95) == 1.0
+
+    @pytest.mark.parametrize(
+        "p95, lo, hi",
+        [
+            (210.0, 0.97, 0.98),  # Warning zone: gentle reduction
+            (220.0, 0.94, 0.96),
+            (230.0, 0.88, 0.92),  # Critical zone: moderate reduction
+            (240.0, 0.84, 0.86),
+            (245.0, 0.78, 0.84),  # Emergency zone: aggressive reduction
+            (250.0, 0.74, 0.80),
+            (255.0, 0.70, 0.71),  # Floor at 0.70, even for impossible values
+            (300.0, 0.70, 0.71),
+        ],
+    )
+    def test_p95_factor_reduction(self, timelapse, p95, lo, hi):
+        """Reduction grows with p95 and never goes below 0.70."""
+        assert lo <= timelapse.get_p95_highlight_factor(p95) <= hi
+
+    @pytest.mark.parametrize(
+        "p95, expected",
+        [(200.0, 1.0), (210.0, 0.975), (220.0, 0.95), (230.0, 0.90), (240.0, 0.85), (250.0, 0.75)],
+    )
+    def test_p95_factor_continuous_at_zone_edges(self, timelapse, p95, expected):
+        """Each zone picks up where the previous one ended."""
+        assert timelapse.get_p95_highlight_factor(p95) == pytest.approx(expected)
+
+    def test_p95_factor_batch_matches_scalar(self, timelapse):
+        """The batch form gives the same factor as the scalar method per value."""
+        # Missing data (None or NaN) mixed in among real values
+        p95_values = [None, float("nan"), 250.0, float("nan"), None, 210.0]
+        p95_values += [x * 0.5 for x in range(0, 601)]
+
+        factors = timelapse.get_p95_highlight_factor_batch(p95_values)
+
+        expected = [timelapse.get_p95_highlight_factor(p) for p in p95_values]
+        assert factors.tolist() == pytest.approx(expected)
+
+    def test_p95_tracking_initialized(self, timelapse):
         """Test p95 tracking is initialized."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         assert hasattr(timelapse, "_last_p95")
         assert timelapse._last_p95 is None
 
@@ -2432,9 +2627,10 @@ class TestP95HighlightProtection:
 class TestDirectBrightnessControl:
     """Tests for direct brightness control (_calculate_exposure_from_brightness)."""
 
-    @pytest.fixture
-    def direct_control_config_file(self):
-        """Create config file with direct brightness control enabled."""
+    @pytest.fixture(scope="class")
+    @classmethod
+    def direct_control_config_file(cls, tmp_path_factory):
+        """Write the direct brightness control config once for the whole class."""
         config_data = {
             "camera": {
                 "resolution": {"width": 1280, "height": 720},
@@ -2475,16 +2671,13 @@ class TestDirectBrightnessControl:
             },
         }
 
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
-            yaml.dump(config_data, f)
-            config_path = f.name
-
-        yield config_path
-        os.unlink(config_path)
+        config_path = tmp_path_factory.mktemp("direct_control") / "config.json"
+        config_path.write_bytes(json.dumps(config_data).encode("utf-8"))
+        return str(config_path)
 
     def test_first_frame_uses_lux_estimate(self, direct_control_config_file):
         """Test first frame uses lux-based initial estimate."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = None
 
         # With lux=1000, formula: (20 * 3.8) / 1000 = 0.076s
@@ -2493,7 +2686,7 @@ class TestDirectBrightnessControl:
 
     def test_first_frame_default_without_lux(self, direct_control_config_file):
         """Test first frame uses 20ms default when no lux available."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = None
 
         exposure = timelapse._calculate_exposure_from_brightness(100, lux=None)
@@ -2501,7 +2694,7 @@ class TestDirectBrightnessControl:
 
     def test_increases_exposure_when_too_dark(self, direct_control_config_file):
         """Test exposure increases when brightness is below target."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = 0.1
         timelapse._target_brightness = 120
 
@@ -2513,7 +2706,7 @@ class TestDirectBrightnessControl:
 
     def test_decreases_exposure_when_too_bright(self, direct_control_config_file):
         """Test exposure decreases when brightness is above target."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = 0.1
         timelapse._target_brightness = 120
 
@@ -2525,7 +2718,7 @@ class TestDirectBrightnessControl:
 
     def test_no_change_at_target_brightness(self, direct_control_config_file):
         """Test minimal change when at target brightness."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = 0.1
         timelapse._target_brightness = 120
 
@@ -2535,7 +2728,7 @@ class TestDirectBrightnessControl:
 
     def test_ratio_clamped_to_max_4x(self, direct_control_config_file):
         """Test correction ratio is clamped to prevent extreme changes."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = 0.1
         timelapse._target_brightness = 120
 
@@ -2546,7 +2739,7 @@ class TestDirectBrightnessControl:
 
     def test_exposure_clamped_to_max(self, direct_control_config_file):
         """Test exposure is clamped to max (20s)."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = 15.0
         timelapse._target_brightness = 120
 
@@ -2556,7 +2749,7 @@ class TestDirectBrightnessControl:
 
     def test_handles_none_brightness(self, direct_control_config_file):
         """Test handles None brightness gracefully by using seeded exposure."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = 0.1
 
         # When brightness is None but we have seeded exposure, use seeded value
@@ -2566,7 +2759,7 @@ class TestDirectBrightnessControl:
 
     def test_damping_affects_correction_strength(self, direct_control_config_file):
         """Test different damping values affect correction strength."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
         timelapse._last_exposure_time = 0.1
         timelapse._target_brightness = 120
 
@@ -2581,9 +2774,39 @@ class TestDirectBrightnessControl:
         # Higher damping = larger correction
         assert new_exp_08 > new_exp_05
 
+    @pytest.mark.parametrize("damping", [0.3, 0.5, 1.0])
+    def test_damping_is_ratio_power(self, direct_control_config_file, damping):
+        """The exposure change is (target / actual) ** damping for any damping."""
+        timelapse = _timelapse_for(direct_control_config_file)
+        timelapse.config["adaptive_timelapse"]["brightness_damping"] = damping
+        timelapse._last_exposure_time = 0.1
+        timelapse._target_brightness = 120
+
+        new_exposure = timelapse._calculate_exposure_from_brightness(60, lux=500)
+
+        assert new_exposure == pytest.approx(0.1 * 2.0**damping)
+
+    def test_exposure_stays_bounded_over_long_sweep(self, direct_control_config_file):
+        """Over many random frames, each step is within 4**damping and the valid range."""
+        timelapse = _timelapse_for(direct_control_config_file)
+        timelapse._last_exposure_time = 0.1
+        timelapse._target_brightness = 120
+        night_max = timelapse._night_config["max_exposure_time"]
+        max_step = 4.0**0.5  # Ratio clamp with the configured 0.5 damping
+        rng = random.Random(3)
+
+        for _ in range(2000):
+            previous = timelapse._last_exposure_time
+            exposure = timelapse._calculate_exposure_from_brightness(rng.uniform(1.0, 255.0))
+
+            assert 0.0001 <= exposure <= night_max
+            assert previous / max_step <= exposure * (1 + 1e-9)
+            assert exposure <= previous * max_step * (1 + 1e-9)
+            timelapse._last_exposure_time = exposure
+
     def test_ml_skipped_when_direct_control_enabled(self, direct_control_config_file):
         """Test ML is not initialized when direct control is enabled."""
-        timelapse = AdaptiveTimelapse(direct_control_config_file)
+        timelapse = _timelapse_for(direct_control_config_file)
 
         # ML should be disabled
         assert timelapse._ml_enabled is False
@@ -2593,15 +2816,15 @@ class TestDirectBrightnessControl:
 class TestGainSpeedOverride:
     """Test _interpolate_gain with speed_override parameter."""
 
-    def test_gain_speed_override_faster(self, test_config_file):
+    def test_gain_speed_override_faster(self, readonly_config_file):
         """Test speed_override makes gain change faster."""
-        timelapse = AdaptiveTimelapse(test_config_file)
+        timelapse = _timelapse_for(readonly_config_file)
 
         # Initialize at gain 1.0
         timelapse._interpolate_gain(1.0)
 
         # Normal interpolation (default speed ~0.10)
-        timelapse_normal = AdaptiveTimelapse(test_config_file)
+        timelapse_normal = _timelapse_for(readonly_config_file)
         timelapse_normal._interpolate_gain(1.0)
         normal_result = timelapse_normal._interpolate_gain(6.0)
 
@@ -2612,10 +2835,8 @@ class TestGainSpeedOverride:
         assert fast_result > normal_result
         assert fast_result > 1.0 and fast_result < 6.0
 
-    def test_gain_speed_override_slower(self, test_config_file):
+    def test_gain_speed_override_slower(self, timelapse):
         """Test speed_override can also slow down transitions."""
-        timelapse = AdaptiveTimelapse(test_config_file)
-
         timelapse._interpolate_gain(1.0)
         slow_result = timelapse._interpolate_gain(6.0, speed_override=0.05)
 
@@ -2626,9 +2847,8 @@ class TestGainSpeedOverride:
 class TestNightModeBrightnessFeedback:
     """Test night mode brightness feedback for dawn overexposure."""
 
-    def test_night_mode_reduces_exposure_when_overexposed(self, test_config_file):
+    def test_night_mode_reduces_exposure_when_overexposed(self, timelapse):
         """Test night mode reduces exposure when brightness > 140."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         # Enable direct brightness control
         timelapse.config["adaptive_timelapse"]["direct_brightness_control"] = True
 
@@ -2645,9 +2865,8 @@ class TestNightModeBrightnessFeedback:
         # But not below 60% of max (12s)
         assert exposure_s >= 12.0
 
-    def test_night_mode_full_exposure_when_not_overexposed(self, test_config_file):
+    def test_night_mode_full_exposure_when_not_overexposed(self, timelapse):
         """Test night mode uses max exposure when brightness is normal."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse.config["adaptive_timelapse"]["direct_brightness_control"] = True
 
         timelapse._last_exposure_time = 18.0
@@ -2664,9 +2883,8 @@ class TestNightModeBrightnessFeedback:
 class TestCoordinatedNightModeRamps:
     """Test coordinated gain/exposure ramps when entering night mode."""
 
-    def test_entering_night_uses_coordinated_ramps(self, test_config_file):
+    def test_entering_night_uses_coordinated_ramps(self, timelapse):
         """Test coordinated ramps when gain < 50% of target."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse.config["adaptive_timelapse"]["direct_brightness_control"] = True
 
         # Simulate coming from transition: low gain, medium exposure
@@ -2682,9 +2900,8 @@ class TestCoordinatedNightModeRamps:
         exposure_s = settings["ExposureTime"] / 1_000_000
         assert exposure_s > 16.0
 
-    def test_established_night_uses_normal_ramps(self, test_config_file):
+    def test_established_night_uses_normal_ramps(self, timelapse):
         """Test normal ramps when already in night mode (gain >= 50% of target)."""
-        timelapse = AdaptiveTimelapse(test_config_file)
         timelapse.config["adaptive_timelapse"]["direct_brightness_control"] = True
 
         # Already in night mode: high gain
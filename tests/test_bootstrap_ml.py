@@ -2,6 +2,7 @@
 Tests for ML Bootstrap Script.
 """
 
+import gzip
 import json
 import os
 import tempfile
@@ -117,6 +118,24 @@ class TestProcessMetadataFile:
             assert result["diagnostics"]["raw_lux"] == 100.0
             os.unlink(f.name)
 
+    @pytest.mark.parametrize(
+        "sidecar_name,opener",
+        [("img_metadata.diag.jsonl", open), ("img_metadata.diag.jsonl.gz", gzip.open)],
+    )
+    def test_process_metadata_with_diagnostics_sidecar(self, tmp_path, sidecar_name, opener):
+        """Test diagnostics appended to a (possibly gzipped) sidecar are used."""
+        from src.bootstrap_ml import process_metadata_file
+
+        meta_path = tmp_path / "img_metadata.json"
+        meta_path.write_text(json.dumps({"ExposureTime": 5000}))
+        with opener(tmp_path / sidecar_name, "wt") as f:
+            f.write(json.dumps({"diagnostics": {"smoothed_lux": 42.0}}) + "\n")
+
+        result = process_metadata_file(str(meta_path))
+
+        assert result is not None
+        assert result["diagnostics"]["smoothed_lux"] == 42.0
+
     def test_process_missing_lux(self):
         """Test processing metadata without lux returns None."""
         from src.bootstrap_ml import process_metadata_file
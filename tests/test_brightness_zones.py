@@ -7,6 +7,12 @@ import tempfile
 import os
 import yaml
 
+# Prefer libyaml C bindings for writing test configs, fall back to pure Python
+try:
+    from yaml import CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeDumper as _Dumper
+
 
 class TestBrightnessZones:
     """Tests for BrightnessZones constants."""
@@ -59,7 +65,7 @@ class TestEmergencyBrightnessFactor:
 
         config_path = tmp_path / "config.yml"
         with open(config_path, "w") as f:
-            yaml.dump(config, f)
+            yaml.dump(config, f, Dumper=_Dumper)
 
         # Create output directory
         (tmp_path / "output").mkdir(exist_ok=True)
@@ -180,7 +186,7 @@ class TestHybridModeDetection:
 
         config_path = tmp_path / "config.yml"
         with open(config_path, "w") as f:
-            yaml.dump(config, f)
+            yaml.dump(config, f, Dumper=_Dumper)
 
         (tmp_path / "output").mkdir(exist_ok=True)
 
@@ -276,7 +282,7 @@ class TestUrgencyScaledFeedback:
 
         config_path = tmp_path / "config.yml"
         with open(config_path, "w") as f:
-            yaml.dump(config, f)
+            yaml.dump(config, f, Dumper=_Dumper)
 
         (tmp_path / "output").mkdir(exist_ok=True)
 
@@ -346,7 +352,7 @@ class TestNightModeGainReduction:
 
         config_path = tmp_path / "config.yml"
         with open(config_path, "w") as f:
-            yaml.dump(config, f)
+            yaml.dump(config, f, Dumper=_Dumper)
 
         (tmp_path / "output").mkdir(exist_ok=True)
 
@@ -417,7 +423,7 @@ class TestEnteringNightThrottle:
 
         config_path = tmp_path / "config.yml"
         with open(config_path, "w") as f:
-            yaml.dump(config, f)
+            yaml.dump(config, f, Dumper=_Dumper)
 
         (tmp_path / "output").mkdir(exist_ok=True)
 
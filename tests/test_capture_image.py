@@ -3,7 +3,6 @@
 import os
 import json
 import tempfile
-import shutil
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 import pytest
@@ -49,10 +48,9 @@ def mock_picamera2():
         yield mock_camera
 
 
-@pytest.fixture
-def test_config_file():
-    """Create a temporary test configuration file."""
-    config_data = {
+def _make_test_config():
+    """Build the default test configuration dictionary."""
+    return {
         "camera": {
             "resolution": {"width": 1280, "height": 720},
             "transforms": {"horizontal_flip": False, "vertical_flip": False},
@@ -79,23 +77,23 @@ def test_config_file():
         },
     }
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".yml", delete=False) as f:
-        yaml.dump(config_data, f)
-        config_path = f.name
 
-    yield config_path
+@pytest.fixture(scope="module")
+def test_config_file(tmp_path_factory):
+    """Write the test configuration once per module. Do not modify the file.
 
-    # Cleanup
-    os.unlink(config_path)
+    CameraConfig parses a fresh dict on every load, so tests may still edit
+    config.config in memory.
+    """
+    config_path = tmp_path_factory.mktemp("cfg") / "config.yml"
+    config_path.write_text(yaml.safe_dump(_make_test_config()))
+    return str(config_path)
 
 
 @pytest.fixture
-def test_output_dir():
-    """Create a temporary output directory."""
-    temp_dir = tempfile.mkdtemp()
-    yield temp_dir
-    # Cleanup
-    shutil.rmtree(temp_dir, ignore_errors=True)
+def test_output_dir(tmp_path):
+    """Temporary output directory (cleaned up by pytest)."""
+    return str(tmp_path)
 
 
 class TestCameraConfig:
@@ -113,6 +111,16 @@ class TestCameraConfig:
         with pytest.raises(FileNotFoundError):
             CameraConfig("nonexistent.yml")
 
+    def test_preparsed_config_skips_file(self):
+        """Test a pre-parsed config is used as-is without reading the file."""
+        parsed = _make_test_config()
+        config = CameraConfig("nonexistent.yml", config=parsed)
+        assert config.config is parsed
+        assert config.get_resolution() == (
+            parsed["camera"]["resolution"]["width"],
+            parsed["camera"]["resolution"]["height"],
+        )
+
     def test_get_resolution(self, test_config_file):
         """Test resolution retrieval."""
         config = CameraConfig(test_config_file)
@@ -405,18 +413,16 @@ class TestDateOrganization:
 class TestConvenienceFunctions:
     """Tests for convenience functions."""
 
-    def test_capture_single_image(self, mock_picamera2, test_config_file, test_output_dir):
+    def test_capture_single_image(self, mock_picamera2, tmp_path):
         """Test capture_single_image convenience function."""
-        # Modify config to use test directory
-        with open(test_config_file, "r") as f:
-            config_data = yaml.safe_load(f)
-        config_data["output"]["directory"] = test_output_dir
-
-        with open(test_config_file, "w") as f:
-            yaml.dump(config_data, f)
+        # Own config file pointing at the test directory (the shared one is read-only)
+        config_data = _make_test_config()
+        config_data["output"]["directory"] = str(tmp_path / "output")
+        config_path = tmp_path / "config.yml"
+        config_path.write_text(yaml.safe_dump(config_data))
 
         # Capture image
-        image_path, metadata_path = capture_single_image(test_config_file)
+        image_path, metadata_path = capture_single_image(str(config_path))
 
         assert image_path is not None
         assert "test_project_0000.jpg" in image_path
@@ -0,0 +1,41 @@
+"""
+Tests for diagnostics_sidecar.py
+
+Tests the shared sidecar helpers used by auto_timelapse (writer) and the
+analysis / ML bootstrap tools (readers).
+"""
+
+import pytest
+
+from src.auto_timelapse import _append_json_line
+from src.diagnostics_sidecar import load_sidecar_diagnostics, sidecar_path
+
+
+@pytest.mark.parametrize(
+    "compress, expected_name",
+    [(False, "img_metadata.diag.jsonl"), (True, "img_metadata.diag.jsonl.gz")],
+)
+def test_sidecar_path(tmp_path, compress, expected_name):
+    """Test the sidecar sits next to the metadata file with the right suffix."""
+    assert sidecar_path(tmp_path / "img_metadata.json", compress) == tmp_path / expected_name
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_load_returns_latest_written_entry(tmp_path, compress):
+    """Test entries appended by the writer are read back (latest entry wins)."""
+    meta_path = tmp_path / "img_metadata.json"
+    for mode in ("night", "transition"):
+        _append_json_line(
+            sidecar_path(meta_path, compress), {"diagnostics": {"mode": mode}}, compress=compress
+        )
+
+    assert load_sidecar_diagnostics(str(meta_path)) == {"diagnostics": {"mode": "transition"}}
+
+
+def test_load_without_sidecar(tmp_path):
+    """Test a missing or empty sidecar yields an empty dict."""
+    meta_path = tmp_path / "img_metadata.json"
+    assert load_sidecar_diagnostics(meta_path) == {}
+
+    sidecar_path(meta_path).write_text("")
+    assert load_sidecar_diagnostics(meta_path) == {}
@@ -1,9 +1,8 @@
 """Tests for contrast-aware dynamic brightness targeting (overcast boost)."""
 
+import copy
 import os
-import tempfile
 import pytest
-import yaml
 
 import sys
 
@@ -12,9 +11,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from src.auto_timelapse import AdaptiveTimelapse, LightMode
 
 
-@pytest.fixture
-def timelapse(tmp_path):
-    """Create an AdaptiveTimelapse instance with brightness_target config."""
+@pytest.fixture(scope="module")
+def base_timelapse(tmp_path_factory):
+    """Create one AdaptiveTimelapse instance with brightness_target config per module."""
+    tmp_path = tmp_path_factory.mktemp("overcast")
     config = {
         "adaptive_timelapse": {
             "enabled": True,
@@ -63,13 +63,16 @@ def timelapse(tmp_path):
         "overlay": {"enabled": False},
     }
 
-    config_path = tmp_path / "config.yml"
-    with open(config_path, "w") as f:
-        yaml.dump(config, f)
-
     (tmp_path / "output").mkdir(exist_ok=True)
 
-    return AdaptiveTimelapse(str(config_path))
+    # Built straight from the dict; YAML loading is covered in test_auto_timelapse.py
+    return AdaptiveTimelapse.from_config_dict(config)
+
+
+@pytest.fixture
+def timelapse(base_timelapse):
+    """Fresh copy of the shared instance, so per-test state changes don't leak."""
+    return copy.deepcopy(base_timelapse)
 
 
 class TestDynamicTargetBrightness:
@@ -199,12 +202,8 @@ class TestConfigLoading:
             "overlay": {"enabled": False},
         }
 
-        config_path = tmp_path / "config.yml"
-        with open(config_path, "w") as f:
-            yaml.dump(config, f)
-
         (tmp_path / "output").mkdir(exist_ok=True)
-        tl = AdaptiveTimelapse(str(config_path))
+        tl = AdaptiveTimelapse.from_config_dict(config)
 
         assert tl._base_target_brightness == 120
         assert tl._overcast_boost == 15
@@ -1130,8 +1130,7 @@ class TestShipBoxesRendering:
             assert os.path.exists(result)
             os.unlink(output_path)
         finally:
-            if os.path.exists(ships_file_path):
-                os.unlink(ships_file_path)
+            Path(ships_file_path).unlink(missing_ok=True)
 
     def test_draw_ship_boxes_without_ships_data(
         self, test_overlay_config, test_image, test_metadata